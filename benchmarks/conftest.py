@@ -0,0 +1,85 @@
+"""Data for benchmarks. Tables are the size of a fully bonded MB8611."""
+from typing import Any
+import json
+
+from mb8611.client import Client
+import pytest
+import requests_mock as req_mock
+
+HOST = '192.168.100.1'
+DOWNSTREAM = '|+|'.join(
+    f'{i}^Locked^QAM256^{i + 8}^{435 + i * 6}.0^ {i % 7 - 3}.{i % 10}^{38 + i % 5}.{i % 9}^'
+    f'{i * 1234}^{i * 7}^' for i in range(1, 33))
+"""``MotoConnDownstreamChannel`` with 32 channels."""
+UPSTREAM = '|+|'.join(
+    f'{i}^Locked^SC-QAM^{i}^5120^{16.4 + i * 6.4:.1f}^{40 + i % 4}.{i % 10}^' for i in range(1, 9))
+"""``MotoConnUpstreamChannel`` with 8 channels."""
+LOG = '}-{'.join(f'{i % 24:02d}:{i % 60:02d}:{i % 60:02d}^Thu Jan 01 1970^Critical (3)^'
+                 f'No Ranging Response received - T3 time-out;CM-MAC=00:00:00:00:00:00;'
+                 f'CMTS-MAC=00:00:00:00:00:00;CM-QOS=1.1;CM-VER=3.1;^' for i in range(5000))
+"""``MotoStatusLogList`` with 5000 rows."""
+CHANNELS_RESPONSE: dict[str, Any] = {
+    'GetMultipleHNAPsResponse': {
+        'GetMotoStatusDownstreamChannelInfoResponse': {
+            'GetMotoStatusDownstreamChannelInfoResult': 'OK',
+            'MotoConnDownstreamChannel': DOWNSTREAM
+        },
+        'GetMotoStatusUpstreamChannelInfoResponse': {
+            'GetMotoStatusUpstreamChannelInfoResult': 'OK',
+            'MotoConnUpstreamChannel': UPSTREAM
+        },
+        'GetMultipleHNAPsResult': 'OK'
+    }
+}
+
+
+def _login_response(request: Any, context: Any) -> dict[str, Any]:
+    if request.json()['Login']['LoginPassword']:
+        return {'LoginResponse': {'LoginResult': 'OK'}}
+    return {
+        'LoginResponse': {
+            'Challenge': 'challenge',
+            'Cookie': 'uid',
+            'LoginResult': 'OK',
+            'PublicKey': 'public-key'
+        }
+    }
+
+
+@pytest.fixture
+def modem(requests_mock: req_mock.Mocker) -> req_mock.Mocker:
+    """Mock modem answering ``Login`` and ``GetMultipleHNAPs`` with the channel tables."""
+    requests_mock.post(f'https://{HOST}/HNAP1/',
+                       additional_matcher=lambda r: 'Login"' in r.headers['SOAPACTION'],
+                       json=_login_response)
+    requests_mock.post(f'https://{HOST}/HNAP1/',
+                       additional_matcher=lambda r: 'GetMultipleHNAPs' in r.headers['SOAPACTION'],
+                       json=CHANNELS_RESPONSE)
+    return requests_mock
+
+
+@pytest.fixture
+def client(modem: req_mock.Mocker) -> Client:
+    """Client for :py:func:`modem`. It is not logged in."""
+    return Client('password', HOST)
+
+
+@pytest.fixture
+def channels_response() -> bytes:
+    """``GetMultipleHNAPs`` response body with the channel tables."""
+    return json.dumps(CHANNELS_RESPONSE).encode()
+
+
+@pytest.fixture
+def downstream_table() -> str:
+    return DOWNSTREAM
+
+
+@pytest.fixture
+def upstream_table() -> str:
+    return UPSTREAM
+
+
+@pytest.fixture
+def log_table() -> str:
+    return LOG
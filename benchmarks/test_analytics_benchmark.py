@@ -0,0 +1,19 @@
+from mb8611.analytics import analyze_arrays
+from mb8611.arrays import downstream_array, upstream_array
+from pytest_benchmark.fixture import BenchmarkFixture
+
+HOSTS = 500
+"""Number of modems in the fleet."""
+
+
+def test_analyze_arrays(benchmark: BenchmarkFixture, downstream_table: str,
+                        upstream_table: str) -> None:
+    hosts = [f'10.0.{i // 256}.{i % 256}' for i in range(HOSTS)]
+    downstream = downstream_array([downstream_table] * HOSTS)
+    upstream = upstream_array([upstream_table] * HOSTS)
+    health = benchmark(analyze_arrays, hosts, downstream, upstream, [86400.0] * HOSTS)
+    assert len(health.modems) == HOSTS
+
+
+def test_downstream_array_fleet(benchmark: BenchmarkFixture, downstream_table: str) -> None:
+    assert len(benchmark(downstream_array, [downstream_table] * HOSTS)) == HOSTS * 32
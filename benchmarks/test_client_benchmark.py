@@ -0,0 +1,24 @@
+from mb8611.client import Client
+from pytest_benchmark.fixture import BenchmarkFixture
+
+
+def test_login(benchmark: BenchmarkFixture, client: Client) -> None:
+    def login() -> None:
+        client.private_key = 'withoutloginkey'
+        client.login()
+
+    benchmark(login)
+    assert client.private_key != 'withoutloginkey'
+
+
+def test_call_multiple_hnaps(benchmark: BenchmarkFixture, client: Client) -> None:
+    client.login()
+    response = benchmark(client.call_multiple_hnaps,
+                         ['GetMotoStatusDownstreamChannelInfo', 'GetMotoStatusUpstreamChannelInfo'])
+    assert response['GetMultipleHNAPsResponse']['GetMultipleHNAPsResult'] == 'OK'
+
+
+def test_call_hnap(benchmark: BenchmarkFixture, client: Client) -> None:
+    client.login()
+    response = benchmark(client.call_hnap, 'GetMotoStatusDownstreamChannelInfo')
+    assert 'GetMultipleHNAPsResponse' in response
@@ -0,0 +1,64 @@
+from collections.abc import Iterator
+from typing import Any
+
+from mb8611.channels import parse_downstream_channels
+from mb8611.codec import get_codec
+from mb8611.structs import decoder
+from mb8611.utils import (
+    HNAPSigner,
+    iter_table_rows,
+    make_hnap_auth,
+    make_soap_action_uri,
+    parse_table_str,
+)
+from pytest_benchmark.fixture import BenchmarkFixture
+import pytest
+
+
+def _consume(iterator: Iterator[Any]) -> int:
+    return sum(1 for _ in iterator)
+
+
+def test_make_hnap_auth(benchmark: BenchmarkFixture) -> None:
+    benchmark(make_hnap_auth, 'GetMultipleHNAPs', '0123456789ABCDEF0123456789ABCDEF')
+
+
+def test_hnap_signer_sign(benchmark: BenchmarkFixture) -> None:
+    benchmark(HNAPSigner('0123456789ABCDEF0123456789ABCDEF').sign, 'GetMultipleHNAPs')
+
+
+def test_make_soap_action_uri(benchmark: BenchmarkFixture) -> None:
+    benchmark(make_soap_action_uri, 'GetMultipleHNAPs')
+
+
+def test_parse_table_str_downstream(benchmark: BenchmarkFixture, downstream_table: str) -> None:
+    assert benchmark(lambda: _consume(parse_table_str(downstream_table))) == 32
+
+
+def test_parse_table_str_upstream(benchmark: BenchmarkFixture, upstream_table: str) -> None:
+    assert benchmark(lambda: _consume(parse_table_str(upstream_table))) == 8
+
+
+def test_parse_downstream_channels(benchmark: BenchmarkFixture, downstream_table: str) -> None:
+    assert benchmark(lambda: _consume(parse_downstream_channels(downstream_table))) == 32
+
+
+def test_parse_table_str_log(benchmark: BenchmarkFixture, log_table: str) -> None:
+    assert benchmark(lambda: _consume(parse_table_str(log_table, '}-{'))) == 5000
+
+
+def test_iter_table_rows_log_bytes(benchmark: BenchmarkFixture, log_table: str) -> None:
+    log = log_table.encode()
+    assert benchmark(lambda: _consume(iter_table_rows(log, '}-{'))) == 5000
+
+
+@pytest.mark.parametrize('name', ['json', 'msgspec', 'orjson'])
+def test_decode_channels_response(benchmark: BenchmarkFixture, channels_response: bytes,
+                                  name: str) -> None:
+    response = benchmark(get_codec(name).decode, channels_response)
+    assert response['GetMultipleHNAPsResponse']['GetMultipleHNAPsResult'] == 'OK'
+
+
+def test_decode_channels_response_typed(benchmark: BenchmarkFixture,
+                                        channels_response: bytes) -> None:
+    assert benchmark(decoder.decode, channels_response).response.downstream is not None
@@ -1,4 +1,17 @@
 """mb8611."""
-from .main import main as mb8611_main
+from typing import TYPE_CHECKING, Any
+
+if TYPE_CHECKING:
+    from .main import main as mb8611_main
 
 __all__ = ('mb8611_main',)
+
+
+def __getattr__(name: str) -> Any:
+    # Importing the package must not import the command and its dependencies.
+    if name != 'mb8611_main':
+        msg = f'module {__name__!r} has no attribute {name!r}'
+        raise AttributeError(msg)
+    from .main import main  # noqa: PLC0415
+
+    return main
@@ -0,0 +1,304 @@
+"""
+Signal quality analytics for many modems.
+
+Requires the ``numpy`` extra. The channel tables of every modem are stacked into the structured
+arrays of :py:mod:`mb8611.arrays` and scores, percentiles and outliers are computed on whole
+columns, so analyzing hundreds of modems takes milliseconds.
+"""
+from collections.abc import Mapping, Sequence
+from typing import Any, Final, NamedTuple, cast
+
+import numpy as np
+import numpy.typing as npt
+
+from .api import GetMultipleHNAPsResponse
+from .arrays import downstream_array, upstream_array
+from .utils import parse_uptime
+
+__all__ = ('OUTLIER_THRESHOLD', 'PERCENTILES', 'FleetHealth', 'Limits', 'analyze', 'analyze_arrays',
+           'analyze_responses', 'modem_dtype')
+
+PERCENTILES: Final = (5, 25, 50, 75, 95)
+"""Percentiles in :py:attr:`FleetHealth.percentiles`."""
+OUTLIER_THRESHOLD: Final = 3.5
+"""Modified z-score above which a modem is an outlier."""
+
+
+class Limits(NamedTuple):
+    """
+    Limits used to score channels.
+
+    A channel scores ``1`` when within every limit and ``0`` when unlocked or when any value is a
+    full margin past its limit. In between the score decreases linearly with the worst value.
+    """
+    downstream_power: tuple[float, float] = (-7.0, 7.0)
+    """Range of downstream power in dBmV."""
+    upstream_power: tuple[float, float] = (35.0, 51.0)
+    """Range of upstream power in dBmV."""
+    power_margin: float = 3.0
+    """dB outside a power range at which the score is ``0``."""
+    min_snr: float = 33.0
+    """Minimum downstream signal to noise ratio in dB."""
+    snr_margin: float = 6.0
+    """dB below :py:attr:`min_snr` at which the score is ``0``."""
+    max_uncorrected_rate: float = 1.0
+    """Uncorrectable codewords per second at which the score is ``0``."""
+
+
+def modem_dtype(host_length: int = 64) -> np.dtype[Any]:
+    """Return the data type of :py:attr:`FleetHealth.modems` for hosts up to ``host_length``."""
+    return np.dtype([('host', f'U{host_length}'), ('score', np.float32),
+                     ('downstream_channels', np.uint16), ('upstream_channels', np.uint16),
+                     ('unlocked', np.uint16), ('low_snr', np.uint16), ('power_out', np.uint16),
+                     ('snr_min', np.float32), ('snr_p10', np.float32), ('snr_median', np.float32),
+                     ('downstream_power_min', np.float32), ('downstream_power_max', np.float32),
+                     ('upstream_power_max', np.float32), ('uncorrected_rate', np.float32),
+                     ('outlier', np.bool_)])
+
+
+class FleetHealth(NamedTuple):
+    """Result of :py:func:`analyze` and :py:func:`analyze_arrays`."""
+    modems: npt.NDArray[np.void]
+    """
+    One row per modem with data type :py:func:`modem_dtype`, worst score first. Modems without
+    channels come before every other modem.
+
+    ``score`` is the mean score of the modem's channels from ``0`` to ``100``. ``low_snr`` and
+    ``power_out`` are the number of channels outside the limits. ``uncorrected_rate`` is the sum of
+    the channels' uncorrectable codewords per second since the modem started (``NaN`` without
+    uptimes). Statistics of a modem without channels are ``NaN``.
+    """
+    downstream: npt.NDArray[np.void]
+    """Downstream channels of every modem. ``sample`` is the index of the host."""
+    downstream_scores: npt.NDArray[np.float32]
+    """Score of each row of :py:attr:`downstream` from ``0`` to ``1``."""
+    upstream: npt.NDArray[np.void]
+    """Upstream channels of every modem. ``sample`` is the index of the host."""
+    upstream_scores: npt.NDArray[np.float32]
+    """Score of each row of :py:attr:`upstream` from ``0`` to ``1``."""
+    percentiles: Mapping[str, npt.NDArray[np.float64]]
+    """
+    :py:data:`PERCENTILES` of the fleet for ``'score'``, ``'snr'``, ``'downstream_power'`` and
+    ``'upstream_power'``.
+    """
+
+
+def _penalty(excess: npt.NDArray[Any], margin: float) -> npt.NDArray[np.float64]:
+    return np.clip(excess / margin, 0, 1)
+
+
+def _power_excess(power: npt.NDArray[Any], limits: tuple[float, float]) -> npt.NDArray[Any]:
+    return np.maximum(limits[0] - power, power - limits[1])
+
+
+def _group_starts(samples: npt.NDArray[Any], n: int) -> tuple[npt.NDArray[Any], npt.NDArray[Any]]:
+    # Rows are ordered by sample.
+    return np.searchsorted(samples, np.arange(n)), np.bincount(samples, minlength=n)
+
+
+def _group_reduce(ufunc: np.ufunc, values: npt.NDArray[Any], starts: npt.NDArray[Any],
+                  counts: npt.NDArray[Any]) -> npt.NDArray[np.float32]:
+    out = np.full(len(counts), np.nan, dtype=np.float32)
+    if (nonempty := counts > 0).any():
+        out[nonempty] = ufunc.reduceat(values, starts[nonempty])
+    return out
+
+
+def _group_percentile(values: npt.NDArray[Any], samples: npt.NDArray[Any], starts: npt.NDArray[Any],
+                      counts: npt.NDArray[Any], q: float) -> npt.NDArray[np.float32]:
+    # Same as linear interpolation in numpy.percentile, for every group at once.
+    out = np.full(len(counts), np.nan, dtype=np.float32)
+    nonempty = counts > 0
+    if not nonempty.any():
+        return out
+    ordered = values[np.lexsort((values, samples))]
+    pos = (counts[nonempty] - 1) * q / 100
+    low = np.floor(pos).astype(np.intp)
+    high = np.ceil(pos).astype(np.intp)
+    starts = starts[nonempty]
+    out[nonempty] = ordered[starts +
+                            low] + (ordered[starts + high] - ordered[starts + low]) * (pos - low)
+    return out
+
+
+def _percentiles(values: npt.NDArray[Any]) -> npt.NDArray[np.float64]:
+    values = values[np.isfinite(values)]
+    if not len(values):
+        return np.full(len(PERCENTILES), np.nan)
+    return cast('npt.NDArray[np.float64]', np.percentile(values, PERCENTILES))
+
+
+def _outliers(values: npt.NDArray[Any]) -> npt.NDArray[np.bool_]:
+    # Modified z-score (Iglewicz and Hoaglin). Falls back to the mean absolute deviation when more
+    # than half of the values are equal.
+    finite = np.isfinite(values)
+    out = np.zeros(len(values), dtype=np.bool_)
+    if finite.sum() < 3:  # noqa: PLR2004
+        return out
+    median = np.median(values[finite])
+    deviation = np.abs(values[finite] - median)
+    if (mad := np.median(deviation)) > 0:
+        z = 0.6745 * deviation / mad
+    elif (mean_ad := deviation.mean()) > 0:
+        z = deviation / (1.253314 * mean_ad)
+    else:
+        return out
+    out[finite] = z > OUTLIER_THRESHOLD
+    return out
+
+
+def analyze(hosts: Sequence[str],
+            downstream: Sequence[str],
+            upstream: Sequence[str] | None = None,
+            uptimes: Sequence[float] | None = None,
+            limits: Limits | None = None) -> FleetHealth:
+    """
+    Score the channels of many modems.
+
+    Parameters
+    ----------
+    hosts : Sequence[str]
+        Hosts of the modems.
+    downstream : Sequence[str]
+        ``MotoConnDownstreamChannel`` of each host.
+    upstream : Sequence[str] | None
+        ``MotoConnUpstreamChannel`` of each host.
+    uptimes : Sequence[float] | None
+        Seconds since each modem started, used to compute the uncorrectable codeword rates.
+    limits : Limits | None
+        Limits to score channels with.
+
+    Returns
+    -------
+    FleetHealth
+        Scores and statistics.
+    """
+    return analyze_arrays(hosts, downstream_array(downstream), upstream_array(upstream or ()),
+                          uptimes, limits)
+
+
+def analyze_arrays(hosts: Sequence[str],
+                   downstream: npt.NDArray[np.void],
+                   upstream: npt.NDArray[np.void] | None = None,
+                   uptimes: Sequence[float] | None = None,
+                   limits: Limits | None = None) -> FleetHealth:
+    """
+    Score channels already parsed with :py:mod:`mb8611.arrays`.
+
+    Parsing the tables takes most of the time of :py:func:`analyze`. Use this to analyze arrays
+    that are kept or built elsewhere. ``sample`` of each row must be the index of its host in
+    ``hosts`` and rows must be ordered by ``sample``.
+
+    Parameters
+    ----------
+    hosts : Sequence[str]
+        Hosts of the modems.
+    downstream : numpy.ndarray
+        Array with data type :py:data:`~mb8611.arrays.DOWNSTREAM_DTYPE`.
+    upstream : numpy.ndarray | None
+        Array with data type :py:data:`~mb8611.arrays.UPSTREAM_DTYPE`.
+    uptimes : Sequence[float] | None
+        Seconds since each modem started, used to compute the uncorrectable codeword rates.
+    limits : Limits | None
+        Limits to score channels with.
+
+    Returns
+    -------
+    FleetHealth
+        Scores and statistics.
+    """
+    limits = limits or Limits()
+    n = len(hosts)
+    down = downstream
+    up = upstream_array(()) if upstream is None else upstream
+    down_samples = down['sample'].astype(np.intp)
+    up_samples = up['sample'].astype(np.intp)
+    snr = down['snr']
+    down_power = down['power']
+    up_power = up['power']
+
+    if uptimes is not None:
+        uptime = np.asarray(uptimes, dtype=np.float64)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            rates = np.where(uptime[down_samples] > 0, down['uncorrected'] / uptime[down_samples],
+                             0)
+    else:
+        rates = np.zeros(len(down))
+    down_power_excess = _power_excess(down_power, limits.downstream_power)
+    up_power_excess = _power_excess(up_power, limits.upstream_power)
+    down_scores = 1 - np.maximum.reduce([
+        _penalty(limits.min_snr - snr, limits.snr_margin),
+        _penalty(down_power_excess, limits.power_margin),
+        _penalty(rates, limits.max_uncorrected_rate)
+    ])
+    down_scores[~down['locked']] = 0
+    up_scores = 1 - _penalty(up_power_excess, limits.power_margin)
+    up_scores[~up['locked']] = 0
+
+    down_starts, down_counts = _group_starts(down_samples, n)
+    up_starts, up_counts = _group_starts(up_samples, n)
+    modems = np.empty(n, dtype=modem_dtype(max((len(host) for host in hosts), default=1)))
+    modems['host'] = hosts
+    channels = down_counts + up_counts
+    with np.errstate(divide='ignore', invalid='ignore'):
+        modems['score'] = 100 * (np.bincount(down_samples, down_scores, n) +
+                                 np.bincount(up_samples, up_scores, n)) / channels
+    modems['downstream_channels'] = down_counts
+    modems['upstream_channels'] = up_counts
+    modems['unlocked'] = (np.bincount(down_samples, ~down['locked'], n) +
+                          np.bincount(up_samples, ~up['locked'], n))
+    modems['low_snr'] = np.bincount(down_samples, snr < limits.min_snr, n)
+    modems['power_out'] = (np.bincount(down_samples, down_power_excess > 0, n) +
+                           np.bincount(up_samples, up_power_excess > 0, n))
+    modems['snr_min'] = _group_reduce(np.minimum, snr, down_starts, down_counts)
+    modems['snr_p10'] = _group_percentile(snr, down_samples, down_starts, down_counts, 10)
+    modems['snr_median'] = _group_percentile(snr, down_samples, down_starts, down_counts, 50)
+    modems['downstream_power_min'] = _group_reduce(np.minimum, down_power, down_starts, down_counts)
+    modems['downstream_power_max'] = _group_reduce(np.maximum, down_power, down_starts, down_counts)
+    modems['upstream_power_max'] = _group_reduce(np.maximum, up_power, up_starts, up_counts)
+    modems['uncorrected_rate'] = (np.bincount(down_samples, rates, n)
+                                  if uptimes is not None else np.nan)
+    modems['outlier'] = _outliers(modems['score']) | _outliers(modems['snr_median'])
+
+    return FleetHealth(
+        # Modems without channels first.
+        modems[np.argsort(np.nan_to_num(modems['score'], nan=-1), kind='stable')],
+        down,
+        down_scores.astype(np.float32),
+        up,
+        up_scores.astype(np.float32),
+        {
+            'score': _percentiles(modems['score']),
+            'snr': _percentiles(snr),
+            'downstream_power': _percentiles(down_power),
+            'upstream_power': _percentiles(up_power)
+        })
+
+
+def analyze_responses(responses: Mapping[str, GetMultipleHNAPsResponse],
+                      limits: Limits | None = None) -> FleetHealth:
+    """
+    Score the channels of ``GetMultipleHNAPs`` responses keyed by host.
+
+    Responses should contain ``GetMotoStatusDownstreamChannelInfo`` and
+    ``GetMotoStatusUpstreamChannelInfo``. Uncorrectable codeword rates are computed if every
+    response contains ``GetMotoStatusConnectionInfo``.
+    """
+    downstream: list[str] = []
+    upstream: list[str] = []
+    uptimes: list[float] | None = []
+    for response in responses.values():
+        top = cast('dict[str, dict[str, str]]', response['GetMultipleHNAPsResponse'])
+        downstream.append(
+            top.get('GetMotoStatusDownstreamChannelInfoResponse', {}).get(
+                'MotoConnDownstreamChannel', ''))
+        upstream.append(
+            top.get('GetMotoStatusUpstreamChannelInfoResponse', {}).get(
+                'MotoConnUpstreamChannel', ''))
+        if uptimes is not None:
+            if (uptime := top.get('GetMotoStatusConnectionInfoResponse',
+                                  {}).get('MotoConnSystemUpTime')) is None:
+                uptimes = None
+            else:
+                uptimes.append(parse_uptime(uptime))
+    return analyze(list(responses), downstream, upstream, uptimes, limits)
@@ -1,22 +1,31 @@
-from .get_multiple_hnaps import (
-    GetHomeAddressResponse,
-    GetMultipleHNAPsPayload,
-    GetMultipleHNAPsResponse,
-)
-from .login import LoginPayload, LoginResponse
-from .settings import (
-    ClearLogPayload,
-    GetNetworkModeSettingsPayload,
-    GetNetworkModeSettingsResponse,
-    RebootPayload,
-    SetMotoLagStatusPayload,
-    SetMotoLagStatusResponse,
-    SetMotoStatusDSTargetFreqPayload,
-    SetStatusLogSettingsPayload,
-    SetStatusLogSettingsResponse,
-    SetStatusSecuritySettingsPayload,
-)
-from .types import Action, MultipleHNAPAction, Payload, Response
+"""
+Types of the HNAP API.
+
+Submodules are imported on first attribute access so that importing this package is fast.
+"""
+from typing import TYPE_CHECKING, Any
+import importlib
+
+if TYPE_CHECKING:
+    from .get_multiple_hnaps import (
+        GetHomeAddressResponse,
+        GetMultipleHNAPsPayload,
+        GetMultipleHNAPsResponse,
+    )
+    from .login import LoginPayload, LoginResponse
+    from .settings import (
+        ClearLogPayload,
+        GetNetworkModeSettingsPayload,
+        GetNetworkModeSettingsResponse,
+        RebootPayload,
+        SetMotoLagStatusPayload,
+        SetMotoLagStatusResponse,
+        SetMotoStatusDSTargetFreqPayload,
+        SetStatusLogSettingsPayload,
+        SetStatusLogSettingsResponse,
+        SetStatusSecuritySettingsPayload,
+    )
+    from .types import Action, MultipleHNAPAction, Payload, Response
 
 __all__ = ('Action', 'ClearLogPayload', 'GetHomeAddressResponse', 'GetMultipleHNAPsPayload',
            'GetMultipleHNAPsResponse', 'GetNetworkModeSettingsPayload',
@@ -25,3 +34,34 @@ __all__ = ('Action', 'ClearLogPayload', 'GetHomeAddressResponse', 'GetMultipleHN
            'SetMotoLagStatusResponse', 'SetMotoStatusDSTargetFreqPayload',
            'SetStatusLogSettingsPayload', 'SetStatusLogSettingsResponse',
            'SetStatusSecuritySettingsPayload')
+
+_MODULES = {
+    'Action': 'types',
+    'ClearLogPayload': 'settings',
+    'GetHomeAddressResponse': 'get_multiple_hnaps',
+    'GetMultipleHNAPsPayload': 'get_multiple_hnaps',
+    'GetMultipleHNAPsResponse': 'get_multiple_hnaps',
+    'GetNetworkModeSettingsPayload': 'settings',
+    'GetNetworkModeSettingsResponse': 'settings',
+    'LoginPayload': 'login',
+    'LoginResponse': 'login',
+    'MultipleHNAPAction': 'types',
+    'Payload': 'types',
+    'RebootPayload': 'settings',
+    'Response': 'types',
+    'SetMotoLagStatusPayload': 'settings',
+    'SetMotoLagStatusResponse': 'settings',
+    'SetMotoStatusDSTargetFreqPayload': 'settings',
+    'SetStatusLogSettingsPayload': 'settings',
+    'SetStatusLogSettingsResponse': 'settings',
+    'SetStatusSecuritySettingsPayload': 'settings',
+}
+
+
+def __getattr__(name: str) -> Any:
+    if (module := _MODULES.get(name)) is None:
+        msg = f'module {__name__!r} has no attribute {name!r}'
+        raise AttributeError(msg)
+    value = getattr(importlib.import_module(f'.{module}', __name__), name)
+    globals()[name] = value
+    return value
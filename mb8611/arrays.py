@@ -0,0 +1,114 @@
+"""
+NumPy structured arrays of the bonded channel tables.
+
+Requires the ``numpy`` extra.
+"""
+from collections.abc import Iterable, Sequence
+from typing import Any, Final
+import logging
+
+import numpy as np
+import numpy.typing as npt
+
+from .utils import parse_table_str
+
+__all__ = ('DOWNSTREAM_DTYPE', 'UPSTREAM_DTYPE', 'downstream_array', 'upstream_array')
+
+logger = logging.getLogger(__name__)
+
+DOWNSTREAM_DTYPE: Final = np.dtype([('sample', np.uint32), ('channel', np.uint16),
+                                    ('locked', np.bool_), ('modulation', 'U16'),
+                                    ('channel_id', np.uint16), ('frequency', np.float32),
+                                    ('power', np.float32), ('snr', np.float32),
+                                    ('corrected', np.uint64), ('uncorrected', np.uint64)])
+"""
+Data type of :py:func:`downstream_array`.
+
+The fields are the same as :py:class:`mb8611.channels.DownstreamChannel` except ``lock_status`` is
+replaced by the boolean ``locked``. ``sample`` is the index of the table the row came from.
+"""
+UPSTREAM_DTYPE: Final = np.dtype([('sample', np.uint32), ('channel', np.uint16),
+                                  ('locked', np.bool_), ('channel_type', 'U16'),
+                                  ('channel_id', np.uint16), ('symbol_rate', np.uint32),
+                                  ('frequency', np.float32), ('power', np.float32)])
+"""
+Data type of :py:func:`upstream_array`.
+
+The fields are the same as :py:class:`mb8611.channels.UpstreamChannel` except ``lock_status`` is
+replaced by the boolean ``locked``. ``sample`` is the index of the table the row came from.
+"""
+
+
+def _to_array(table_strs: Iterable[str], dtype: np.dtype[Any],
+              n_columns: int) -> npt.NDArray[np.void]:
+    samples: list[int] = []
+    rows: list[Sequence[str]] = []
+    for i, table_str in enumerate(table_strs):
+        for row in parse_table_str(table_str):
+            if len(row) >= n_columns:
+                samples.append(i)
+                rows.append(row[:n_columns])
+            elif any(row):
+                logger.warning('Skipping short channel row: %s', '^'.join(row))
+    out = np.empty(len(rows), dtype=dtype)
+    if not rows:
+        return out
+    assert dtype.names is not None
+    out['sample'] = samples
+    # Convert whole columns at a time instead of each cell. Numbers are converted with float() and
+    # int() because they are faster than casting a string array.
+    for name, column in zip(dtype.names[1:], zip(*rows, strict=True), strict=True):
+        if name == 'locked':
+            out[name] = np.char.strip(np.array(column)) == 'Locked'
+        elif dtype[name].kind == 'U':
+            out[name] = np.char.strip(np.array(column))
+        else:
+            out[name] = np.fromiter(map(float if dtype[name].kind == 'f' else int, column),
+                                    dtype[name], len(rows))
+    return out
+
+
+def downstream_array(table_strs: Iterable[str]) -> npt.NDArray[np.void]:
+    """
+    Parse many ``MotoConnDownstreamChannel`` values into one structured array.
+
+    Parameters
+    ----------
+    table_strs : Iterable[str]
+        Table strings, for example one per sample.
+
+    Returns
+    -------
+    numpy.ndarray
+        Array with data type :py:data:`DOWNSTREAM_DTYPE`. Rows with too few columns are logged
+        and skipped.
+
+    Raises
+    ------
+    ValueError
+        If a value is not a number.
+    """
+    return _to_array(table_strs, DOWNSTREAM_DTYPE, 9)
+
+
+def upstream_array(table_strs: Iterable[str]) -> npt.NDArray[np.void]:
+    """
+    Parse many ``MotoConnUpstreamChannel`` values into one structured array.
+
+    Parameters
+    ----------
+    table_strs : Iterable[str]
+        Table strings, for example one per sample.
+
+    Returns
+    -------
+    numpy.ndarray
+        Array with data type :py:data:`UPSTREAM_DTYPE`. Rows with too few columns are logged
+        and skipped.
+
+    Raises
+    ------
+    ValueError
+        If a value is not a number.
+    """
+    return _to_array(table_strs, UPSTREAM_DTYPE, 7)
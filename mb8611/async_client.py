@@ -0,0 +1,209 @@
+"""Asynchronous client class. Requires the ``asyncio`` extra (httpx)."""
+from collections.abc import Collection
+from types import TracebackType
+from typing import Any, Literal, cast, overload
+from urllib.parse import urlsplit
+import contextlib
+import logging
+
+import httpx
+
+from .api import (
+    Action,
+    GetMultipleHNAPsPayload,
+    GetMultipleHNAPsResponse,
+    LoginPayload,
+    LoginResponse,
+    MultipleHNAPAction,
+    Payload,
+    Response,
+)
+from .api.settings import (
+    GetNetworkModeSettingsPayload,
+    GetNetworkModeSettingsResponse,
+    RebootPayload,
+    SetMotoLagStatusPayload,
+    SetMotoLagStatusResponse,
+    SetStatusLogSettingsPayload,
+    SetStatusLogSettingsResponse,
+    SetStatusSecuritySettingsPayload,
+)
+from .client import CallHNAPError, LockedError, LoginFailed
+from .constants import BROWSER_COOKIE_PATHS, MUST_BE_CALLED_FROM_MULTIPLE, SHARED_HEADERS
+from .utils import make_hnap_auth, make_login_payload, make_private_key, make_soap_action_uri
+
+__all__ = ('AsyncClient',)
+
+logger = logging.getLogger(__name__)
+
+
+class AsyncClient:
+    """
+    Asynchronous client implementation.
+
+    The API mirrors :py:class:`mb8611.client.Client` but every network call is a coroutine. Each
+    instance owns its own :py:class:`httpx.AsyncClient`, which is closed on leaving the ``async
+    with`` block.
+    """
+    def __init__(self,
+                 password: str,
+                 host: str = '192.168.100.1',
+                 username: str = 'admin',
+                 *,
+                 transport: httpx.AsyncBaseTransport | None = None) -> None:
+        self.hnap1_endpoint = f'https://{host}/HNAP1/'
+        self.host = host
+        # Cookies do not match if the domain includes a port.
+        self._cookie_domain = urlsplit(self.hnap1_endpoint).hostname or host
+        self.password = password
+        self.username = username
+        self.session = httpx.AsyncClient(
+            headers=dict(SHARED_HEADERS),
+            verify=False,  # noqa: S501
+            transport=transport)
+        self.private_key = 'withoutloginkey'
+
+    async def login(self) -> None:
+        """Login. See :py:meth:`mb8611.client.Client.login`."""
+        response = await self.call_hnap('Login', make_login_payload(self.username), check=False)
+        if response['LoginResponse']['LoginResult'] == 'FAILED':
+            raise LockedError
+        assert 'PublicKey' in response['LoginResponse']
+        assert 'Challenge' in response['LoginResponse']
+        public_key = response['LoginResponse']['PublicKey']
+        challenge = response['LoginResponse']['Challenge']
+        if 'Cookie' in response['LoginResponse']:
+            self.session.cookies.set('uid',
+                                     response['LoginResponse']['Cookie'],
+                                     domain=self._cookie_domain,
+                                     path='/')
+        self.private_key = make_private_key(public_key, self.password, challenge)
+        self.session.cookies.set('PrivateKey',
+                                 self.private_key,
+                                 domain=self._cookie_domain,
+                                 path='/')
+        for path in BROWSER_COOKIE_PATHS:
+            self.session.cookies.set('', 'Secure', domain=self._cookie_domain, path=path)
+        response = await self.call_hnap('Login',
+                                        make_login_payload(self.username, self.private_key,
+                                                           challenge),
+                                        check=False)
+        if response['LoginResponse']['LoginResult'] != 'OK':
+            raise LoginFailed
+
+    @overload
+    async def call_hnap(self,
+                        action: Literal['GetMultipleHNAPs'],
+                        payload: GetMultipleHNAPsPayload,
+                        *,
+                        check: bool = ...) -> GetMultipleHNAPsResponse:  # pragma: no cover
+        ...
+
+    @overload
+    async def call_hnap(self,
+                        action: Literal['GetNetworkModeSettings'],
+                        payload: GetNetworkModeSettingsPayload,
+                        *,
+                        check: bool = ...) -> GetNetworkModeSettingsResponse:  # pragma: no cover
+        ...
+
+    @overload
+    async def call_hnap(self,
+                        action: Literal['Login'],
+                        payload: LoginPayload,
+                        *,
+                        check: bool = ...) -> LoginResponse:  # pragma: no cover
+        ...
+
+    @overload
+    async def call_hnap(self,
+                        action: Literal['SetMotoLagStatus'],
+                        payload: SetMotoLagStatusPayload,
+                        *,
+                        check: bool = ...) -> SetMotoLagStatusResponse:  # pragma: no cover
+        ...
+
+    @overload
+    async def call_hnap(self,
+                        action: Literal['SetStatusLogSettings'],
+                        payload: SetStatusLogSettingsPayload,
+                        *,
+                        check: bool = ...) -> SetStatusLogSettingsResponse:  # pragma: no cover
+        ...
+
+    @overload
+    async def call_hnap(self,
+                        action: Literal['SetStatusSecuritySettings'],
+                        payload: SetStatusSecuritySettingsPayload | RebootPayload,
+                        *,
+                        check: bool = ...) -> SetStatusLogSettingsResponse:  # pragma: no cover
+        ...
+
+    @overload
+    async def call_hnap(self,
+                        action: Action,
+                        payload: None = ...,
+                        *,
+                        check: bool = ...) -> Response:  # pragma: no cover
+        ...
+
+    @overload
+    async def call_hnap(self,
+                        action: str,
+                        payload: Any = ...,
+                        *,
+                        check: bool = ...) -> Response:  # pragma: no cover
+        ...
+
+    async def call_hnap(self,
+                        action: Action | str,
+                        payload: Payload | None = None,
+                        *,
+                        check: bool = True) -> Response:
+        """Invoke an action."""
+        # See Client.call_hnap.
+        with contextlib.suppress(KeyError):
+            self.session.cookies.jar.clear(self._cookie_domain, '/HNAP1', 'Secure')
+        if action in MUST_BE_CALLED_FROM_MULTIPLE:
+            return await self.call_multiple_hnaps((action,), check=False)
+        logger.debug('Calling %s', action)
+        headers = {
+            'HNAP_AUTH': make_hnap_auth(action, self.private_key),
+            'SOAPACTION': make_soap_action_uri(action)
+        }
+        logger.debug('Headers: %s', headers)
+        logger.debug('Payload: %s', payload)
+        r = await self.session.post(self.hnap1_endpoint, headers=headers, json=payload)
+        r.raise_for_status()
+        res = r.json()
+        logger.debug('Response: %s', res)
+        if check and res[f'{action}Response'][f'{action}Result'] != 'OK':
+            raise CallHNAPError(res)
+        return cast('Response', res)
+
+    async def call_multiple_hnaps(self,
+                                  actions: Collection[MultipleHNAPAction],
+                                  *,
+                                  check: bool = True) -> GetMultipleHNAPsResponse:
+        """Call multiple HNAPs. See :py:meth:`mb8611.client.Client.call_multiple_hnaps`."""
+        return await self.call_hnap('GetMultipleHNAPs',
+                                    cast('GetMultipleHNAPsPayload',
+                                         {'GetMultipleHNAPs': dict.fromkeys(actions, '')}),
+                                    check=check)
+
+    async def aclose(self) -> None:
+        """Close the underlying HTTP client."""
+        await self.session.aclose()
+
+    async def __aenter__(self) -> 'AsyncClient':
+        """Log in and return a client."""
+        await self.login()
+        return self
+
+    async def __aexit__(self, exc_cls: type[BaseException] | None, base_exc: BaseException | None,
+                        traceback: TracebackType | None) -> None:
+        """Perform logout action and close the HTTP client."""
+        try:
+            await self.session.get(f'https://{self.host}/Logout.html')
+        finally:
+            await self.aclose()
@@ -0,0 +1,122 @@
+"""Circuit breaker for logging in and backoff for transient HTTP errors."""
+from __future__ import annotations
+
+from typing import TYPE_CHECKING, Any
+import contextlib
+import logging
+import random
+import threading
+import time
+
+from .client import LockedError, LoginFailed
+
+if TYPE_CHECKING:
+    from collections.abc import Iterator
+
+__all__ = ('CircuitBreaker', 'CircuitOpenError')
+
+logger = logging.getLogger(__name__)
+
+
+class CircuitOpenError(LockedError):
+    """Raised instead of logging in while the circuit of a host is open."""
+    def __init__(self, host: str, retry_after: float) -> None:
+        Exception.__init__(
+            self, f'Not logging in to {host} for another {retry_after:.0f} seconds after a '
+            'failed or locked login.')
+        self.host = host
+        """Host of the open circuit."""
+        self.retry_after = retry_after
+        """Seconds until a login will be attempted again."""
+
+    def __reduce__(self) -> tuple[Any, ...]:
+        return type(self), (self.host, self.retry_after)
+
+
+class CircuitBreaker:
+    """
+    Stop logging in to a host after a failed or locked login.
+
+    After :py:class:`~mb8611.client.LockedError` or :py:class:`~mb8611.client.LoginFailed`, the
+    circuit of the host opens for ``cooldown`` seconds and logging in raises
+    :py:class:`CircuitOpenError` without sending a request. After the cool-down, one login is
+    attempted and other callers keep failing fast until it finishes. Success closes the circuit and
+    failure opens it again.
+
+    Also sets the backoff used by :py:class:`~mb8611.client.Client` to retry read requests (``Get*``
+    actions) that fail with one of :py:data:`~mb8611.constants.TRANSIENT_STATUS_CODES`.
+
+    One instance is meant to be shared by every client in the process. It is thread-safe.
+
+    Parameters
+    ----------
+    cooldown : float
+        Seconds to stop logging in to a host after a failed or locked login. The modem locks the
+        interface for five minutes.
+    max_retries : int
+        Number of times to retry a request that failed with a transient HTTP error.
+    backoff_base : float
+        Maximum delay in seconds before the first retry. Doubles with every retry.
+    backoff_max : float
+        Maximum delay in seconds before a retry.
+    """
+    def __init__(self,
+                 *,
+                 cooldown: float = 300,
+                 max_retries: int = 3,
+                 backoff_base: float = 0.5,
+                 backoff_max: float = 30) -> None:
+        self.cooldown = cooldown
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self._lock = threading.Lock()
+        self._open_until: dict[str, float] = {}
+        self._trials: set[str] = set()
+
+    def retry_after(self, host: str) -> float:
+        """Return seconds until logging in to ``host`` is allowed again or ``0``."""
+        with self._lock:
+            return max(self._open_until.get(host, 0) - time.monotonic(), 0)
+
+    def backoff(self, attempt: int) -> float:
+        """Return a random delay in seconds before retry number ``attempt`` (from ``0``)."""
+        cap = min(self.backoff_max, self.backoff_base * 2 ** attempt)
+        return random.uniform(0, cap)  # noqa: S311
+
+    def reset(self, host: str) -> None:
+        """Close the circuit of ``host``."""
+        with self._lock:
+            self._open_until.pop(host, None)
+            self._trials.discard(host)
+
+    @contextlib.contextmanager
+    def attempt(self, host: str) -> Iterator[None]:
+        """
+        Guard a login to ``host``.
+
+        Raises
+        ------
+        CircuitOpenError
+            If the circuit is open or another login to ``host`` is being tried after the cool-down.
+        """
+        with self._lock:
+            if (open_until := self._open_until.get(host)) is not None:
+                now = time.monotonic()
+                if now < open_until or host in self._trials:
+                    raise CircuitOpenError(host, max(open_until - now, 0))
+                self._trials.add(host)
+        try:
+            yield
+        except (LockedError, LoginFailed) as e:
+            logger.debug('Opening circuit of %s for %s seconds after %s.', host, self.cooldown,
+                         type(e).__name__)
+            with self._lock:
+                self._open_until[host] = time.monotonic() + self.cooldown
+                self._trials.discard(host)
+            raise
+        except BaseException:
+            with self._lock:
+                self._trials.discard(host)
+            raise
+        self.reset(host)
@@ -0,0 +1,88 @@
+"""Typed parsers for the bonded channel tables."""
+from collections.abc import Iterator, Sequence
+from typing import NamedTuple
+import logging
+
+from .utils import parse_table_str
+
+__all__ = ('DownstreamChannel', 'UpstreamChannel', 'parse_downstream_channels',
+           'parse_upstream_channels')
+
+logger = logging.getLogger(__name__)
+
+
+class DownstreamChannel(NamedTuple):
+    """Row of ``MotoConnDownstreamChannel``."""
+    channel: int
+    lock_status: str
+    """Usually ``'Locked'``."""
+    modulation: str
+    """For example ``'QAM256'`` or ``'OFDM PLC'``."""
+    channel_id: int
+    frequency: float
+    """Frequency in MHz."""
+    power: float
+    """Power in dBmV."""
+    snr: float
+    """Signal to noise ratio in dB."""
+    corrected: int
+    """Corrected codewords. This counter resets when the modem restarts."""
+    uncorrected: int
+    """Uncorrectable codewords. This counter resets when the modem restarts."""
+    @classmethod
+    def from_row(cls, row: Sequence[str]) -> 'DownstreamChannel':
+        """Create from the columns of a parsed table row."""
+        return cls(int(row[0]), row[1].strip(), row[2].strip(), int(row[3]), float(row[4]),
+                   float(row[5]), float(row[6]), int(row[7]), int(row[8]))
+
+
+class UpstreamChannel(NamedTuple):
+    """Row of ``MotoConnUpstreamChannel``."""
+    channel: int
+    lock_status: str
+    """Usually ``'Locked'``."""
+    channel_type: str
+    """For example ``'SC-QAM'`` or ``'OFDMA'``."""
+    channel_id: int
+    symbol_rate: int
+    """Symbol rate in Ksym/sec."""
+    frequency: float
+    """Frequency in MHz."""
+    power: float
+    """Power in dBmV."""
+    @classmethod
+    def from_row(cls, row: Sequence[str]) -> 'UpstreamChannel':
+        """Create from the columns of a parsed table row."""
+        return cls(int(row[0]), row[1].strip(), row[2].strip(), int(row[3]), int(row[4]),
+                   float(row[5]), float(row[6]))
+
+
+def _rows(table_str: str, n_columns: int) -> Iterator[Sequence[str]]:
+    # An empty table is an empty string. Rows end with a trailing '^'.
+    for row in parse_table_str(table_str):
+        if len(row) >= n_columns:
+            yield row
+        elif any(row):
+            logger.warning('Skipping short channel row: %s', '^'.join(row))
+
+
+def parse_downstream_channels(table_str: str) -> Iterator[DownstreamChannel]:
+    """
+    Parse the value of ``MotoConnDownstreamChannel``.
+
+    Rows with too few columns are logged and skipped. A value that is not a number raises
+    ``ValueError``.
+    """
+    for row in _rows(table_str, len(DownstreamChannel._fields)):
+        yield DownstreamChannel.from_row(row)
+
+
+def parse_upstream_channels(table_str: str) -> Iterator[UpstreamChannel]:
+    """
+    Parse the value of ``MotoConnUpstreamChannel``.
+
+    Rows with too few columns are logged and skipped. A value that is not a number raises
+    ``ValueError``.
+    """
+    for row in _rows(table_str, len(UpstreamChannel._fields)):
+        yield UpstreamChannel.from_row(row)
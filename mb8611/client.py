@@ -1,42 +1,71 @@
 """Client class."""
-from collections.abc import Collection
-from types import TracebackType
-from typing import Any, Literal, cast, overload
+from __future__ import annotations
+
+from typing import TYPE_CHECKING, Any, Literal, cast, overload
+from urllib.parse import urlsplit
 import contextlib
-import hmac
 import logging
+import time
 
-from requests import Session
-
-from .api import (
-    Action,
-    GetMultipleHNAPsPayload,
-    GetMultipleHNAPsResponse,
-    LoginPayload,
-    LoginResponse,
-    MultipleHNAPAction,
-    Payload,
-    Response,
-)
-from .api.settings import (
-    GetNetworkModeSettingsPayload,
-    GetNetworkModeSettingsResponse,
-    RebootPayload,
-    SetMotoLagStatusPayload,
-    SetMotoLagStatusResponse,
-    SetStatusLogSettingsPayload,
-    SetStatusLogSettingsResponse,
-    SetStatusSecuritySettingsPayload,
+from .codec import get_codec
+from .constants import (
+    BROWSER_COOKIE_PATHS,
+    MUST_BE_CALLED_FROM_MULTIPLE,
+    SHARED_HEADERS,
+    TRANSIENT_STATUS_CODES,
 )
-from .constants import MUST_BE_CALLED_FROM_MULTIPLE, SHARED_HEADERS
-from .utils import make_hnap_auth, make_soap_action_uri
+from .instrumentation import CallMetrics
+from .response_cache import INVALIDATED_BY
+from .utils import HNAPSigner, make_login_payload, make_private_key
+
+if TYPE_CHECKING:
+    from collections.abc import Callable, Collection, Hashable
+    from types import TracebackType
+
+    from requests import PreparedRequest
+    from requests.adapters import HTTPAdapter
+
+    from .api import (
+        Action,
+        GetMultipleHNAPsPayload,
+        GetMultipleHNAPsResponse,
+        LoginPayload,
+        LoginResponse,
+        MultipleHNAPAction,
+        Payload,
+        Response,
+    )
+    from .api.settings import (
+        GetNetworkModeSettingsPayload,
+        GetNetworkModeSettingsResponse,
+        RebootPayload,
+        SetMotoLagStatusPayload,
+        SetMotoLagStatusResponse,
+        SetStatusLogSettingsPayload,
+        SetStatusLogSettingsResponse,
+        SetStatusSecuritySettingsPayload,
+    )
+    from .breaker import CircuitBreaker
+    from .codec import Codec
+    from .instrumentation import MetricsCallback
+    from .response_cache import ResponseCache
+    from .session_cache import CachedSession, SessionCache
+    from .structs import MultipleHNAPs, MultipleHNAPsResponse
 
 logger = logging.getLogger(__name__)
 
+_ExceptionTypes = tuple[type[Exception], ...]
+MAX_PREPARED_REQUESTS = 16
+"""Number of prepared requests kept per client for reuse."""
+
 
 class CallHNAPError(Exception):
     def __init__(self, response: Response) -> None:
         super().__init__(f'HNAP error: {response}')
+        self.response = response
+
+    def __reduce__(self) -> tuple[Any, ...]:
+        return type(self), (self.response,)
 
 
 class LockedError(Exception):
@@ -44,72 +73,196 @@ class LockedError(Exception):
         super().__init__('The modem interface is most likely locked due to failed login attempts. '
                          'Wait at least five minutes before attempting again.')
 
+    def __reduce__(self) -> tuple[Any, ...]:
+        return type(self), ()
+
 
 class LoginFailed(RuntimeError):
     pass
 
 
+def _decode(decode: Callable[[bytes], Any], content: bytes, keep: _ExceptionTypes) -> Any:
+    try:
+        return decode(content)
+    except keep:
+        raise
+    except ValueError as e:
+        # Callers expect a RequestException like the one raised by Response.json().
+        from requests import JSONDecodeError  # noqa: PLC0415
+
+        raise JSONDecodeError(str(e), content.decode(errors='replace'), 0) from e
+
+
+def _result(action: str, response: Any) -> str | None:
+    if (top := getattr(response, 'response', None)) is not None:
+        # Decoded into a struct.
+        return cast('str', top.result)
+    if not isinstance(response, dict) or not isinstance(
+            section := response.get(f'{action}Response'), dict):
+        return None
+    return section.get(f'{action}Result')
+
+
 class Client:
-    """Client implementation."""
-    def __init__(self, password: str, host: str = '192.168.100.1', username: str = 'admin') -> None:
+    """
+    Client implementation.
+
+    Parameters
+    ----------
+    password : str
+        Administrator password.
+    host : str
+        Host of the modem.
+    username : str
+        Administrator username.
+    session_cache : SessionCache | None
+        If passed, the context manager resumes a stored session instead of logging in, and stores
+        the session after logging in. A stored session is used until the modem answers
+        ``'UN-AUTH'``, at which point the client logs in again and retries once.
+    logout : bool
+        Log out when leaving the context manager. Pass ``False`` to keep the session valid for
+        later use with ``session_cache``.
+    response_cache : ResponseCache | None
+        If passed, sections of actions with a time to live are reused by
+        :py:meth:`call_multiple_hnaps` and left out of the request. Setting actions invalidate the
+        sections they change. Entries are stored per host so the cache can be shared.
+    metrics_callback : MetricsCallback | None
+        Called with a :py:class:`~mb8611.instrumentation.CallMetrics` after each request, including
+        requests that fail with an HTTP error or invalid JSON.
+    codec : Codec | None
+        JSON codec for request and response bodies. Defaults to the fastest installed codec (see
+        :py:func:`mb8611.codec.get_codec`).
+    breaker : CircuitBreaker | None
+        If passed, logging in is guarded by the breaker (see
+        :py:class:`~mb8611.breaker.CircuitBreaker`) and requests that fail with a transient HTTP
+        error are retried with its backoff if they only read (``Get*`` actions). Share one breaker
+        between clients.
+    adapter : HTTPAdapter | None
+        Transport adapter mounted for ``https://<host>/``. Use
+        :py:func:`mb8611.tls.pinned_adapter` to pin the modem's certificate and resume TLS
+        sessions.
+    """
+    def __init__(self,
+                 password: str,
+                 host: str = '192.168.100.1',
+                 username: str = 'admin',
+                 *,
+                 session_cache: SessionCache | None = None,
+                 logout: bool = True,
+                 response_cache: ResponseCache | None = None,
+                 metrics_callback: MetricsCallback | None = None,
+                 codec: Codec | None = None,
+                 breaker: CircuitBreaker | None = None,
+                 adapter: HTTPAdapter | None = None) -> None:
+        # requests is slow to import and is not needed to parse the command line.
+        from requests import Session  # noqa: PLC0415
+
         self.hnap1_endpoint = f'https://{host}/HNAP1/'
         self.host = host
+        # Cookies do not match if the domain includes a port.
+        self._cookie_domain = urlsplit(self.hnap1_endpoint).hostname or host
         self.password = password
         self.username = username
         self.session = Session()
         self.session.headers.update(SHARED_HEADERS)
+        if adapter is not None:
+            self.session.mount(f'https://{host}/', adapter)
+        self._templates: dict[Hashable, PreparedRequest] = {}
         self.private_key = 'withoutloginkey'
+        self.session_cache = session_cache
+        self.logout = logout
+        self.response_cache = response_cache
+        self.metrics_callback = metrics_callback
+        self.codec = get_codec() if codec is None else codec
+        self.breaker = breaker
+        self._session_restored = False
+
+    @property
+    def private_key(self) -> str:
+        """Private key used to sign requests."""
+        return self._signer.private_key
+
+    @private_key.setter
+    def private_key(self, value: str) -> None:
+        self._signer = HNAPSigner(value)
+        self._templates.clear()
+
+    def _set_session_cookies(self, uid: str | None) -> None:
+        # Prepared requests include the cookies.
+        self._templates.clear()
+        if uid is not None:
+            self.session.cookies.set('uid', uid, path='/', domain=self._cookie_domain)
+        self.session.cookies.set('PrivateKey',
+                                 self.private_key,
+                                 path='/',
+                                 domain=self._cookie_domain)
+        for path in BROWSER_COOKIE_PATHS:
+            self.session.cookies.set('',
+                                     'Secure',
+                                     path=path,
+                                     domain=self._cookie_domain,
+                                     rest={'HttpOnly': True})
+
+    def restore_session(self) -> bool:
+        """
+        Resume a session from ``session_cache``.
+
+        Returns
+        -------
+        bool
+            ``True`` if a stored session was found. The session may still be expired.
+        """
+        if self.session_cache is None:
+            return False
+        cached = self.session_cache.get(self.host, self.username)
+        if cached is None:
+            return False
+        logger.debug('Resuming stored session for %s@%s.', self.username, self.host)
+        self.private_key = cached['private_key']
+        self._set_session_cookies(cached.get('uid'))
+        self._session_restored = True
+        return True
 
     def login(self) -> None:
-        """Login. This is 99% the same as what happens in a browser but is not fully correct."""
-        response = self.call_hnap('Login', {
-            'Login': {
-                'Action': 'request',
-                'Username': self.username,
-                'LoginPassword': '',
-                'Captcha': '',
-                'PrivateLogin': 'LoginPassword'
-            }
-        },
-                                  check=False)
+        """
+        Login. This is 99% the same as what happens in a browser but is not fully correct.
+
+        Raises
+        ------
+        LockedError
+            If the modem is locked or, with ``breaker``, the circuit of the host is open.
+        LoginFailed
+            If the password is wrong.
+        """
+        if self.breaker is None:
+            self._login()
+            return
+        with self.breaker.attempt(self.host):
+            self._login()
+
+    def _login(self) -> None:
+        response = self.call_hnap('Login', make_login_payload(self.username), check=False)
         if response['LoginResponse']['LoginResult'] == 'FAILED':
             raise LockedError
         assert 'PublicKey' in response['LoginResponse']
         assert 'Challenge' in response['LoginResponse']
         public_key = response['LoginResponse']['PublicKey']
         challenge = response['LoginResponse']['Challenge']
-        if 'Cookie' in response['LoginResponse']:
-            self.session.cookies.set('uid',
-                                     response['LoginResponse']['Cookie'],
-                                     path='/',
-                                     domain=self.host)
-        self.private_key = hmac.new((public_key + self.password).encode(), challenge.encode(),
-                                    'md5').hexdigest().upper()
-        self.session.cookies.set('PrivateKey', self.private_key, path='/', domain=self.host)
-        for path in ('/font', '/js/SOAP', '/js', '/css', '/', '/image', '/HNAP1'):
-            self.session.cookies.set('',
-                                     'Secure',
-                                     path=path,
-                                     domain=self.host,
-                                     rest={'HttpOnly': True})
-        response = self.call_hnap('Login', {
-            'Login': {
-                'Action':
-                    'request',
-                'Username':
-                    self.username,
-                'LoginPassword':
-                    hmac.new(self.private_key.encode(), challenge.encode(),
-                             'md5').hexdigest().upper(),
-                'Captcha':
-                    '',
-                'PrivateLogin':
-                    'LoginPassword'
-            }
-        },
+        uid = response['LoginResponse'].get('Cookie')
+        self.private_key = make_private_key(public_key, self.password, challenge)
+        self._set_session_cookies(uid)
+        response = self.call_hnap('Login',
+                                  make_login_payload(self.username, self.private_key, challenge),
                                   check=False)
         if response['LoginResponse']['LoginResult'] != 'OK':
+            if self.session_cache is not None:
+                self.session_cache.delete(self.host, self.username)
             raise LoginFailed
+        if self.session_cache is not None:
+            cached: CachedSession = {'private_key': self.private_key}
+            if uid is not None:
+                cached['uid'] = uid
+            self.session_cache.set(self.host, self.username, cached)
 
     @overload
     def call_hnap(self,
@@ -181,28 +334,135 @@ class Client:
                   *,
                   check: bool = True) -> Response:
         """Invoke an action."""
-        # Clear invalid cookie. Chrome interprets this set-cookie header as having a key '' and
-        # value 'Secure'. requests.cookies interprets this in the opposite manner.
-        with contextlib.suppress(KeyError):
-            self.session.cookies.clear(self.host, '/HNAP1', 'Secure')
         if action in MUST_BE_CALLED_FROM_MULTIPLE:
-            return self.call_multiple_hnaps((cast('MultipleHNAPAction', action),), check=False)
-        logger.debug('Calling %s', action)
-        headers = {
-            'HNAP_AUTH': make_hnap_auth(action, self.private_key),
-            'SOAPACTION': make_soap_action_uri(action)
-        }
-        logger.debug('Headers: %s', headers)
-        logger.debug('Cookies: %s', self.session.cookies.get_dict())
-        logger.debug('Payload: %s', payload)
-        r = self.session.post(self.hnap1_endpoint, headers=headers, json=payload, verify=False)
-        r.raise_for_status()
-        res = r.json()
-        logger.debug('Response: %s', res)
+            return self.call_multiple_hnaps((action,), check=False)
+        res = self._post(action, payload)
+        if (self._session_restored and action != 'Login'
+                and res.get(f'{action}Response', {}).get(f'{action}Result') == 'UN-AUTH'):
+            self._login_again()
+            res = self._post(action, payload)
+        if self.response_cache is not None and action in INVALIDATED_BY:
+            self.response_cache.invalidate(self.host, INVALIDATED_BY[action])
         if check and res[f'{action}Response'][f'{action}Result'] != 'OK':
             raise CallHNAPError(res)
         return cast('Response', res)
 
+    def _login_again(self) -> None:
+        logger.debug('Stored session for %s@%s has expired.', self.username, self.host)
+        self._session_restored = False
+        self.private_key = 'withoutloginkey'
+        self.login()
+
+    def _prepare(self, action: Action | str, payload: Payload | None) -> PreparedRequest:
+        # Requests without a payload or with the same GetMultipleHNAPs actions only differ in
+        # HNAP_AUTH, so they are prepared once and copied.
+        key: Hashable | None = None
+        if payload is None:
+            key = (self.hnap1_endpoint, action)
+        elif action == 'GetMultipleHNAPs' and not any(
+                cast('GetMultipleHNAPsPayload', payload)['GetMultipleHNAPs'].values()):
+            key = (self.hnap1_endpoint, action,
+                   tuple(cast('GetMultipleHNAPsPayload', payload)['GetMultipleHNAPs']))
+        if key is None or (template := self._templates.get(key)) is None:
+            from requests import Request  # noqa: PLC0415
+
+            template = self.session.prepare_request(
+                Request('POST',
+                        self.hnap1_endpoint,
+                        headers={'SOAPACTION': self._signer.soap_action(action)},
+                        data=None if payload is None else self.codec.encode(payload)))
+            if key is not None:
+                if len(self._templates) >= MAX_PREPARED_REQUESTS:
+                    self._templates.clear()
+                self._templates[key] = template
+        return template.copy()
+
+    def _post(self,
+              action: Action | str,
+              payload: Payload | None,
+              decode: Callable[[bytes], Any] | None = None,
+              keep: _ExceptionTypes = ()) -> Any:
+        """
+        Send a request, retrying transient HTTP errors if a circuit breaker is set.
+
+        Only reads (actions starting with ``Get``, including ``GetMultipleHNAPs``) are retried.
+        Logging in and changing settings are not idempotent and are never sent twice.
+
+        Responses that cannot be decoded raise :py:class:`requests.JSONDecodeError` unless the
+        exception is an instance of a class in ``keep``.
+        """
+        breaker = self.breaker if action.startswith('Get') else None
+        attempt = 0
+        while True:
+            try:
+                return self._post_once(action, payload, decode, keep)
+            except Exception as e:
+                from requests import HTTPError  # noqa: PLC0415
+
+                if (breaker is None or attempt >= breaker.max_retries
+                        or not isinstance(e, HTTPError) or e.response is None
+                        or e.response.status_code not in TRANSIENT_STATUS_CODES):
+                    raise
+                delay = breaker.backoff(attempt)
+                logger.debug('Retrying %s in %.2f seconds after HTTP %d.', action, delay,
+                             e.response.status_code)
+                time.sleep(delay)
+                attempt += 1
+
+    def _post_once(self,
+                   action: Action | str,
+                   payload: Payload | None,
+                   decode: Callable[[bytes], Any] | None = None,
+                   keep: _ExceptionTypes = ()) -> Any:
+        logger.debug('Calling %s', action)
+        start = time.perf_counter()
+        hnap_auth = self._signer.sign(action)
+        signed = time.perf_counter()
+        request = self._prepare(action, payload)
+        request.headers['HNAP_AUTH'] = hnap_auth
+        prepared = time.perf_counter()
+        logger.debug('Headers: %s', request.headers)
+        logger.debug('Payload: %s', payload)
+        sending = time.perf_counter()
+        r = self.session.send(request, verify=False, stream=True)
+        received = time.perf_counter()
+        if r.cookies:
+            # Clear invalid cookie. Chrome interprets this set-cookie header as having a key '' and
+            # value 'Secure'. requests.cookies interprets this in the opposite manner.
+            with contextlib.suppress(KeyError):
+                self.session.cookies.clear(self._cookie_domain, '/HNAP1', 'Secure')
+            if any(cookie.name != 'Secure' for cookie in r.cookies):
+                self._templates.clear()
+        content = r.content
+        read = time.perf_counter()
+        res = None
+        decoded = read
+        try:
+            r.raise_for_status()
+            res = _decode(self.codec.decode if decode is None else decode, content, keep)
+            decoded = time.perf_counter()
+        finally:
+            if self.metrics_callback is not None:
+                ttfb = r.elapsed.total_seconds()
+                # An error in the callback must not replace the request's error or fail the call.
+                try:
+                    self.metrics_callback(
+                        CallMetrics(action=action,
+                                    sign=signed - start,
+                                    prepare=prepared - signed + max(received - sending - ttfb, 0),
+                                    time_to_first_byte=ttfb,
+                                    read=read - received,
+                                    decode=decoded - read,
+                                    total=time.perf_counter() - start,
+                                    request_size=len(r.request.body or b''),
+                                    response_size=len(content or b''),
+                                    status_code=r.status_code,
+                                    result=_result(action, res)))
+                except Exception:
+                    logger.exception('Metrics callback failed.')
+        logger.debug('Response: %s', res)
+        return res
+
     def call_multiple_hnaps(self,
                             actions: Collection[MultipleHNAPAction],
                             *,
@@ -212,18 +472,80 @@ class Client:
 
         Equivalent to calling ``call_hnap`` with action ``'GetMultipleHNAPs'`` and the correct
         payload. Some actions must be called this way even if they are the only action.
+
+        With ``response_cache``, cached sections are merged into the response and only the other
+        actions are requested. If every action is cached, no request is made.
+        """
+        if self.response_cache is None:
+            return self.call_hnap('GetMultipleHNAPs',
+                                  cast('GetMultipleHNAPsPayload',
+                                       {'GetMultipleHNAPs': dict.fromkeys(actions, '')}),
+                                  check=check)
+        cached = {
+            f'{action}Response': section
+            for action in actions
+            if (section := self.response_cache.get(self.host, action)) is not None
+        }
+        if not (fetch := [action for action in actions if f'{action}Response' not in cached]):
+            logger.debug('Using cached responses for %s.', ', '.join(actions))
+            return cast('GetMultipleHNAPsResponse',
+                        {'GetMultipleHNAPsResponse': {
+                            **cached, 'GetMultipleHNAPsResult': 'OK'
+                        }})
+        response = self.call_hnap('GetMultipleHNAPs',
+                                  cast('GetMultipleHNAPsPayload',
+                                       {'GetMultipleHNAPs': dict.fromkeys(fetch, '')}),
+                                  check=check)
+        top = cast('dict[str, Any]', response['GetMultipleHNAPsResponse'])
+        for action in fetch:
+            section = top.get(f'{action}Response')
+            if section is not None and section.get(f'{action}Result') == 'OK':
+                self.response_cache.set(self.host, action, section)
+        top.update(cached)
+        return response
+
+    def call_multiple_hnaps_typed(self, actions: Collection[MultipleHNAPAction]) -> MultipleHNAPs:
         """
-        return self.call_hnap('GetMultipleHNAPs',
-                              cast('GetMultipleHNAPsPayload',
-                                   {'GetMultipleHNAPs': dict.fromkeys(actions, '')}),
-                              check=check)
+        Call multiple HNAPs and decode the response into :py:class:`~mb8611.structs.MultipleHNAPs`.
 
-    def __enter__(self) -> 'Client':
-        """Log in and return a client."""
-        self.login()
+        The response is decoded and validated in one step without creating dictionaries. Requires
+        the ``json-msgspec`` extra. ``response_cache`` is not used.
+
+        Raises
+        ------
+        CallHNAPError
+            If the result is not ``'OK'``.
+        msgspec.ValidationError
+            If a section's result is not ``'OK'`` or the response does not match.
+        """
+        from msgspec import ValidationError  # noqa: PLC0415
+
+        from .structs import decoder  # noqa: PLC0415
+
+        payload = cast('GetMultipleHNAPsPayload', {'GetMultipleHNAPs': dict.fromkeys(actions, '')})
+        res: MultipleHNAPsResponse = self._post('GetMultipleHNAPs', payload, decoder.decode,
+                                                (ValidationError,))
+        if self._session_restored and res.response.result == 'UN-AUTH':
+            self._login_again()
+            res = self._post('GetMultipleHNAPs', payload, decoder.decode, (ValidationError,))
+        if res.response.result != 'OK':
+            raise CallHNAPError(
+                {'GetMultipleHNAPsResponse': {
+                    'GetMultipleHNAPsResult': res.response.result
+                }})
+        return res.response
+
+    def __enter__(self) -> Client:
+        """Log in (or resume a stored session) and return a client."""
+        if not self.restore_session():
+            self.login()
         return self
 
     def __exit__(self, exc_cls: type[BaseException] | None, base_exc: BaseException | None,
                  traceback: TracebackType | None) -> None:
-        """Perform logout action."""
-        self.session.get(f'https://{self.host}/Logout.html')
+        """Perform logout action unless ``logout`` is ``False``."""
+        if not self.logout:
+            return
+        if self.session_cache is not None:
+            self.session_cache.delete(self.host, self.username)
+        self.session.get(f'https://{self.host}/Logout.html', verify=False)
@@ -0,0 +1,143 @@
+"""Merge concurrent ``GetMultipleHNAPs`` calls into a single request."""
+from collections.abc import Collection
+from concurrent.futures import Future
+from typing import TYPE_CHECKING, Any, cast
+import asyncio
+import threading
+import time
+
+from .api import GetMultipleHNAPsResponse, MultipleHNAPAction
+from .client import CallHNAPError, Client
+
+if TYPE_CHECKING:
+    from .async_client import AsyncClient
+
+__all__ = ('AsyncCoalescer', 'Coalescer')
+
+
+def _slice_response(response: GetMultipleHNAPsResponse, actions: Collection[MultipleHNAPAction], *,
+                    check: bool) -> GetMultipleHNAPsResponse:
+    top = cast('dict[str, Any]', response['GetMultipleHNAPsResponse'])
+    section = {k: top[k] for k in (f'{action}Response' for action in actions) if k in top}
+    section['GetMultipleHNAPsResult'] = top['GetMultipleHNAPsResult']
+    sliced = cast('GetMultipleHNAPsResponse', {'GetMultipleHNAPsResponse': section})
+    if check and section['GetMultipleHNAPsResult'] != 'OK':
+        raise CallHNAPError(sliced)
+    return sliced
+
+
+class Coalescer:
+    """
+    Merge ``GetMultipleHNAPs`` calls made from different threads.
+
+    The first caller waits ``window`` seconds for other callers to join, then sends one request for
+    the union of all requested actions. Every caller receives only the sections it asked for.
+
+    Batches are sent one at a time so the client's session is never used by two threads at once. A
+    batch that fills up while the previous one is being sent waits for it to finish.
+
+    Parameters
+    ----------
+    client : Client
+        Logged in client.
+    window : float
+        Time in seconds to wait for other callers.
+    """
+    def __init__(self, client: Client, window: float = 0.01) -> None:
+        self.client = client
+        self.window = window
+        self._lock = threading.Lock()
+        self._send_lock = threading.Lock()
+        self._actions: set[MultipleHNAPAction] = set()
+        self._future: Future[GetMultipleHNAPsResponse] | None = None
+
+    def _close_batch(self) -> set[MultipleHNAPAction]:
+        with self._lock:
+            self._future = None
+            return self._actions
+
+    def call_multiple_hnaps(self,
+                            actions: Collection[MultipleHNAPAction],
+                            *,
+                            check: bool = True) -> GetMultipleHNAPsResponse:
+        """Call multiple HNAPs, possibly in the same request as other callers."""
+        with self._lock:
+            future = self._future
+            leader = future is None
+            if future is None:
+                future = self._future = Future()
+                self._actions = set()
+            self._actions.update(actions)
+        if leader:
+            try:
+                time.sleep(self.window)
+                batch = self._close_batch()
+                with self._send_lock:
+                    future.set_result(self.client.call_multiple_hnaps(sorted(batch), check=False))
+            except Exception as e:  # noqa: BLE001
+                future.set_exception(e)
+            finally:
+                with self._lock:
+                    if self._future is future:
+                        self._future = None
+                if not future.done():
+                    # Interrupted, for example by KeyboardInterrupt. Do not leave followers waiting.
+                    future.cancel()
+        return _slice_response(future.result(), actions, check=check)
+
+    def call_hnap(self,
+                  action: MultipleHNAPAction,
+                  *,
+                  check: bool = True) -> GetMultipleHNAPsResponse:
+        """Call a single action that must be called with ``GetMultipleHNAPs``."""
+        return self.call_multiple_hnaps((action,), check=check)
+
+
+class AsyncCoalescer:
+    """
+    Merge ``GetMultipleHNAPs`` calls made from different tasks.
+
+    Same as :py:class:`Coalescer` but for :py:class:`mb8611.async_client.AsyncClient`. Must be used
+    from a single event loop.
+
+    If the first task is cancelled before the request completes, the tasks waiting on the same
+    batch are cancelled too and the next call starts a new batch.
+    """
+    def __init__(self, client: 'AsyncClient', window: float = 0.01) -> None:
+        self.client = client
+        self.window = window
+        self._actions: set[MultipleHNAPAction] = set()
+        self._future: asyncio.Future[GetMultipleHNAPsResponse] | None = None
+
+    async def call_multiple_hnaps(self,
+                                  actions: Collection[MultipleHNAPAction],
+                                  *,
+                                  check: bool = True) -> GetMultipleHNAPsResponse:
+        """Call multiple HNAPs, possibly in the same request as other tasks."""
+        future = self._future
+        leader = future is None
+        if future is None:
+            future = self._future = asyncio.get_running_loop().create_future()
+            self._actions = set()
+        self._actions.update(actions)
+        if leader:
+            try:
+                await asyncio.sleep(self.window)
+                self._future = None
+                future.set_result(await self.client.call_multiple_hnaps(sorted(self._actions),
+                                                                        check=False))
+            except Exception as e:  # noqa: BLE001
+                future.set_exception(e)
+            finally:
+                if self._future is future:
+                    self._future = None
+                if not future.done():
+                    future.cancel()
+        return _slice_response(await future, actions, check=check)
+
+    async def call_hnap(self,
+                        action: MultipleHNAPAction,
+                        *,
+                        check: bool = True) -> GetMultipleHNAPsResponse:
+        """Call a single action that must be called with ``GetMultipleHNAPs``."""
+        return await self.call_multiple_hnaps((action,), check=check)
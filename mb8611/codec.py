@@ -0,0 +1,88 @@
+"""
+JSON codecs for request and response bodies.
+
+`msgspec <https://jcristharif.com/msgspec/>`_ or `orjson <https://github.com/ijl/orjson>`_ are used
+when installed (``json-msgspec`` and ``json-orjson`` extras). They are faster than :py:mod:`json`
+and create fewer temporary objects.
+"""
+from __future__ import annotations
+
+from typing import TYPE_CHECKING, Any, NamedTuple
+import functools
+import json
+
+if TYPE_CHECKING:
+    from collections.abc import Callable
+
+__all__ = ('CODECS', 'Codec', 'get_codec')
+
+
+class Codec(NamedTuple):
+    """JSON encoder and decoder."""
+    name: str
+    """Name of the codec."""
+    encode: Callable[[Any], bytes]
+    """Encode an object to JSON."""
+    decode: Callable[[bytes], Any]
+    """
+    Decode JSON into built-in types.
+
+    Raises a :py:class:`ValueError` subclass if the data is not valid JSON.
+    """
+
+
+def _json_codec() -> Codec:
+    return Codec('json', lambda obj: json.dumps(obj).encode(), json.loads)
+
+
+def _msgspec_codec() -> Codec:
+    import msgspec  # noqa: PLC0415
+
+    return Codec('msgspec', msgspec.json.Encoder().encode, msgspec.json.Decoder().decode)
+
+
+def _orjson_codec() -> Codec:
+    import orjson  # noqa: PLC0415
+
+    return Codec('orjson', orjson.dumps, orjson.loads)
+
+
+CODECS: dict[str, Callable[[], Codec]] = {
+    'msgspec': _msgspec_codec,
+    'orjson': _orjson_codec,
+    'json': _json_codec,
+}
+"""Codec factories by name in order of preference."""
+
+
+@functools.cache
+def get_codec(name: str | None = None) -> Codec:
+    """
+    Get a codec.
+
+    Parameters
+    ----------
+    name : str | None
+        Name of a codec in :py:data:`CODECS`. If ``None``, the first codec that can be imported is
+        returned.
+
+    Returns
+    -------
+    Codec
+        The codec.
+
+    Raises
+    ------
+    ImportError
+        If ``name`` is passed and the library is not installed.
+    KeyError
+        If ``name`` is not a known codec.
+    """
+    if name is not None:
+        return CODECS[name]()
+    for factory in CODECS.values():
+        try:
+            return factory()
+        except ImportError:
+            continue
+    return _json_codec()  # pragma: no cover
@@ -0,0 +1,305 @@
+"""
+Poll very large fleets with several processes.
+
+Signing requests, TLS and decoding JSON are CPU-bound, so a single process polling thousands of
+modems is limited by the GIL. :py:class:`Collector` shards the hosts across worker processes. Each
+worker keeps a logged-in :py:class:`~mb8611.client.Client` for every host of its shard and streams
+results back to the parent over a pipe.
+"""
+from __future__ import annotations
+
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from multiprocessing.connection import wait
+from typing import TYPE_CHECKING, Any, cast
+import contextlib
+import functools
+import logging
+import multiprocessing
+import os
+import pickle  # noqa: S403
+import warnings
+
+from requests import RequestException
+from urllib3.exceptions import InsecureRequestWarning
+
+from .client import CallHNAPError, Client
+from .fleet import PollResult
+
+if TYPE_CHECKING:
+    from collections.abc import Collection, Iterable, Iterator, Mapping, Sequence
+    from multiprocessing.connection import Connection
+    from multiprocessing.context import BaseContext
+    from multiprocessing.process import BaseProcess
+    from types import TracebackType
+
+    from .api import GetMultipleHNAPsResponse, MultipleHNAPAction
+    from .fleet import ClientFactory
+
+__all__ = ('Collector', 'CollectorError')
+
+logger = logging.getLogger(__name__)
+
+
+class CollectorError(RuntimeError):
+    """Raised when every worker process has exited."""
+
+
+class _HostPoller:
+    """Keep a client logged in and call the actions, logging in again on ``'UN-AUTH'``."""
+    def __init__(self, client: Client) -> None:
+        self.client = client
+        self.logged_in = False
+
+    def _login(self) -> None:
+        self.client.private_key = 'withoutloginkey'
+        self.client.login()
+        self.logged_in = True
+
+    def _fetch(self, actions: Collection[MultipleHNAPAction]) -> GetMultipleHNAPsResponse:
+        if not self.logged_in:
+            self._login()
+        response = self.client.call_multiple_hnaps(actions, check=False)
+        if response['GetMultipleHNAPsResponse'].get('GetMultipleHNAPsResult') == 'UN-AUTH':
+            logger.debug('Session of %s expired.', self.client.host)
+            self._login()
+            response = self.client.call_multiple_hnaps(actions, check=False)
+        return response
+
+    def poll(self, actions: Collection[MultipleHNAPAction], *, check: bool) -> PollResult:
+        try:
+            response = self._fetch(actions)
+        except Exception as e:
+            # One misbehaving host must not stop the worker and the rest of its shard.
+            logger.debug('Polling %s failed.', self.client.host, exc_info=True)
+            self.logged_in = False
+            return PollResult(self.client.host, None, e)
+        if check and response['GetMultipleHNAPsResponse'].get('GetMultipleHNAPsResult') != 'OK':
+            return PollResult(self.client.host, None, CallHNAPError(response))
+        return PollResult(self.client.host, response, None)
+
+    def close(self) -> None:
+        if self.logged_in:
+            self.logged_in = False
+            with contextlib.suppress(RequestException):
+                self.client.session.get(f'https://{self.client.host}/Logout.html', verify=False)
+
+
+def _picklable(result: PollResult) -> PollResult:
+    # Exceptions of requests can hold responses and connections that cannot be pickled.
+    if result.error is None:
+        return result
+    try:
+        pickle.dumps(result.error)
+    except Exception:  # noqa: BLE001
+        return result._replace(error=RuntimeError(f'{type(result.error).__name__}: {result.error}'))
+    return result
+
+
+def _run(conn: Connection, pollers: dict[str, _HostPoller], executor: ThreadPoolExecutor,
+         actions: Collection[MultipleHNAPAction], client_factory: ClientFactory, *,
+         check: bool) -> None:
+    while (message := conn.recv()) is not None:
+        command, args = message
+        if command == 'add':
+            pollers.update((host, _HostPoller(client_factory(host))) for host in args)
+            continue
+        round_, hosts = args
+        futures = [
+            executor.submit(pollers[host].poll, actions, check=check) for host in hosts
+            if host in pollers
+        ]
+        for future in as_completed(futures):
+            conn.send((round_, _picklable(future.result())))
+
+
+def _worker(conn: Connection, actions: Collection[MultipleHNAPAction],
+            client_factory: ClientFactory, threads: int, check: bool) -> None:  # noqa: FBT001
+    """
+    Run a worker process.
+
+    Messages are ``('add', hosts)`` to add hosts to the shard, ``('poll', (round, hosts))`` to poll
+    hosts and ``None`` to stop. Each result is sent back as ``(round, PollResult)``.
+    """
+    # Warnings filters of the parent are not inherited. There is no way to install a good
+    # certificate on the device.
+    warnings.filterwarnings(action='ignore', category=InsecureRequestWarning)
+    pollers: dict[str, _HostPoller] = {}
+    with ThreadPoolExecutor(max_workers=threads, thread_name_prefix='mb8611-collector') as executor:
+        try:
+            _run(conn, pollers, executor, actions, client_factory, check=check)
+        except EOFError:
+            logger.debug('Parent process exited.')
+        finally:
+            for poller in pollers.values():
+                poller.close()
+
+
+class _Worker:
+    def __init__(self, process: BaseProcess, conn: Connection) -> None:
+        self.process = process
+        self.conn = conn
+        self.hosts: list[str] = []
+
+
+class Collector:
+    """
+    Poll hosts with a pool of worker processes that keep their clients logged in.
+
+    Hosts are split evenly between the workers. Each worker polls its hosts concurrently with a
+    thread pool and keeps every client logged in between calls to :py:meth:`poll`, logging in again
+    when a session expires. If a worker dies, its hosts are moved to the workers with the fewest
+    hosts, including hosts not polled yet in the current :py:meth:`poll`. Workers are not replaced.
+
+    Use as a context manager or call :py:meth:`close` to stop the workers and log out.
+
+    Parameters
+    ----------
+    hosts : Iterable[str]
+        Hosts to poll.
+    actions : Collection[MultipleHNAPAction]
+        Actions to call on every host.
+    password : str
+        Administrator password. Ignored if ``client_factory`` is passed.
+    username : str
+        Administrator username. Ignored if ``client_factory`` is passed.
+    check : bool
+        Treat a result other than ``'OK'`` as an error.
+    client_factory : ClientFactory | None
+        Callable returning a client for a host. It is sent to the workers so it must be picklable,
+        for example a module-level function or a :py:func:`functools.partial` of one.
+    processes : int | None
+        Number of worker processes. Defaults to the number of CPUs.
+    threads : int
+        Maximum number of hosts each worker polls at the same time.
+    mp_context : BaseContext | None
+        :py:mod:`multiprocessing` context used to start workers. Defaults to ``spawn`` so that the
+        workers do not inherit the threads and connections of the parent.
+    """
+    def __init__(self,
+                 hosts: Iterable[str],
+                 actions: Collection[MultipleHNAPAction],
+                 password: str = '',
+                 username: str = 'admin',
+                 *,
+                 check: bool = True,
+                 client_factory: ClientFactory | None = None,
+                 processes: int | None = None,
+                 threads: int = 8,
+                 mp_context: BaseContext | None = None) -> None:
+        self.hosts = list(dict.fromkeys(hosts))
+        self.actions = tuple(actions)
+        context = mp_context or multiprocessing.get_context('spawn')
+        factory = client_factory or functools.partial(Client, password, username=username)
+        count = max(1, min(processes or os.cpu_count() or 1, len(self.hosts)))
+        self._round = 0
+        self._workers: list[_Worker] = []
+        for index in range(count):
+            parent_conn, child_conn = context.Pipe()
+            process = context.Process(  # type: ignore[attr-defined]
+                target=_worker,
+                args=(child_conn, self.actions, factory, threads, check),
+                name=f'mb8611-collector-{index}',
+                daemon=True)
+            process.start()
+            child_conn.close()
+            worker = _Worker(process, parent_conn)
+            self._workers.append(worker)
+            self._add(worker, self.hosts[index::count])
+
+    @property
+    def shards(self) -> Mapping[int, Sequence[str]]:
+        """Hosts of each live worker keyed by process ID."""
+        return {cast('int', w.process.pid): tuple(w.hosts) for w in self._workers}
+
+    @staticmethod
+    def _send(worker: _Worker, message: Any) -> bool:
+        try:
+            worker.conn.send(message)
+        except OSError:
+            return False
+        return True
+
+    def _add(self, worker: _Worker, hosts: Sequence[str]) -> None:
+        worker.hosts.extend(hosts)
+        self._send(worker, ('add', hosts))
+
+    def _remove(self, dead: _Worker, pending: Collection[str]) -> None:
+        """Move the hosts of ``dead`` to the other workers and poll the ones in ``pending``."""
+        dead.process.kill()
+        dead.process.join()
+        logger.warning('Worker %s exited with code %s. Moving its %d hosts.', dead.process.name,
+                       dead.process.exitcode, len(dead.hosts))
+        self._workers.remove(dead)
+        dead.conn.close()
+        if not self._workers:
+            msg = 'Every worker process has exited.'
+            raise CollectorError(msg)
+        moved: dict[_Worker, list[str]] = {}
+        for host in dead.hosts:
+            worker = min(self._workers, key=lambda w: len(w.hosts))
+            worker.hosts.append(host)
+            moved.setdefault(worker, []).append(host)
+        for worker, hosts in moved.items():
+            self._send(worker, ('add', hosts))
+            if to_poll := [host for host in hosts if host in pending]:
+                self._send(worker, ('poll', (self._round, to_poll)))
+
+    def _receive(self, worker: _Worker, pending: set[str]) -> Iterator[PollResult]:
+        while worker.conn.poll():
+            round_, result = worker.conn.recv()
+            if round_ == self._round and result.host in pending:
+                pending.discard(result.host)
+                yield result
+
+    def poll(self) -> Iterator[PollResult]:
+        """
+        Poll every host once and yield results in order of completion.
+
+        Results of an earlier call that was not iterated to the end are discarded.
+
+        Raises
+        ------
+        CollectorError
+            If every worker process has exited.
+        """
+        self._round += 1
+        pending = set(self.hosts)
+        for worker in list(self._workers):
+            if not self._send(worker, ('poll', (self._round, worker.hosts))):
+                self._remove(worker, pending)
+        while pending:
+            by_handle: dict[Any, _Worker] = {}
+            for worker in self._workers:
+                by_handle[worker.conn] = worker
+                by_handle[worker.process.sentinel] = worker
+            for handle in wait(list(by_handle)):
+                if (worker := by_handle[handle]) not in self._workers:
+                    continue
+                try:
+                    yield from self._receive(worker, pending)
+                except (EOFError, OSError):
+                    self._remove(worker, pending)
+                    continue
+                if handle == worker.process.sentinel:
+                    self._remove(worker, pending)
+
+    def close(self) -> None:
+        """Stop the workers. Workers log out of every host they are logged in to."""
+        for worker in self._workers:
+            self._send(worker, None)
+        for worker in self._workers:
+            worker.process.join(10)
+            if worker.process.is_alive():
+                worker.process.kill()
+                worker.process.join()
+            worker.conn.close()
+        self._workers.clear()
+
+    def __enter__(self) -> Collector:
+        """Return the collector."""
+        return self
+
+    def __exit__(self, exc_cls: type[BaseException] | None, base_exc: BaseException | None,
+                 traceback: TracebackType | None) -> None:
+        """Stop the workers."""
+        self.close()
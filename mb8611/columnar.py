@@ -0,0 +1,388 @@
+"""
+Export channel tables and the event log as Parquet, Arrow or CSV datasets.
+
+Samples written by ``mb8611 --watch`` (or ``GetMultipleHNAPs`` responses) are converted to typed
+Arrow columns and written in batches, so months of samples can be exported with bounded memory and
+loaded with :py:func:`pyarrow.dataset.dataset` or :py:func:`pandas.read_parquet` without parsing
+JSON again.
+
+Requires the ``arrow`` extra.
+"""
+from __future__ import annotations
+
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import IO, TYPE_CHECKING, Any, Final, Literal, TypeVar, cast
+import itertools
+import logging
+import re
+import sys
+import uuid
+
+from pyarrow import dataset as ds
+import click
+import pyarrow as pa
+
+from .channels import DownstreamChannel, UpstreamChannel
+from .codec import get_codec
+from .constants import ROW_DELIMITERS
+from .logs import WatermarkStore, new_log_rows
+from .main import ACTION_ALIAS_MAPPING
+from .utils import iter_table_rows
+
+if TYPE_CHECKING:
+    from collections.abc import Callable, Iterable, Iterator, Mapping, Sequence
+    from types import TracebackType
+
+    from .api import GetMultipleHNAPsResponse
+    from .logs import LogWatermark
+
+__all__ = ('DOWNSTREAM_SCHEMA', 'LOG_SCHEMA', 'PARTITIONING', 'UPSTREAM_SCHEMA', 'WATERMARKS_FILE',
+           'ColumnarWriter', 'Format')
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar('T')
+
+Format = Literal['arrow', 'csv', 'parquet']
+"""File format of an exported dataset."""
+PARTITIONING: Final = pa.schema([('host', pa.string()), ('date', pa.date32())])
+"""Partition columns of every dataset. ``date`` is the UTC date of the sample."""
+_KEY_COLUMNS: Final = [*PARTITIONING, pa.field('ts', pa.timestamp('ms', tz='UTC'))]
+DOWNSTREAM_SCHEMA: Final = pa.schema([
+    *_KEY_COLUMNS, ('channel', pa.uint16()), ('locked', pa.bool_()), ('modulation', pa.string()),
+    ('channel_id', pa.uint16()), ('frequency', pa.float32()), ('power', pa.float32()),
+    ('snr', pa.float32()), ('corrected', pa.uint64()), ('uncorrected', pa.uint64())
+])
+"""
+Schema of the ``downstream`` dataset.
+
+The columns after ``ts`` (time of the sample) are the same as
+:py:class:`mb8611.channels.DownstreamChannel` except ``lock_status`` is replaced by the boolean
+``locked``.
+"""
+UPSTREAM_SCHEMA: Final = pa.schema([
+    *_KEY_COLUMNS, ('channel', pa.uint16()), ('locked', pa.bool_()), ('channel_type', pa.string()),
+    ('channel_id', pa.uint16()), ('symbol_rate', pa.uint32()), ('frequency', pa.float32()),
+    ('power', pa.float32())
+])
+"""
+Schema of the ``upstream`` dataset.
+
+The columns after ``ts`` (time of the sample) are the same as
+:py:class:`mb8611.channels.UpstreamChannel` except ``lock_status`` is replaced by the boolean
+``locked``.
+"""
+LOG_SCHEMA: Final = pa.schema([
+    *_KEY_COLUMNS, ('logged_at', pa.timestamp('s')), ('priority', pa.string()),
+    ('level', pa.uint8()), ('message', pa.string())
+])
+"""
+Schema of the ``log`` dataset.
+
+``ts`` is the time of the sample the entry was first seen in. ``logged_at`` is the time of the entry
+in the modem's time zone, or null if it cannot be parsed. ``priority`` and ``level`` are split from
+the priority column, for example ``'Notice (6)'``.
+"""
+_SCHEMAS: Final[Mapping[str, pa.Schema]] = {
+    'downstream': DOWNSTREAM_SCHEMA,
+    'upstream': UPSTREAM_SCHEMA,
+    'log': LOG_SCHEMA
+}
+_FORMATS: Final[Mapping[Format, tuple[str, str]]] = {
+    'arrow': ('ipc', 'arrow'),
+    'csv': ('csv', 'csv'),
+    'parquet': ('parquet', 'parquet')
+}
+_LOG_COLUMNS = 4
+WATERMARKS_FILE: Final = 'log-watermarks.json'
+"""Name of the file in the base directory that stores the log watermark of each host."""
+_PRIORITY_RE = re.compile(r'^(.*?)\s*\((\d+)\)$')
+
+
+def _priority(value: str) -> tuple[str, int | None]:
+    if (match := _PRIORITY_RE.match(value.strip())) is None:
+        return value.strip(), None
+    return match[1], int(match[2])
+
+
+def _logged_at(time_str: str, date_str: str) -> datetime | None:
+    # The modem's time zone is unknown.
+    value = f'{date_str.strip()} {time_str.strip()}'
+    try:
+        return datetime.strptime(value, '%a %b %d %Y %H:%M:%S')  # noqa: DTZ007
+    except ValueError:
+        return None
+
+
+def _table_rows(value: str | Sequence[Sequence[str]], key: str,
+                columns: int) -> Iterator[Sequence[str]]:
+    # --watch output has tables already split into rows.
+    rows = iter_table_rows(value, ROW_DELIMITERS.get(key, '|+|')) if isinstance(value,
+                                                                                str) else value
+    for row in rows:
+        if len(row) >= columns:
+            yield row
+        elif any(row):
+            logger.warning('Skipping short %s row: %s', key, '^'.join(row))
+
+
+def _parse_rows(value: str | Sequence[Sequence[str]], key: str, parse: Callable[[Sequence[str]], T],
+                columns: int) -> Iterator[T]:
+    for row in _table_rows(value, key, columns):
+        try:
+            parsed = parse(row)
+        except ValueError:
+            logger.warning('Skipping invalid %s row: %s', key, '^'.join(row))
+            continue
+        yield parsed
+
+
+class _Buffer:
+    def __init__(self, schema: pa.Schema) -> None:
+        self.schema = schema
+        self.columns: dict[str, list[Any]] = {name: [] for name in schema.names}
+
+    def __len__(self) -> int:
+        return len(self.columns['ts'])
+
+    def append(self, values: Sequence[Any]) -> None:
+        for column, value in zip(self.columns.values(), values, strict=True):
+            column.append(value)
+
+    def take(self) -> pa.RecordBatch:
+        batch = pa.RecordBatch.from_pydict(self.columns, schema=self.schema)
+        for column in self.columns.values():
+            column.clear()
+        return batch
+
+
+class ColumnarWriter:
+    """
+    Write channel tables and new event log entries as datasets partitioned by host and date.
+
+    Each table is a dataset in its own directory of ``base_dir`` (``downstream``, ``upstream`` and
+    ``log``), partitioned in Hive style, for example
+    ``downstream/host=192.168.100.1/date=2026-01-31/part-….parquet``. Rows are buffered and written
+    every ``batch_size`` rows of a table, so memory use does not depend on the number of samples.
+    Every write adds new files, so several exports can be written to the same directory.
+
+    Every sample has the whole log, so only log entries not seen in the previous sample of the same
+    host are written. The position in the log of each host is saved to :py:data:`WATERMARKS_FILE` in
+    ``base_dir`` when the buffered rows are written, so later exports to the same directory do not
+    write the same entries again. Entries may be written twice if the process stops between writing
+    the rows and saving the position.
+
+    Channel rows that are too short or cannot be parsed are logged and skipped.
+
+    Not thread-safe. Use as a context manager or call :py:meth:`close` to write the last rows.
+
+    Parameters
+    ----------
+    base_dir : Path | str
+        Directory of the datasets.
+    file_format : Format
+        File format.
+    batch_size : int
+        Number of rows of a table to buffer before writing them.
+    newest_first : bool
+        Set if the modem lists the newest log entry first.
+    """
+    def __init__(self,
+                 base_dir: Path | str,
+                 *,
+                 file_format: Format = 'parquet',
+                 batch_size: int = 65536,
+                 newest_first: bool = False) -> None:
+        self.base_dir = Path(base_dir)
+        self.file_format = file_format
+        self.batch_size = batch_size
+        self.newest_first = newest_first
+        self.rows_written = dict.fromkeys(_SCHEMAS, 0)
+        """Number of rows written to each dataset."""
+        self._buffers = {name: _Buffer(schema) for name, schema in _SCHEMAS.items()}
+        self._watermark_store = WatermarkStore(self.base_dir / WATERMARKS_FILE)
+        self._watermarks: dict[str, LogWatermark | None] = {}
+        self._changed_watermarks: set[str] = set()
+        self._prefix = uuid.uuid4().hex[:12]
+        self._writes = 0
+
+    def add_sections(self, host: str, ts: float, sections: Mapping[str, Mapping[str, Any]]) -> None:
+        """
+        Add the sections of one sample.
+
+        Parameters
+        ----------
+        host : str
+            Host of the sample.
+        ts : float
+            Time of the sample.
+        sections : Mapping[str, Mapping[str, Any]]
+            ``<action>Response`` sections keyed by action or by ``mb8611`` action alias. Tables may
+            be encoded strings or lists of rows. Other sections are ignored.
+        """
+        by_action = {ACTION_ALIAS_MAPPING.get(cast('Any', k), k): v for k, v in sections.items()}
+        when = datetime.fromtimestamp(ts, timezone.utc)
+        key = (host, when.date(), when)
+        if (section := by_action.get('GetMotoStatusDownstreamChannelInfo')) is not None:
+            for channel in _parse_rows(section.get('MotoConnDownstreamChannel', ''),
+                                       'MotoConnDownstreamChannel', DownstreamChannel.from_row,
+                                       len(DownstreamChannel._fields)):
+                self._append('downstream',
+                             (*key, channel.channel, channel.lock_status == 'Locked', *channel[2:]))
+        if (section := by_action.get('GetMotoStatusUpstreamChannelInfo')) is not None:
+            for up in _parse_rows(section.get('MotoConnUpstreamChannel', ''),
+                                  'MotoConnUpstreamChannel', UpstreamChannel.from_row,
+                                  len(UpstreamChannel._fields)):
+                self._append('upstream', (*key, up.channel, up.lock_status == 'Locked', *up[2:]))
+        if (section := by_action.get('GetMotoStatusLog')) is not None:
+            self._add_log(host, key, section.get('MotoStatusLogList', ''))
+
+    def add_response(self, host: str, ts: float, response: GetMultipleHNAPsResponse) -> None:
+        """Add a ``GetMultipleHNAPs`` response of ``host`` fetched at ``ts``."""
+        top = cast('Mapping[str, Any]', response['GetMultipleHNAPsResponse'])
+        self.add_sections(
+            host, ts, {
+                k.removesuffix('Response'): v
+                for k, v in top.items() if k.endswith('Response') and isinstance(v, dict)
+            })
+
+    def add_sample(self, sample: Mapping[str, Any]) -> bool:
+        """
+        Add a line of ``mb8611 --watch`` output.
+
+        Returns
+        -------
+        bool
+            ``False`` if the line has no responses, for example because the request failed or it
+            was written with ``--changes``.
+        """
+        if 'responses' not in sample:
+            return False
+        self.add_sections(sample['host'], sample['timestamp'], sample['responses'])
+        return True
+
+    def add_ndjson(self, lines: Iterable[bytes | str]) -> int:
+        """
+        Add lines of ``mb8611 --watch`` output.
+
+        Blank lines, lines without responses and lines that are not valid JSON are skipped.
+
+        Returns
+        -------
+        int
+            Number of samples added.
+        """
+        decode = get_codec().decode
+        count = 0
+        for number, line in enumerate(lines, 1):
+            if not line.strip():
+                continue
+            try:
+                sample = decode(line.encode() if isinstance(line, str) else line)
+            except ValueError:
+                logger.warning('Skipping line %d that is not valid JSON.', number)
+                continue
+            count += self.add_sample(sample)
+        return count
+
+    def _add_log(self, host: str, key: tuple[Any, ...],
+                 value: str | Sequence[Sequence[str]]) -> None:
+        rows = list(_table_rows(value, 'MotoStatusLogList', _LOG_COLUMNS))
+        if self.newest_first:
+            rows.reverse()
+        if host not in self._watermarks:
+            self._watermarks[host] = self._watermark_store.get(host)
+        new_rows, self._watermarks[host] = new_log_rows(rows, self._watermarks[host])
+        self._changed_watermarks.add(host)
+        for row in new_rows:
+            self._append(
+                'log',
+                (*key, _logged_at(row[0], row[1]), *_priority(row[2]), '^'.join(row[3:]).strip()))
+
+    def _append(self, name: str, values: Sequence[Any]) -> None:
+        buffer = self._buffers[name]
+        buffer.append(values)
+        if len(buffer) >= self.batch_size:
+            self._write(name)
+
+    def _write(self, name: str) -> None:
+        if not (buffer := self._buffers[name]):
+            return
+        batch = buffer.take()
+        format_name, extension = _FORMATS[self.file_format]
+        self._writes += 1
+        ds.write_dataset(batch,
+                         self.base_dir / name,
+                         format=format_name,
+                         partitioning=ds.partitioning(PARTITIONING, flavor='hive'),
+                         basename_template=f'part-{self._prefix}-{self._writes}-{{i}}.{extension}',
+                         existing_data_behavior='overwrite_or_ignore')
+        self.rows_written[name] += batch.num_rows
+        logger.debug('Wrote %d rows to %s.', batch.num_rows, name)
+
+    def flush(self) -> None:
+        """Write the buffered rows and save the log watermarks."""
+        for name in self._buffers:
+            self._write(name)
+        for host in self._changed_watermarks:
+            if (watermark := self._watermarks[host]) is not None:
+                self._watermark_store.set(host, watermark)
+        self._changed_watermarks.clear()
+
+    def close(self) -> None:
+        """Write the buffered rows and save the log watermarks."""
+        self.flush()
+
+    def __enter__(self) -> ColumnarWriter:
+        """Return the writer."""
+        return self
+
+    def __exit__(self, exc_cls: type[BaseException] | None, base_exc: BaseException | None,
+                 traceback: TracebackType | None) -> None:
+        """Write the buffered rows."""
+        self.close()
+
+
+@click.command()
+@click.argument('output_dir', type=click.Path(file_okay=False, path_type=Path))
+@click.argument('files', type=click.File('rb'), nargs=-1)
+@click.option('-b',
+              '--batch-size',
+              type=click.IntRange(min=1),
+              default=65536,
+              help='Rows of a table to buffer before writing them.')
+@click.option('-d', '--debug', is_flag=True, help='Enable debug level logging.')
+@click.option('-f',
+              '--format',
+              'file_format',
+              type=click.Choice(list(_FORMATS)),
+              default='parquet',
+              help='File format.')
+@click.option('--newest-first', is_flag=True, help='The modem lists the newest log entry first.')
+def main(output_dir: Path,
+         files: Sequence[IO[bytes]],
+         batch_size: int = 65536,
+         file_format: Format = 'parquet',
+         *,
+         debug: bool = False,
+         newest_first: bool = False) -> None:
+    """
+    Export samples written by mb8611 --watch to datasets partitioned by host and date.
+
+    FILES are read in order. Standard input is read if no FILES are passed. The downstream,
+    upstream and log datasets are written to subdirectories of OUTPUT_DIR. The position in the log
+    of each host is kept in OUTPUT_DIR so log entries are only exported once.
+    """
+    logging.basicConfig(level=logging.DEBUG if debug else logging.WARNING)
+    kwargs: dict[str, Any] = {
+        'batch_size': batch_size,
+        'file_format': file_format,
+        'newest_first': newest_first
+    }
+    with ColumnarWriter(output_dir, **kwargs) as writer:
+        samples = writer.add_ndjson(itertools.chain.from_iterable(files or (sys.stdin.buffer,)))
+    click.echo(f'Exported {samples} samples: ' +
+               ', '.join(f'{count} {name} rows'
+                         for name, count in writer.rows_written.items()) + '.',
+               err=True)
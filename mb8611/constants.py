@@ -1,10 +1,15 @@
 """Common constants."""
-from collections.abc import Mapping
-from typing import Final
+from __future__ import annotations
 
-from .api import MultipleHNAPAction
+from typing import TYPE_CHECKING, Final
 
-__all__ = ('MUST_BE_CALLED_FROM_MULTIPLE', 'ROW_DELIMITERS', 'SHARED_HEADERS', 'TABLE_KEYS')
+if TYPE_CHECKING:
+    from collections.abc import Mapping
+
+    from .api import MultipleHNAPAction
+
+__all__ = ('BROWSER_COOKIE_PATHS', 'MUST_BE_CALLED_FROM_MULTIPLE', 'ROW_DELIMITERS',
+           'SHARED_HEADERS', 'TABLE_KEYS', 'TRANSIENT_STATUS_CODES')
 
 SHARED_HEADERS: Final[Mapping[str, str]] = {
     'accept': 'application/json',
@@ -25,3 +30,8 @@ MUST_BE_CALLED_FROM_MULTIPLE: Final[set[MultipleHNAPAction]] = {
 """Actions that do not work without using GetMultipleHNAPs."""
 ROW_DELIMITERS: Final[dict[str, str]] = {'MotoStatusLogList': '}-{'}
 """Delimiters used in encoded table strings, keyed by action."""
+BROWSER_COOKIE_PATHS: Final[tuple[str, ...]] = ('/font', '/js/SOAP', '/js', '/css', '/', '/image',
+                                                '/HNAP1')
+"""Paths the browser receives the ``Secure`` cookie for after login."""
+TRANSIENT_STATUS_CODES: Final[frozenset[int]] = frozenset({429, 500, 502, 503, 504})
+"""HTTP status codes of requests that are retried with backoff when a circuit breaker is used."""
@@ -0,0 +1,313 @@
+"""
+Changes between consecutive snapshots of a modem.
+
+The codeword counters of the downstream channel table are cumulative and reset when the modem
+restarts. :py:class:`DeltaTracker` turns consecutive snapshots of each host into
+:py:class:`Delta` instances with the error rate of each channel and only the fields and channel
+columns that changed, which is much smaller than the full snapshot when polling for a long time.
+"""
+from __future__ import annotations
+
+from typing import TYPE_CHECKING, Any, NamedTuple, cast
+import threading
+import time
+
+from .channels import (
+    DownstreamChannel,
+    UpstreamChannel,
+    parse_downstream_channels,
+    parse_upstream_channels,
+)
+from .constants import TABLE_KEYS
+from .utils import parse_uptime
+
+if TYPE_CHECKING:
+    from collections.abc import Mapping
+
+    from .api import GetMultipleHNAPsResponse
+    from .store import Direction
+
+__all__ = ('ChannelChange', 'ChannelRate', 'Delta', 'DeltaTracker', 'FieldChange', 'Snapshot',
+           'make_snapshot')
+
+UPTIME_KEY = 'MotoConnSystemUpTime'
+"""Field used to detect restarts. It is not reported as a changed field."""
+_COUNTERS = frozenset({'channel_id', 'corrected', 'uncorrected'})
+
+
+class Snapshot(NamedTuple):
+    """Parsed state of a modem at one time."""
+    ts: float
+    """Time of the snapshot."""
+    uptime: int | None
+    """Seconds since the modem started, if ``GetMotoStatusConnectionInfo`` was fetched."""
+    fields: Mapping[str, str]
+    """Values of every section other than ``*Result`` fields and tables, keyed by name."""
+    downstream: tuple[DownstreamChannel, ...]
+    """Rows of the downstream channel table."""
+    upstream: tuple[UpstreamChannel, ...]
+    """Rows of the upstream channel table."""
+
+
+def make_snapshot(response: GetMultipleHNAPsResponse, ts: float | None = None) -> Snapshot:
+    """
+    Create a snapshot from a ``GetMultipleHNAPs`` response.
+
+    Parameters
+    ----------
+    response : GetMultipleHNAPsResponse
+        Response with any sections.
+    ts : float | None
+        Time of the response. Defaults to the current time.
+
+    Returns
+    -------
+    Snapshot
+        The snapshot.
+    """
+    top = cast('dict[str, Any]', response['GetMultipleHNAPsResponse'])
+    fields: dict[str, str] = {}
+    uptime = None
+    downstream: tuple[DownstreamChannel, ...] = ()
+    upstream: tuple[UpstreamChannel, ...] = ()
+    for section in top.values():
+        if not isinstance(section, dict):
+            continue
+        for key, value in section.items():
+            if key.endswith('Result') or key in TABLE_KEYS:
+                continue
+            if key == UPTIME_KEY:
+                uptime = parse_uptime(value)
+            else:
+                fields[key] = value
+        if 'MotoConnDownstreamChannel' in section:
+            downstream = tuple(parse_downstream_channels(section['MotoConnDownstreamChannel']))
+        if 'MotoConnUpstreamChannel' in section:
+            upstream = tuple(parse_upstream_channels(section['MotoConnUpstreamChannel']))
+    return Snapshot(time.time() if ts is None else ts, uptime, fields, downstream, upstream)
+
+
+class FieldChange(NamedTuple):
+    """Changed field of a section."""
+    key: str
+    """Name of the field, for example ``'MotoHomeUpNum'``."""
+    old: str | None
+    """Previous value. ``None`` if the field is new."""
+    new: str | None
+    """Current value. ``None`` if the field is gone."""
+
+
+class ChannelChange(NamedTuple):
+    """Changed column of a channel."""
+    direction: Direction
+    """Channel direction."""
+    channel_id: int
+    """Channel ID."""
+    field: str
+    """Name of the column in :py:class:`~mb8611.channels.DownstreamChannel` or
+    :py:class:`~mb8611.channels.UpstreamChannel`."""
+    old: Any
+    """Previous value. ``None`` if the channel is new."""
+    new: Any
+    """Current value. A channel that is gone is reported with a ``lock_status`` of ``None``."""
+
+
+class ChannelRate(NamedTuple):
+    """Codeword errors of a downstream channel since the previous snapshot."""
+    channel_id: int
+    """Channel ID."""
+    corrected: int
+    """Corrected codewords since the previous snapshot."""
+    uncorrected: int
+    """Uncorrectable codewords since the previous snapshot."""
+    corrected_rate: float
+    """Corrected codewords per second."""
+    uncorrected_rate: float
+    """Uncorrectable codewords per second."""
+
+
+class Delta(NamedTuple):
+    """Changes between two snapshots of a host."""
+    host: str
+    """Host of the snapshots."""
+    ts: float
+    """Time of the current snapshot."""
+    interval: float | None
+    """Seconds since the previous snapshot. ``None`` for the first snapshot of a host."""
+    reset: bool
+    """Set if the modem restarted since the previous snapshot."""
+    fields: tuple[FieldChange, ...]
+    """Changed fields."""
+    channels: tuple[ChannelChange, ...]
+    """Changed channel columns."""
+    rates: tuple[ChannelRate, ...]
+    """Channels with new codeword errors."""
+    def __bool__(self) -> bool:
+        """Return ``True`` if anything changed."""
+        return bool(self.reset or self.fields or self.channels or self.rates)
+
+    def to_dict(self) -> dict[str, Any]:
+        """
+        Convert to a dictionary that can be encoded as compact JSON.
+
+        Only current values are included. Channels are keyed by direction and channel ID. A value
+        of ``None`` means the field or channel is gone.
+        """
+        channels: dict[str, dict[str, dict[str, Any]]] = {}
+        for change in self.channels:
+            channels.setdefault(change.direction, {}).setdefault(str(change.channel_id),
+                                                                 {})[change.field] = change.new
+        ret: dict[str, Any] = {'host': self.host, 'timestamp': self.ts}
+        if self.interval is not None:
+            ret['interval'] = self.interval
+        if self.reset:
+            ret['reset'] = True
+        if self.fields:
+            ret['fields'] = {change.key: change.new for change in self.fields}
+        if channels:
+            ret['channels'] = channels
+        if self.rates:
+            ret['rates'] = {
+                str(rate.channel_id): {
+                    'corrected': rate.corrected_rate,
+                    'uncorrected': rate.uncorrected_rate
+                }
+                for rate in self.rates
+            }
+        return ret
+
+
+class _State:
+    def __init__(self, snapshot: Snapshot) -> None:
+        self.snapshot = snapshot
+        self.fields: dict[str, str] = {}
+        self.channels: dict[tuple[Direction, int], dict[str, Any]] = {}
+
+
+def _columns(channel: DownstreamChannel | UpstreamChannel) -> dict[str, Any]:
+    return {k: v for k, v in channel._asdict().items() if k not in _COUNTERS}
+
+
+def _channel_rows(snapshot: Snapshot) -> dict[tuple[Direction, int], dict[str, Any]]:
+    rows: dict[tuple[Direction, int], dict[str, Any]] = {
+        ('down', c.channel_id): _columns(c)
+        for c in snapshot.downstream
+    }
+    rows.update((('up', c.channel_id), _columns(c)) for c in snapshot.upstream)
+    return rows
+
+
+class DeltaTracker:
+    """
+    Compute the changes between consecutive snapshots of each host.
+
+    The first snapshot of a host is reported in full. After that, only fields and channel columns
+    that changed are reported, together with the codeword error rates of channels whose counters
+    increased. A restart is detected by ``MotoConnSystemUpTime`` going backwards and the rates are
+    then computed from the counters and the uptime. A counter that decreases without a restart is
+    treated as having been reset on its own.
+
+    Thread-safe.
+
+    Parameters
+    ----------
+    tolerance : Mapping[str, float] | None
+        Changes of numeric channel columns (for example ``{'power': 0.5, 'snr': 0.5}``) smaller
+        than or equal to these values are not reported. Changes are measured from the last reported
+        value so slow drifts are still reported.
+    """
+    def __init__(self, tolerance: Mapping[str, float] | None = None) -> None:
+        self.tolerance = dict(tolerance or {})
+        self._lock = threading.Lock()
+        self._states: dict[str, _State] = {}
+
+    def reset(self, host: str) -> None:
+        """Forget the previous snapshot of ``host``."""
+        with self._lock:
+            self._states.pop(host, None)
+
+    def update_response(self,
+                        host: str,
+                        response: GetMultipleHNAPsResponse,
+                        ts: float | None = None) -> Delta:
+        """Add a ``GetMultipleHNAPs`` response of ``host`` and return the changes."""
+        return self.update(host, make_snapshot(response, ts))
+
+    def update(self, host: str, snapshot: Snapshot) -> Delta:
+        """Add a snapshot of ``host`` and return the changes since the previous one."""
+        with self._lock:
+            state = self._states.get(host)
+            if state is None:
+                state = self._states[host] = _State(snapshot)
+                previous = None
+            else:
+                previous, state.snapshot = state.snapshot, snapshot
+            return Delta(host, snapshot.ts, None if previous is None else snapshot.ts - previous.ts,
+                         self._restarted(previous, snapshot), self._field_changes(state, snapshot),
+                         self._channel_changes(state, snapshot), self._rates(previous, snapshot))
+
+    @staticmethod
+    def _restarted(previous: Snapshot | None, snapshot: Snapshot) -> bool:
+        return (previous is not None and previous.uptime is not None and snapshot.uptime is not None
+                and snapshot.uptime < previous.uptime)
+
+    @staticmethod
+    def _field_changes(state: _State, snapshot: Snapshot) -> tuple[FieldChange, ...]:
+        changes = [
+            FieldChange(key, state.fields.get(key), value)
+            for key, value in snapshot.fields.items() if state.fields.get(key) != value
+        ]
+        changes.extend(
+            FieldChange(key, value, None) for key, value in state.fields.items()
+            if key not in snapshot.fields)
+        state.fields = dict(snapshot.fields)
+        return tuple(changes)
+
+    def _channel_changes(self, state: _State, snapshot: Snapshot) -> tuple[ChannelChange, ...]:
+        changes: list[ChannelChange] = []
+        rows = _channel_rows(snapshot)
+        for key, row in rows.items():
+            if (reported := state.channels.get(key)) is None:
+                changes.extend(
+                    ChannelChange(*key, field, None, value) for field, value in row.items())
+                state.channels[key] = dict(row)
+                continue
+            for field, value in row.items():
+                old = reported[field]
+                if old == value or (isinstance(value, float)
+                                    and abs(value - old) <= self.tolerance.get(field, 0)):
+                    continue
+                changes.append(ChannelChange(*key, field, old, value))
+                reported[field] = value
+        gone = [key for key in state.channels if key not in rows]
+        changes.extend(
+            ChannelChange(*key, 'lock_status',
+                          state.channels.pop(key)['lock_status'], None) for key in gone)
+        return tuple(changes)
+
+    @staticmethod
+    def _rates(previous: Snapshot | None, snapshot: Snapshot) -> tuple[ChannelRate, ...]:
+        if previous is None:
+            return ()
+        restarted = DeltaTracker._restarted(previous, snapshot)
+        old = {c.channel_id: c for c in previous.downstream}
+        rates = []
+        for channel in snapshot.downstream:
+            if restarted:
+                # Counters started at zero when the modem started.
+                corrected, uncorrected = channel.corrected, channel.uncorrected
+                interval = float(snapshot.uptime or 0)
+            elif (prev := old.get(channel.channel_id)) is None:
+                continue
+            else:
+                corrected = channel.corrected - prev.corrected
+                uncorrected = channel.uncorrected - prev.uncorrected
+                if corrected < 0 or uncorrected < 0:
+                    corrected, uncorrected = channel.corrected, channel.uncorrected
+                interval = snapshot.ts - previous.ts
+            if corrected or uncorrected:
+                rates.append(
+                    ChannelRate(channel.channel_id, corrected, uncorrected,
+                                corrected / interval if interval > 0 else 0.0,
+                                uncorrected / interval if interval > 0 else 0.0))
+        return tuple(rates)
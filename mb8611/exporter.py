@@ -0,0 +1,270 @@
+"""Prometheus exporter."""
+from collections.abc import Iterable
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Final, cast
+import contextlib
+import logging
+import threading
+import time
+import warnings
+
+from requests import RequestException
+from urllib3.exceptions import InsecureRequestWarning
+import click
+
+from .api import GetMultipleHNAPsResponse, MultipleHNAPAction
+from .breaker import CircuitBreaker, CircuitOpenError
+from .channels import parse_downstream_channels, parse_upstream_channels
+from .client import CallHNAPError, Client, LockedError, LoginFailed
+from .utils import parse_uptime
+
+__all__ = ('EXPORTER_ACTIONS', 'Exporter', 'ExporterServer', 'render_metrics')
+
+logger = logging.getLogger(__name__)
+
+EXPORTER_ACTIONS: Final[tuple[MultipleHNAPAction, ...]] = (
+    'GetMotoStatusConnectionInfo',
+    'GetMotoStatusDownstreamChannelInfo',
+    'GetMotoStatusSoftware',
+    'GetMotoStatusUpstreamChannelInfo',
+)
+"""Actions called on every refresh."""
+CONTENT_TYPE: Final = 'text/plain; version=0.0.4; charset=utf-8'
+"""Content type of the Prometheus text format."""
+
+
+def _escape(value: str) -> str:
+    return value.replace('\\', r'\\').replace('"', r'\"').replace('\n', r'\n')
+
+
+def _format(value: float) -> str:
+    # Counters can exceed the precision of the default float format.
+    return repr(value) if isinstance(value, float) else str(int(value))
+
+
+class _Metrics:
+    def __init__(self) -> None:
+        self.lines: list[str] = []
+
+    def add(self, name: str, type_: str, help_: str, samples: Iterable[tuple[dict[str, str],
+                                                                             float]]) -> None:
+        self.lines.extend((f'# HELP mb8611_{name} {help_}', f'# TYPE mb8611_{name} {type_}'))
+        for labels, value in samples:
+            label_str = ','.join(f'{k}="{_escape(v)}"' for k, v in labels.items())
+            self.lines.append(f'mb8611_{name}{{{label_str}}} {_format(value)}'
+                              if label_str else f'mb8611_{name} {_format(value)}')
+
+
+def render_metrics(response: GetMultipleHNAPsResponse | None, duration: float = 0) -> str:
+    """
+    Render a response for :py:data:`EXPORTER_ACTIONS` in the Prometheus text format.
+
+    Parameters
+    ----------
+    response : GetMultipleHNAPsResponse | None
+        Response or ``None`` if the modem could not be reached. In that case only ``mb8611_up`` and
+        ``mb8611_fetch_duration_seconds`` are output.
+    duration : float
+        Seconds it took to get the response.
+
+    Returns
+    -------
+    str
+        Metrics text.
+    """
+    metrics = _Metrics()
+    metrics.add('up', 'gauge', 'Whether the last fetch from the modem succeeded.',
+                [({}, response is not None)])
+    metrics.add('fetch_duration_seconds', 'gauge', 'Time taken by the last fetch from the modem.',
+                [({}, duration)])
+    if response is None:
+        return '\n'.join(metrics.lines) + '\n'
+    top = cast('dict[str, dict[str, str]]', response['GetMultipleHNAPsResponse'])
+    with contextlib.suppress(KeyError, ValueError):
+        metrics.add('uptime_seconds', 'gauge', 'Time since the modem started.', [
+            ({}, parse_uptime(top['GetMotoStatusConnectionInfoResponse']['MotoConnSystemUpTime']))
+        ])
+    if (software := top.get('GetMotoStatusSoftwareResponse')) is not None:
+        metrics.add('software_info', 'gauge', 'Software and hardware versions.', [({
+            'version': software.get('StatusSoftwareSfVer', ''),
+            'hardware_version': software.get('StatusSoftwareHdVer', ''),
+            'spec_version': software.get('StatusSoftwareSpecVer', '')
+        }, 1)])
+    down = list(
+        parse_downstream_channels(
+            top.get('GetMotoStatusDownstreamChannelInfoResponse', {}).get(
+                'MotoConnDownstreamChannel', '')))
+    down_labels = [{'channel_id': str(c.channel_id), 'modulation': c.modulation} for c in down]
+    metrics.add('downstream_locked', 'gauge', 'Whether the downstream channel is locked.',
+                zip(down_labels, (c.lock_status == 'Locked' for c in down), strict=True))
+    metrics.add('downstream_frequency_mhz', 'gauge', 'Downstream channel frequency.',
+                zip(down_labels, (c.frequency for c in down), strict=True))
+    metrics.add('downstream_power_dbmv', 'gauge', 'Downstream channel power.',
+                zip(down_labels, (c.power for c in down), strict=True))
+    metrics.add('downstream_snr_db', 'gauge', 'Downstream channel signal to noise ratio.',
+                zip(down_labels, (c.snr for c in down), strict=True))
+    metrics.add('downstream_corrected_total', 'counter', 'Corrected codewords.',
+                zip(down_labels, (c.corrected for c in down), strict=True))
+    metrics.add('downstream_uncorrected_total', 'counter', 'Uncorrectable codewords.',
+                zip(down_labels, (c.uncorrected for c in down), strict=True))
+    up = list(
+        parse_upstream_channels(
+            top.get('GetMotoStatusUpstreamChannelInfoResponse', {}).get(
+                'MotoConnUpstreamChannel', '')))
+    up_labels = [{'channel_id': str(c.channel_id), 'channel_type': c.channel_type} for c in up]
+    metrics.add('upstream_locked', 'gauge', 'Whether the upstream channel is locked.',
+                zip(up_labels, (c.lock_status == 'Locked' for c in up), strict=True))
+    metrics.add('upstream_frequency_mhz', 'gauge', 'Upstream channel frequency.',
+                zip(up_labels, (c.frequency for c in up), strict=True))
+    metrics.add('upstream_power_dbmv', 'gauge', 'Upstream channel power.',
+                zip(up_labels, (c.power for c in up), strict=True))
+    metrics.add('upstream_symbol_rate_ksyms', 'gauge', 'Upstream channel symbol rate.',
+                zip(up_labels, (c.symbol_rate for c in up), strict=True))
+    return '\n'.join(metrics.lines) + '\n'
+
+
+class Exporter:
+    """
+    Fetch metrics from the modem at most once per ``min_interval`` seconds.
+
+    The session is kept between refreshes. The client logs in on the first refresh and again when
+    the modem answers ``'UN-AUTH'``. Concurrent calls to :py:meth:`metrics` wait for the fetch in
+    progress and share its result, so the modem sees at most one request per interval no matter how
+    many scrapers there are. Failures, including responses that cannot be parsed, are cached for
+    the same interval.
+
+    Only ``'UN-AUTH'`` or a failed login makes the exporter log in again. Other failures keep the
+    session. After a failed or locked login, the client's circuit breaker stops logging in to the
+    modem until its cool-down ends so scrapes do not extend the lock.
+
+    Parameters
+    ----------
+    client : Client
+        Client. It does not need to be logged in. If it has no circuit breaker, a
+        :py:class:`~mb8611.breaker.CircuitBreaker` with the default cool-down is set.
+    min_interval : float
+        Minimum number of seconds between requests to the modem.
+    """
+    def __init__(self, client: Client, *, min_interval: float = 10) -> None:
+        if client.breaker is None:
+            client.breaker = CircuitBreaker()
+        self.client = client
+        self.min_interval = min_interval
+        self._lock = threading.Lock()
+        self._logged_in = False
+        self._text: str | None = None
+        self._updated = 0.0
+
+    def _login(self) -> None:
+        self.client.private_key = 'withoutloginkey'
+        self.client.login()
+        self._logged_in = True
+
+    def _fetch(self) -> GetMultipleHNAPsResponse:
+        if not self._logged_in:
+            self._login()
+        response = self.client.call_multiple_hnaps(EXPORTER_ACTIONS, check=False)
+        top = cast('dict[str, Any]', response['GetMultipleHNAPsResponse'])
+        if top.get('GetMultipleHNAPsResult') == 'UN-AUTH':
+            logger.debug('Session expired.')
+            self._login()
+            response = self.client.call_multiple_hnaps(EXPORTER_ACTIONS, check=False)
+        if response['GetMultipleHNAPsResponse'].get('GetMultipleHNAPsResult') != 'OK':
+            raise CallHNAPError(response)
+        return response
+
+    def metrics(self) -> str:
+        """Return the metrics text, fetching from the modem if the cached copy is too old."""
+        with self._lock:
+            if self._text is not None and time.monotonic() - self._updated < self.min_interval:
+                return self._text
+            start = time.monotonic()
+            try:
+                response = self._fetch()
+                # Malformed tables raise ValueError.
+                text = render_metrics(response, time.monotonic() - start)
+            except CircuitOpenError as e:
+                logger.debug('%s', e)
+                text = render_metrics(None, time.monotonic() - start)
+            except (LockedError, LoginFailed):
+                logger.exception('Failed to log in to %s.', self.client.host)
+                self._logged_in = False
+                text = render_metrics(None, time.monotonic() - start)
+            except (CallHNAPError, KeyError, RequestException, ValueError):
+                logger.exception('Failed to fetch metrics from %s.', self.client.host)
+                text = render_metrics(None, time.monotonic() - start)
+            self._updated = time.monotonic()
+            self._text = text
+            return text
+
+    def close(self) -> None:
+        """Log out if logged in."""
+        with self._lock:
+            if self._logged_in:
+                self._logged_in = False
+                with contextlib.suppress(RequestException):
+                    self.client.session.get(f'https://{self.client.host}/Logout.html', verify=False)
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    server: 'ExporterServer'
+
+    def do_GET(self) -> None:
+        if self.path.split('?', 1)[0] != '/metrics':
+            self.send_error(404)
+            return
+        body = self.server.exporter.metrics().encode()
+        self.send_response(200)
+        self.send_header('Content-Type', CONTENT_TYPE)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, fmt: str, *args: Any) -> None:
+        logger.debug('%s - %s', self.address_string(), fmt % args)
+
+
+class ExporterServer(ThreadingHTTPServer):
+    """HTTP server that serves ``/metrics`` from an :py:class:`Exporter`."""
+    daemon_threads = True
+
+    def __init__(self, address: tuple[str, int], exporter: Exporter) -> None:
+        self.exporter = exporter
+        super().__init__(address, _MetricsHandler)
+
+
+@click.command()
+@click.option('-H', '--host', help='Host to connect to.', default='192.168.100.1')
+@click.option('-d', '--debug', is_flag=True, help='Enable debug level logging.')
+@click.option('-i',
+              '--min-interval',
+              type=click.FloatRange(min=0),
+              default=10,
+              help='Minimum number of seconds between requests to the modem.')
+@click.option('-l', '--listen-address', default='', help='Address to listen on.')
+@click.option('-P',
+              '--port',
+              type=click.IntRange(0, 65535),
+              default=9611,
+              help='Port to listen on.')
+@click.option('-p', '--password', default='', help='Administrator password.')
+@click.option('-u', '--username', default='admin', help='Administrator username.')
+def main(host: str,
+         listen_address: str,
+         port: int,
+         min_interval: float = 10,
+         password: str = '',
+         username: str = 'admin',
+         *,
+         debug: bool = False) -> None:
+    """Serve metrics of a MB8611 series modem for Prometheus at /metrics."""
+    warnings.filterwarnings(action='ignore', category=InsecureRequestWarning)
+    logging.basicConfig(level=logging.DEBUG if debug else logging.ERROR)
+    exporter = Exporter(Client(password, host, username), min_interval=min_interval)
+    with ExporterServer((listen_address, port), exporter) as server:
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            exporter.close()
@@ -0,0 +1,94 @@
+"""Poll many modems concurrently."""
+from collections.abc import Callable, Collection, Iterable, Iterator
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import NamedTuple
+import logging
+
+from .api import GetMultipleHNAPsResponse, MultipleHNAPAction
+from .breaker import CircuitBreaker
+from .client import Client
+
+__all__ = ('PollResult', 'poll')
+
+logger = logging.getLogger(__name__)
+
+ClientFactory = Callable[[str], Client]
+"""Callable that returns a new (not logged in) client for a host."""
+
+
+class PollResult(NamedTuple):
+    """Result of polling a single host."""
+    host: str
+    """Host that was polled."""
+    response: GetMultipleHNAPsResponse | None
+    """Response if successful."""
+    error: Exception | None
+    """Exception raised while logging in or calling the actions, if any."""
+
+
+def _poll_host(host: str, actions: Collection[MultipleHNAPAction], client_factory: ClientFactory, *,
+               check: bool) -> PollResult:
+    response = None
+    try:
+        with client_factory(host) as client:
+            response = client.call_multiple_hnaps(actions, check=check)
+    except Exception as e:
+        # A malformed response from one host can raise anything. It must not end poll() for the
+        # other hosts.
+        if response is not None:
+            logger.debug('Logging out of %s failed.', host, exc_info=True)
+        else:
+            logger.debug('Polling %s failed.', host, exc_info=True)
+            return PollResult(host, None, e)
+    return PollResult(host, response, None)
+
+
+def poll(hosts: Iterable[str],
+         actions: Collection[MultipleHNAPAction],
+         password: str = '',
+         username: str = 'admin',
+         *,
+         check: bool = True,
+         client_factory: ClientFactory | None = None,
+         max_workers: int = 8,
+         breaker: CircuitBreaker | None = None) -> Iterator[PollResult]:
+    """
+    Log in to every host, call ``actions`` with ``GetMultipleHNAPs`` and yield results.
+
+    Results are yielded in order of completion. Each host gets its own :py:class:`Client` (and
+    therefore its own session and private key). Errors, including malformed responses, are captured
+    in :py:attr:`PollResult.error` and do not stop the other hosts from being polled. A failure to
+    log out after a successful call is logged and does not replace the response.
+
+    Parameters
+    ----------
+    hosts : Iterable[str]
+        Hosts to poll.
+    actions : Collection[MultipleHNAPAction]
+        Actions to call on every host.
+    password : str
+        Administrator password. Ignored if ``client_factory`` is passed.
+    username : str
+        Administrator username. Ignored if ``client_factory`` is passed.
+    check : bool
+        Treat a result other than ``'OK'`` as an error.
+    client_factory : ClientFactory | None
+        Callable returning a client for a host. Use this for per-host credentials or options.
+    max_workers : int
+        Maximum number of hosts polled at the same time.
+    breaker : CircuitBreaker | None
+        Circuit breaker shared by the clients. Hosts with an open circuit fail fast with
+        :py:class:`~mb8611.breaker.CircuitOpenError`. Ignored if ``client_factory`` is passed.
+
+    Yields
+    ------
+    PollResult
+        Result for each host.
+    """
+    factory = client_factory or (lambda host: Client(password, host, username, breaker=breaker))
+    with ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='mb8611-poll') as executor:
+        futures = [
+            executor.submit(_poll_host, host, actions, factory, check=check) for host in hosts
+        ]
+        for future in as_completed(futures):
+            yield future.result()
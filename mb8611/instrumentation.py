@@ -0,0 +1,42 @@
+"""Per-call timings and sizes reported by :py:class:`~mb8611.client.Client`."""
+from __future__ import annotations
+
+from collections.abc import Callable
+from typing import NamedTuple
+
+__all__ = ('CallMetrics', 'MetricsCallback')
+
+
+class CallMetrics(NamedTuple):
+    """
+    Timings and sizes of a single HNAP request.
+
+    All durations are in seconds. ``requests`` does not expose when the request has been written,
+    so the time spent sending is part of :py:attr:`time_to_first_byte`.
+    """
+    action: str
+    """Action called."""
+    sign: float
+    """Time spent creating the ``HNAP_AUTH`` header."""
+    prepare: float
+    """Time spent encoding the payload and preparing the request (cookies, headers)."""
+    time_to_first_byte: float
+    """Time from sending the request until the response headers were parsed."""
+    read: float
+    """Time spent reading the response body."""
+    decode: float
+    """Time spent decoding JSON. ``0`` if the response was not decoded."""
+    total: float
+    """Time spent in the call."""
+    request_size: int
+    """Size of the request body in bytes."""
+    response_size: int
+    """Size of the response body in bytes."""
+    status_code: int
+    """HTTP status code."""
+    result: str | None
+    """Value of ``<action>Result`` in the response, if present."""
+
+
+MetricsCallback = Callable[[CallMetrics], None]
+"""Callable that receives the metrics of each request."""
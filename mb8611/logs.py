@@ -0,0 +1,146 @@
+"""Follow the event log (``MotoStatusLogList``) and only return new entries."""
+from __future__ import annotations
+
+from typing import TYPE_CHECKING, TypedDict, cast
+import hashlib
+import logging
+
+from .constants import ROW_DELIMITERS
+from .utils import JSONFileStore, get_cache_dir, iter_table_rows
+
+if TYPE_CHECKING:
+    from collections.abc import Sequence
+    from pathlib import Path
+
+    from .client import Client
+
+__all__ = ('LogFollower', 'LogWatermark', 'WatermarkStore', 'new_log_rows')
+
+logger = logging.getLogger(__name__)
+
+TAIL_SIZE = 16
+"""Number of row hashes kept in a watermark."""
+MIN_PARTIAL_MATCH = 2
+"""Minimum number of rows that must match when the oldest rows have been dropped."""
+
+
+class LogWatermark(TypedDict):
+    """Position in the event log up to which rows have been seen."""
+    tail: list[str]
+    """Hashes of the last seen rows, oldest first."""
+    count: int
+    """Number of rows in the log when it was last seen."""
+
+
+class WatermarkStore:
+    """Store a :py:class:`LogWatermark` per host in a JSON file."""
+    def __init__(self, path: Path | str | None = None) -> None:
+        self._store: JSONFileStore[LogWatermark] = JSONFileStore(
+            path if path is not None else get_cache_dir() / 'log-watermarks.json')
+        self.path = self._store.path
+
+    def get(self, host: str) -> LogWatermark | None:
+        """Get the watermark for a host."""
+        return self._store.get(host)
+
+    def set(self, host: str, watermark: LogWatermark) -> None:
+        """Set the watermark for a host."""
+        self._store.set(host, watermark)
+
+
+def _hash_row(row: Sequence[str]) -> str:
+    return hashlib.sha256('^'.join(row).encode()).hexdigest()[:16]
+
+
+def new_log_rows(
+        rows: Sequence[Sequence[str]],
+        watermark: LogWatermark | None) -> tuple[Sequence[Sequence[str]], LogWatermark | None]:
+    """
+    Return the rows after ``watermark`` and the watermark for the last row.
+
+    ``rows`` must be oldest first. The watermark is found by matching the hashes of the last seen
+    rows. The position of the last seen row is tried first so that identical repeated rows are not
+    confused. If the watermark cannot be found, the log was cleared or replaced (for example after a
+    restart) and every row is returned.
+
+    Returns
+    -------
+    tuple[Sequence[Sequence[str]], LogWatermark | None]
+        New rows and the updated watermark. The watermark is unchanged if ``rows`` is empty.
+    """
+    if not rows:
+        return rows, watermark
+    hashes = [_hash_row(row) for row in rows]
+    new_watermark: LogWatermark = {'count': len(rows), 'tail': hashes[-TAIL_SIZE:]}
+    if watermark is None or not watermark['tail']:
+        return rows, new_watermark
+    tail = watermark['tail']
+    size = len(tail)
+    count = watermark.get('count', 0)
+    if size <= count <= len(hashes) and hashes[count - size:count] == tail:
+        return rows[count:], new_watermark
+    for end in range(len(hashes), 0, -1):
+        if end >= size:
+            found = hashes[end - size:end] == tail
+        else:
+            # The oldest rows may have been dropped from the start of the log.
+            found = end >= MIN_PARTIAL_MATCH and hashes[:end] == tail[-end:]
+        if found:
+            return rows[end:], new_watermark
+    logger.debug('Watermark not found. The log was probably cleared.')
+    return rows, new_watermark
+
+
+class LogFollower:
+    """
+    Poll ``GetMotoStatusLog`` and only return rows not seen before.
+
+    Parameters
+    ----------
+    client : Client
+        Logged in client.
+    store : WatermarkStore | None
+        If passed, the watermark is loaded from and saved to this store so following can resume in
+        another process. It is saved by :py:meth:`save` and at the start of the next
+        :py:meth:`poll`, so rows that were fetched but not handled are returned again after a
+        restart.
+    newest_first : bool
+        Set if the modem lists the newest entry first.
+    """
+    def __init__(self,
+                 client: Client,
+                 store: WatermarkStore | None = None,
+                 *,
+                 newest_first: bool = False) -> None:
+        self.client = client
+        self.store = store
+        self.newest_first = newest_first
+        self.watermark = store.get(client.host) if store is not None else None
+        self._unsaved = False
+
+    def save(self) -> None:
+        """Save the watermark of the rows returned so far. Call after handling them."""
+        if self.store is not None and self._unsaved and self.watermark is not None:
+            self.store.set(self.client.host, self.watermark)
+        self._unsaved = False
+
+    def poll(self) -> Sequence[Sequence[str]]:
+        """
+        Fetch the log and return new rows, oldest first.
+
+        The rows returned by the previous call are taken as handled and the watermark is saved
+        first.
+        """
+        self.save()
+        response = self.client.call_multiple_hnaps(['GetMotoStatusLog'])
+        section = cast('dict[str, str]', response['GetMultipleHNAPsResponse'].get(
+            'GetMotoStatusLogResponse', {}))
+        rows = [
+            row for row in iter_table_rows(section.get('MotoStatusLogList', ''),
+                                           ROW_DELIMITERS['MotoStatusLogList']) if row != ['']
+        ]
+        if self.newest_first:
+            rows.reverse()
+        new_rows, self.watermark = new_log_rows(rows, self.watermark)
+        self._unsaved = True
+        return new_rows
@@ -1,17 +1,29 @@
 """Main command."""
-from typing import Any, Final, Literal, cast
+from __future__ import annotations
+
+from typing import TYPE_CHECKING, Any, Final, Literal, cast
+import contextlib
 import json
 import logging
+import time
 import warnings
 
-from urllib3.exceptions import InsecureRequestWarning
 import click
 
-from .api import Action
-from .api.settings import RebootPayload, SetStatusLogSettingsPayload
 from .client import CallHNAPError, Client, LoginFailed
-from .constants import ROW_DELIMITERS, TABLE_KEYS
-from .utils import parse_table_str
+from .constants import MUST_BE_CALLED_FROM_MULTIPLE, ROW_DELIMITERS, TABLE_KEYS
+from .logs import LogFollower, WatermarkStore
+from .session_cache import SessionCache
+from .utils import iter_table_rows, parse_table_str
+
+if TYPE_CHECKING:
+    from collections.abc import Sequence
+
+    from .api import Action, GetMultipleHNAPsResponse, MultipleHNAPAction
+    from .api.settings import RebootPayload, SetStatusLogSettingsPayload
+    from .delta import DeltaTracker
+
+logger = logging.getLogger(__name__)
 
 ActionAlias = Literal['addr', 'address', 'clear-log', 'conn', 'connection', 'connection-info',
                       'conninfo', 'down', 'downstream', 'lag', 'lag-status', 'log', 'reboot',
@@ -53,60 +65,303 @@ ACTION_PAYLOAD_MAPPING: Final[dict[ActionAlias, SetStatusLogSettingsPayload | Re
 }
 
 
+def _login_again(client: Client) -> None:
+    logger.debug('Session of %s expired.', client.host)
+    client.private_key = 'withoutloginkey'
+    client.login()
+
+
+def _call_actions(client: Client,
+                  aliases: Sequence[ActionAlias],
+                  *,
+                  check: bool,
+                  relogin: bool = False) -> dict[ActionAlias, dict[str, Any]]:
+    """
+    Call the actions for ``aliases`` and return each response section keyed by alias.
+
+    Actions that must be called with ``GetMultipleHNAPs`` are sent in a single request. With
+    ``relogin``, a request answered with ``'UN-AUTH'`` is sent again after logging in.
+    """
+    multiple = list(
+        dict.fromkeys(
+            cast('MultipleHNAPAction', ACTION_ALIAS_MAPPING[alias]) for alias in aliases
+            if ACTION_ALIAS_MAPPING[alias] in MUST_BE_CALLED_FROM_MULTIPLE))
+    sections: dict[ActionAlias, dict[str, Any]] = {}
+    if multiple:
+        top = cast('dict[str, Any]',
+                   client.call_multiple_hnaps(multiple, check=check)['GetMultipleHNAPsResponse'])
+        if relogin and top.get('GetMultipleHNAPsResult') == 'UN-AUTH':
+            _login_again(client)
+            top = cast(
+                'dict[str, Any]',
+                client.call_multiple_hnaps(multiple, check=check)['GetMultipleHNAPsResponse'])
+        for alias in aliases:
+            if (key := f'{ACTION_ALIAS_MAPPING[alias]}Response') in top:
+                sections[alias] = top[key]
+    for alias in aliases:
+        action = ACTION_ALIAS_MAPPING[alias]
+        if action not in MUST_BE_CALLED_FROM_MULTIPLE:
+            response = cast(
+                'dict[str, Any]',
+                client.call_hnap(action, ACTION_PAYLOAD_MAPPING.get(alias), check=check))
+            if relogin and response[f'{action}Response'].get(f'{action}Result') == 'UN-AUTH':
+                _login_again(client)
+                response = cast(
+                    'dict[str, Any]',
+                    client.call_hnap(action, ACTION_PAYLOAD_MAPPING.get(alias), check=check))
+            sections[alias] = response[f'{action}Response']
+    return sections
+
+
+def _parse_tables(section: dict[str, Any]) -> dict[str, Any]:
+    return {
+        k:
+            list(parse_table_str(value, row_delimiter=ROW_DELIMITERS.get(k, '|+|')))
+            if k in TABLE_KEYS else value
+        for k, value in section.items()
+    }
+
+
+def _echo_section(section: dict[str, Any], result_key: str, indent: str = '') -> None:
+    for k, value in sorted(_parse_tables(section).items()):
+        if k == result_key:
+            continue
+        if k not in TABLE_KEYS:
+            click.echo(f'{indent}{k}: {value}')
+        else:
+            click.echo(f'{indent}{value}')
+
+
+def _echo_ndjson(alias: ActionAlias, section: dict[str, Any]) -> None:
+    for k, value in section.items():
+        if k in TABLE_KEYS:
+            for row in iter_table_rows(value, ROW_DELIMITERS.get(k, '|+|')):
+                click.echo(json.dumps({'action': alias, 'key': k, 'row': row}))
+        else:
+            click.echo(json.dumps({'action': alias, 'key': k, 'value': value}))
+
+
+def _watch_sample(client: Client, aliases: Sequence[ActionAlias], tracker: DeltaTracker | None,
+                  timestamp: float) -> dict[str, Any]:
+    sample: dict[str, Any] = {'timestamp': timestamp, 'host': client.host}
+    start = time.monotonic()
+    sections = _call_actions(client, aliases, check=False, relogin=True)
+    sample['latency'] = time.monotonic() - start
+    if tracker is None:
+        sample['responses'] = {
+            alias: _parse_tables(sections[alias])
+            for alias in aliases if alias in sections
+        }
+        return sample
+    top = {
+        f'{ACTION_ALIAS_MAPPING[alias]}Response': sections[alias]
+        for alias in aliases if alias in sections
+    }
+    delta = tracker.update_response(
+        client.host, cast('GetMultipleHNAPsResponse', {'GetMultipleHNAPsResponse': top}), timestamp)
+    return delta.to_dict() if delta else {}
+
+
+def _watch(client: Client,
+           aliases: Sequence[ActionAlias],
+           interval: float,
+           *,
+           changes: bool = False) -> None:
+    """
+    Poll ``aliases`` every ``interval`` seconds and write one JSON line per sample.
+
+    With ``changes``, only samples with changes are written and they only contain the changes.
+
+    Failed requests and responses that cannot be decoded or parsed are written as a sample with an
+    ``error`` key and polling continues. When the session expires, the client logs in again. If a
+    sample takes longer than ``interval``, the missed samples are skipped.
+    """
+    from requests import RequestException  # noqa: PLC0415
+
+    tracker = None
+    if changes:
+        from .delta import DeltaTracker  # noqa: PLC0415
+
+        tracker = DeltaTracker()
+    next_time = time.monotonic()
+    while True:
+        timestamp = time.time()
+        try:
+            sample = _watch_sample(client, aliases, tracker, timestamp)
+        except RequestException as e:
+            sample = {'timestamp': timestamp, 'host': client.host, 'error': str(e)}
+        except ValueError as e:
+            logger.warning('Invalid response from %s: %s', client.host, e)
+            sample = {'timestamp': timestamp, 'host': client.host, 'error': str(e)}
+        if sample:
+            click.echo(json.dumps(sample))
+        # Skip missed samples instead of sending a burst of requests to catch up.
+        now = time.monotonic()
+        next_time = max(next_time + interval, now)
+        time.sleep(next_time - now)
+
+
+def _follow(client: Client,
+            interval: float,
+            *,
+            newest_first: bool = False,
+            output_json: bool) -> None:
+    """Write new log rows every ``interval`` seconds."""
+    from requests import RequestException  # noqa: PLC0415
+
+    follower = LogFollower(client, WatermarkStore(), newest_first=newest_first)
+    while True:
+        try:
+            rows = follower.poll()
+        except (CallHNAPError, RequestException, ValueError) as e:
+            click.echo(str(e), err=True)
+        else:
+            for row in rows:
+                click.echo(json.dumps(row) if output_json else '\t'.join(row))
+            follower.save()
+        time.sleep(interval)
+
+
 @click.command()
-@click.argument('action', type=click.Choice(list(ACTION_ALIAS_MAPPING.keys())))
+@click.argument('actions',
+                nargs=-1,
+                required=True,
+                type=click.Choice(list(ACTION_ALIAS_MAPPING.keys())))
 @click.option('-H', '--host', help='Host to connect to.', default='192.168.100.1')
+@click.option('-c',
+              '--changes',
+              is_flag=True,
+              help=('With --watch, only write samples with changes and only the changed fields, '
+                    'channel columns and codeword error rates.'))
 @click.option('-d', '--debug', is_flag=True, help='Enable debug level logging.')
+@click.option('-f',
+              '--follow',
+              is_flag=True,
+              help=('With the log action, keep polling and only output new entries. Entries '
+                    'already output in an earlier run are skipped. The interval is set with '
+                    '--watch (default: 10 seconds).'))
 @click.option('-j',
               '--json',
               'output_json',
               is_flag=True,
               help='Only output JSON. Encoded lists (tables) will still be parsed.')
+@click.option('-n',
+              '--ndjson',
+              is_flag=True,
+              help=('Output one line of JSON per field and table row, written as rows are parsed. '
+                    'Use this for very long logs.'))
+@click.option('--newest-first',
+              is_flag=True,
+              help='With --follow, set if the modem lists the newest log entry first.')
 @click.option('-p', '--password', default='', help='Administrator password.')
 @click.option('-u', '--username', default='admin', help='Administrator username.')
-def main(action: ActionAlias,
+@click.option('-w',
+              '--watch',
+              type=click.FloatRange(min=0, min_open=True),
+              metavar='INTERVAL',
+              help=('Poll the actions every INTERVAL seconds over one session and write one JSON '
+                    'line per sample.'))
+@click.option('--no-logout', is_flag=True, help='Do not log out when finished.')
+@click.option('-S',
+              '--session-cache',
+              is_flag=True,
+              help='Reuse the login session across invocations. Implies --no-logout.')
+@click.option('--pin-certificate',
+              is_flag=True,
+              help=("Trust the modem's certificate the first time it is seen and refuse to connect "
+                    'if it changes. TLS sessions are resumed.'))
+def main(actions: tuple[ActionAlias, ...],
          host: str,
          password: str = '',
          username: str = 'admin',
          *,
+         changes: bool = False,
          debug: bool = False,
-         output_json: bool = False) -> None:
-    """Manage a MB8611 series modem."""
-    # Unfortunately, we have to ignore certificate warnings as there is no way to install a good
-    # certificate on the device.
-    warnings.filterwarnings(action='ignore', category=InsecureRequestWarning)
+         follow: bool = False,
+         ndjson: bool = False,
+         newest_first: bool = False,
+         no_logout: bool = False,
+         output_json: bool = False,
+         pin_certificate: bool = False,
+         session_cache: bool = False,
+         watch: float | None = None) -> None:
+    """
+    Manage a MB8611 series modem.
+
+    More than one ACTION may be passed. Actions that are read with GetMultipleHNAPs are fetched in
+    a single request and the output is keyed by action.
+    """
+    if not pin_certificate:
+        from urllib3.exceptions import InsecureRequestWarning  # noqa: PLC0415
+
+        # Unfortunately, we have to ignore certificate warnings as there is no way to install a
+        # good certificate on the device. Pinned connections are verified and do not warn.
+        warnings.filterwarnings(action='ignore', category=InsecureRequestWarning)
     logging.basicConfig(level=logging.DEBUG if debug else logging.ERROR)
+    if watch is not None and any(ACTION_ALIAS_MAPPING[alias] not in MUST_BE_CALLED_FROM_MULTIPLE
+                                 for alias in actions):
+        msg = 'Only read-only actions can be watched.'
+        raise click.UsageError(msg)
+    if changes and watch is None:
+        msg = '--changes can only be used with --watch.'
+        raise click.UsageError(msg)
+    if newest_first and not follow:
+        msg = '--newest-first can only be used with --follow.'
+        raise click.UsageError(msg)
+    if follow and {ACTION_ALIAS_MAPPING[alias] for alias in actions} != {'GetMotoStatusLog'}:
+        msg = '--follow can only be used with the log action.'
+        raise click.UsageError(msg)
+    adapter = None
+    if pin_certificate:
+        from .tls import pinned_adapter  # noqa: PLC0415
+
+        try:
+            adapter = pinned_adapter(host)
+        except OSError as e:
+            msg = f'Failed to get the certificate of {host}: {e}'
+            raise click.ClickException(msg) from e
     try:
-        with Client(password, host, username) as client:
+        with Client(password,
+                    host,
+                    username,
+                    session_cache=SessionCache() if session_cache else None,
+                    logout=not (no_logout or session_cache),
+                    adapter=adapter) as client:
+            if follow:
+                with contextlib.suppress(KeyboardInterrupt):
+                    _follow(client,
+                            watch or 10,
+                            newest_first=newest_first,
+                            output_json=output_json or ndjson)
+                return
+            if watch is not None:
+                with contextlib.suppress(KeyboardInterrupt):
+                    _watch(client, actions, watch, changes=changes)
+                return
             try:
-                response = client.call_hnap(ACTION_ALIAS_MAPPING[action],
-                                            ACTION_PAYLOAD_MAPPING.get(action),
-                                            check=not output_json)
+                sections = _call_actions(client, actions, check=not (output_json or ndjson))
             except CallHNAPError as e:
                 click.echo(str(e), err=True)
                 raise click.Abort from e
-            top_key = f'{ACTION_ALIAS_MAPPING[action]}Response'
-            result_key = f'{ACTION_ALIAS_MAPPING[action]}Result'
-            res_d = cast('dict[str, Any]', response)
-            if not output_json:
-                assert res_d[top_key][result_key] == 'OK'
-            assert top_key in response
-            if not output_json:
-                for k, value in sorted(res_d[top_key].items()):
-                    if k == result_key:
-                        continue
-                    if k not in TABLE_KEYS:
-                        click.echo(f'{k}: {value}')
-                    else:
-                        click.echo(
-                            list(parse_table_str(value, row_delimiter=ROW_DELIMITERS.get(k,
-                                                                                         '|+|'))))
+            for alias in actions:
+                assert alias in sections
+                if not (output_json or ndjson):
+                    assert sections[alias][f'{ACTION_ALIAS_MAPPING[alias]}Result'] == 'OK'
+            if ndjson:
+                for alias in actions:
+                    _echo_ndjson(alias, sections[alias])
+            elif output_json:
+                click.echo(
+                    json.dumps(_parse_tables(sections[actions[0]]) if len(actions) == 1 else
+                               {alias: _parse_tables(sections[alias])
+                                for alias in actions},
+                               indent=2))
+            elif len(actions) == 1:
+                _echo_section(sections[actions[0]], f'{ACTION_ALIAS_MAPPING[actions[0]]}Result')
             else:
-                for k, value in res_d[top_key].items():
-                    if k in TABLE_KEYS:
-                        res_d[top_key][k] = list(
-                            parse_table_str(value, row_delimiter=ROW_DELIMITERS.get(k, '|+|')))
-                click.echo(json.dumps(res_d[top_key], indent=2))
+                for alias in actions:
+                    click.echo(f'{alias}:')
+                    _echo_section(sections[alias], f'{ACTION_ALIAS_MAPPING[alias]}Result', '  ')
     except LoginFailed as e:
         click.echo('Login failed.', err=True)
         raise click.Abort from e
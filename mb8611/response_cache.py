@@ -0,0 +1,93 @@
+"""In-memory cache of ``GetMultipleHNAPs`` response sections."""
+from __future__ import annotations
+
+from collections import OrderedDict
+from typing import TYPE_CHECKING, Any, Final
+import copy
+import threading
+import time
+
+from .constants import MUST_BE_CALLED_FROM_MULTIPLE
+
+if TYPE_CHECKING:
+    from collections.abc import Collection, Mapping
+
+    from .api import MultipleHNAPAction
+
+__all__ = ('DEFAULT_TTLS', 'INVALIDATED_BY', 'ResponseCache')
+
+DEFAULT_TTLS: Final[Mapping[MultipleHNAPAction, float]] = {
+    'GetHomeAddress': 300,
+    'GetMotoStatusSoftware': 3600,
+    'GetMotoStatusStartupSequence': 3600,
+}
+"""Default time to live in seconds of actions that rarely change."""
+INVALIDATED_BY: Final[Mapping[str, Collection[MultipleHNAPAction]]] = {
+    'SetMotoLagStatus': {'GetMotoLagStatus'},
+    'SetStatusLogSettings': {'GetMotoStatusLog'},
+    # Rebooting changes everything.
+    'SetStatusSecuritySettings': MUST_BE_CALLED_FROM_MULTIPLE,
+}
+"""Cached actions to drop after calling a setting action."""
+
+
+class ResponseCache:
+    """
+    Cache response sections per host and action with a time to live.
+
+    Only actions in ``ttls`` are cached. When full, the least recently used entry is evicted. The
+    cache can be shared by clients of different hosts. Sections are copied when stored and when
+    returned so callers cannot change cached entries.
+
+    Parameters
+    ----------
+    ttls : Mapping[MultipleHNAPAction, float] | None
+        Seconds to keep each action's section. Defaults to :py:data:`DEFAULT_TTLS`.
+    max_size : int
+        Maximum number of entries.
+    """
+    def __init__(self,
+                 ttls: Mapping[MultipleHNAPAction, float] | None = None,
+                 *,
+                 max_size: int = 32) -> None:
+        self.ttls = dict(DEFAULT_TTLS if ttls is None else ttls)
+        self.max_size = max_size
+        # Keyed by host and action.
+        self._entries: OrderedDict[tuple[str, str], tuple[float, Any]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, host: str, action: MultipleHNAPAction) -> Any | None:
+        """Get a copy of the ``<action>Response`` section of ``host`` if cached and not expired."""
+        key = (host, action)
+        with self._lock:
+            if (entry := self._entries.get(key)) is None:
+                return None
+            if entry[0] <= time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            section = entry[1]
+        return copy.deepcopy(section)
+
+    def set(self, host: str, action: MultipleHNAPAction, section: Any) -> None:
+        """Store a copy of the ``<action>Response`` section of ``host`` if ``action`` has a TTL."""
+        if (ttl := self.ttls.get(action)) is None:
+            return
+        key = (host, action)
+        section = copy.deepcopy(section)
+        with self._lock:
+            self._entries[key] = (time.monotonic() + ttl, section)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, host: str, actions: Collection[MultipleHNAPAction]) -> None:
+        """Remove entries of ``host``."""
+        with self._lock:
+            for action in actions:
+                self._entries.pop((host, action), None)
+
+    def clear(self) -> None:
+        """Remove all entries."""
+        with self._lock:
+            self._entries.clear()
@@ -0,0 +1,216 @@
+"""
+Poll each action at its own adaptive interval.
+
+Most sections of the modem rarely change. :py:class:`Scheduler` keeps an interval per action that
+grows while the action's section stays the same and drops back to the minimum when it changes.
+Actions that are due at the same time are packed into one ``GetMultipleHNAPs`` request.
+"""
+from __future__ import annotations
+
+from typing import TYPE_CHECKING, Any, Final, NamedTuple, cast
+import logging
+import time
+
+if TYPE_CHECKING:
+    from collections.abc import Callable, Collection, Iterator, Mapping
+
+    from .api import GetMultipleHNAPsResponse, MultipleHNAPAction
+    from .client import Client
+
+__all__ = ('DEFAULT_CADENCE', 'DEFAULT_CADENCES', 'Cadence', 'Scheduler', 'Tick')
+
+logger = logging.getLogger(__name__)
+
+
+class Cadence(NamedTuple):
+    """Polling interval limits of an action."""
+    min_interval: float
+    """Seconds between polls right after the section changed."""
+    max_interval: float
+    """Largest number of seconds between polls while the section does not change."""
+    ignore: frozenset[str] = frozenset()
+    """Keys of the section that are not compared, for example counters that always increase."""
+
+
+DEFAULT_CADENCE: Final[Cadence] = Cadence(60, 900)
+"""Cadence of actions not in :py:data:`DEFAULT_CADENCES`."""
+DEFAULT_CADENCES: Final[Mapping[MultipleHNAPAction, Cadence]] = {
+    'GetHomeAddress': Cadence(300, 3600),
+    'GetMotoStatusConnectionInfo': Cadence(60, 900, frozenset({'MotoConnSystemUpTime'})),
+    'GetMotoStatusDownstreamChannelInfo': Cadence(30, 300),
+    'GetMotoStatusLog': Cadence(10, 600),
+    'GetMotoStatusSoftware': Cadence(3600, 86400),
+    'GetMotoStatusStartupSequence': Cadence(3600, 86400),
+    'GetMotoStatusUpstreamChannelInfo': Cadence(30, 300),
+}
+"""Default cadences. Channel tables and the log start often, software information rarely."""
+
+
+class Tick(NamedTuple):
+    """Result of one request made by :py:class:`Scheduler`."""
+    ts: float
+    """Time of the request."""
+    actions: tuple[MultipleHNAPAction, ...]
+    """Actions that were called."""
+    changed: tuple[MultipleHNAPAction, ...]
+    """Actions whose section changed since it was last fetched, including the first fetch."""
+    response: GetMultipleHNAPsResponse
+    """Response of ``GetMultipleHNAPs``."""
+
+
+class _ActionState:
+    def __init__(self, cadence: Cadence, due: float) -> None:
+        self.cadence = cadence
+        self.interval = cadence.min_interval
+        self.due = due
+        self.section: dict[str, Any] | None = None
+
+
+def _comparable(section: Mapping[str, Any], cadence: Cadence) -> dict[str, Any]:
+    return {k: v for k, v in section.items() if k not in cadence.ignore}
+
+
+class Scheduler:
+    """
+    Call each action at its own interval, adapting it to how often its section changes.
+
+    Every action starts at its minimum interval. Each time its section is fetched unchanged, the
+    interval is multiplied by ``growth`` up to the maximum. When the section changes, the interval
+    goes back to the minimum so the following changes (for example new log entries) are seen
+    quickly. If the request fails or the section's result is not ``'OK'``, the action is retried
+    after its minimum interval. If the session expired (``'UN-AUTH'``), the client logs in again and
+    the request is sent once more.
+
+    The due actions and the actions due within the next ``window`` seconds are sent in one
+    ``GetMultipleHNAPs`` request so that actions with similar intervals share requests.
+
+    The client must be logged in. Not thread-safe.
+
+    Parameters
+    ----------
+    client : Client
+        Logged in client.
+    actions : Collection[MultipleHNAPAction]
+        Actions to poll.
+    cadences : Mapping[MultipleHNAPAction, Cadence] | None
+        Cadence of each action. Defaults to :py:data:`DEFAULT_CADENCES`. Actions without a cadence
+        use :py:data:`DEFAULT_CADENCE`.
+    growth : float
+        Factor applied to the interval of an action after an unchanged fetch.
+    window : float
+        Seconds ahead of time an action may be called to share a request with due actions.
+    clock : Callable[[], float]
+        Monotonic clock.
+    sleep : Callable[[float], object]
+        Function used by :py:meth:`run` to wait.
+    """
+    def __init__(self,
+                 client: Client,
+                 actions: Collection[MultipleHNAPAction],
+                 *,
+                 cadences: Mapping[MultipleHNAPAction, Cadence] | None = None,
+                 growth: float = 2,
+                 window: float = 1,
+                 clock: Callable[[], float] = time.monotonic,
+                 sleep: Callable[[float], object] = time.sleep) -> None:
+        cadences = DEFAULT_CADENCES if cadences is None else cadences
+        self.client = client
+        self.growth = growth
+        self.window = window
+        self.clock = clock
+        self.sleep = sleep
+        now = clock()
+        self._states = {
+            action: _ActionState(cadences.get(action, DEFAULT_CADENCE), now)
+            for action in dict.fromkeys(actions)
+        }
+
+    @property
+    def intervals(self) -> Mapping[MultipleHNAPAction, float]:
+        """Current interval of each action in seconds."""
+        return {action: state.interval for action, state in self._states.items()}
+
+    def next_due(self) -> float:
+        """Return the clock time at which the next action is due."""
+        return min((state.due for state in self._states.values()), default=float('inf'))
+
+    def due(self) -> tuple[MultipleHNAPAction, ...]:
+        """Return the actions that would be called by :py:meth:`tick` now."""
+        if (now := self.clock()) < self.next_due():
+            return ()
+        return tuple(
+            action for action, state in self._states.items() if state.due <= now + self.window)
+
+    def _retry_later(self, actions: Collection[MultipleHNAPAction], now: float) -> None:
+        for action in actions:
+            state = self._states[action]
+            state.due = now + state.cadence.min_interval
+
+    def _update(self, action: MultipleHNAPAction, section: Any, now: float) -> bool:
+        state = self._states[action]
+        if not isinstance(section, dict) or section.get(f'{action}Result') != 'OK':
+            logger.debug('No result for %s.', action)
+            state.due = now + state.cadence.min_interval
+            return False
+        comparable = _comparable(section, state.cadence)
+        if changed := comparable != state.section:
+            state.interval = state.cadence.min_interval
+        else:
+            state.interval = min(state.interval * self.growth, state.cadence.max_interval)
+        state.section = comparable
+        state.due = now + state.interval
+        return changed
+
+    def _call(self, actions: Collection[MultipleHNAPAction]) -> GetMultipleHNAPsResponse:
+        response = self.client.call_multiple_hnaps(actions, check=False)
+        if response['GetMultipleHNAPsResponse'].get('GetMultipleHNAPsResult') == 'UN-AUTH':
+            logger.debug('Session of %s expired.', self.client.host)
+            self.client.private_key = 'withoutloginkey'
+            self.client.login()
+            response = self.client.call_multiple_hnaps(actions, check=False)
+        return response
+
+    def tick(self) -> Tick | None:
+        """
+        Call the due actions in one request.
+
+        Returns
+        -------
+        Tick | None
+            The result, or ``None`` if no action is due.
+
+        Raises
+        ------
+        requests.RequestException
+            If the request fails. The actions are retried after their minimum interval.
+        mb8611.client.LockedError
+            If logging in again fails because the modem is locked.
+        mb8611.client.LoginFailed
+            If logging in again fails.
+        """
+        if not (actions := self.due()):
+            return None
+        now = self.clock()
+        ts = time.time()
+        try:
+            response = self._call(actions)
+        except Exception:
+            self._retry_later(actions, now)
+            raise
+        top = cast('dict[str, Any]', response['GetMultipleHNAPsResponse'])
+        if top.get('GetMultipleHNAPsResult') != 'OK':
+            logger.debug('GetMultipleHNAPs result was %s.', top.get('GetMultipleHNAPsResult'))
+            self._retry_later(actions, now)
+            return Tick(ts, actions, (), response)
+        changed = tuple(
+            action for action in actions if self._update(action, top.get(f'{action}Response'), now))
+        logger.debug('Called %s. Changed: %s.', ', '.join(actions), ', '.join(changed) or 'none')
+        return Tick(ts, actions, changed, response)
+
+    def run(self) -> Iterator[Tick]:
+        """Wait for due actions, call them and yield the results forever."""
+        while True:
+            if (delay := self.next_due() - self.clock()) > 0:
+                self.sleep(delay)
+            if (result := self.tick()) is not None:
+                yield result
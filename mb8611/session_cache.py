@@ -0,0 +1,54 @@
+"""On-disk store for authenticated sessions."""
+from __future__ import annotations
+
+from typing import TYPE_CHECKING, TypedDict
+import sys
+
+from .utils import JSONFileStore, get_cache_dir
+
+if sys.version_info >= (3, 11):
+    from typing import NotRequired
+else:
+    from typing_extensions import NotRequired
+
+if TYPE_CHECKING:
+    from pathlib import Path
+
+__all__ = ('CachedSession', 'SessionCache')
+
+
+class CachedSession(TypedDict):
+    """Data required to resume a session without logging in."""
+    private_key: str
+    """Private key derived at login. Also the value of the ``PrivateKey`` cookie."""
+    uid: NotRequired[str]
+    """Value of the ``uid`` cookie."""
+
+
+class SessionCache:
+    """
+    Store sessions in a JSON file keyed by username and host.
+
+    The file and its parent directory are only readable by the current user. Anyone who can read
+    the file can use the sessions in it.
+    """
+    def __init__(self, path: Path | str | None = None) -> None:
+        self._store: JSONFileStore[CachedSession] = JSONFileStore(
+            path if path is not None else get_cache_dir() / 'sessions.json')
+        self.path = self._store.path
+
+    @staticmethod
+    def _key(host: str, username: str) -> str:
+        return f'{username}@{host}'
+
+    def get(self, host: str, username: str) -> CachedSession | None:
+        """Get the stored session for a host and username."""
+        return self._store.get(self._key(host, username))
+
+    def set(self, host: str, username: str, session: CachedSession) -> None:
+        """Store a session."""
+        self._store.set(self._key(host, username), session)
+
+    def delete(self, host: str, username: str) -> None:
+        """Remove a stored session if present."""
+        self._store.delete(self._key(host, username))
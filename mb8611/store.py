@@ -0,0 +1,289 @@
+"""Time-series store for channel metrics backed by SQLite."""
+from collections.abc import Iterable, Mapping
+from pathlib import Path
+from types import TracebackType
+from typing import Any, Final, Literal, NamedTuple, cast
+import itertools
+import logging
+import math
+import sqlite3
+import threading
+import time
+
+from .api import GetMultipleHNAPsResponse
+from .channels import (
+    DownstreamChannel,
+    UpstreamChannel,
+    parse_downstream_channels,
+    parse_upstream_channels,
+)
+
+__all__ = ('DEFAULT_RETENTION', 'ChannelStore', 'Direction', 'Point', 'Resolution')
+
+logger = logging.getLogger(__name__)
+
+Direction = Literal['down', 'up']
+"""Channel direction."""
+Resolution = Literal[0, 60, 3600]
+"""Resolution in seconds. ``0`` is raw samples."""
+DEFAULT_RETENTION: Final[Mapping[Resolution, float]] = {
+    0: 7 * 86400,
+    60: 90 * 86400,
+    3600: 730 * 86400
+}
+"""Default number of seconds data is kept for, keyed by resolution."""
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS samples (
+    host TEXT NOT NULL,
+    direction TEXT NOT NULL,
+    channel_id INTEGER NOT NULL,
+    ts REAL NOT NULL,
+    locked INTEGER NOT NULL,
+    frequency REAL NOT NULL,
+    power REAL NOT NULL,
+    snr REAL,
+    corrected INTEGER,
+    uncorrected INTEGER
+);
+CREATE INDEX IF NOT EXISTS samples_host_channel_ts ON samples (host, direction, channel_id, ts);
+CREATE INDEX IF NOT EXISTS samples_ts ON samples (ts);
+CREATE TABLE IF NOT EXISTS rollups (
+    resolution INTEGER NOT NULL,
+    host TEXT NOT NULL,
+    direction TEXT NOT NULL,
+    channel_id INTEGER NOT NULL,
+    ts REAL NOT NULL,
+    count INTEGER NOT NULL,
+    locked_count INTEGER NOT NULL,
+    power_min REAL,
+    power_avg REAL,
+    power_max REAL,
+    snr_min REAL,
+    snr_avg REAL,
+    snr_max REAL,
+    corrected INTEGER,
+    uncorrected INTEGER,
+    PRIMARY KEY (resolution, host, direction, channel_id, ts)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS rollup_state (
+    resolution INTEGER PRIMARY KEY,
+    done_until REAL NOT NULL
+);
+"""
+_INSERT_SAMPLE = 'INSERT INTO samples VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)'
+# Minute buckets are computed from samples, hour buckets from minute buckets so they can be computed
+# after samples have expired. The counters of a bucket are the last values in it, not the maximum,
+# because they reset when the modem restarts. Every row of a bucket has the same last value.
+_ROLLUP_FROM_SAMPLES = """
+INSERT OR REPLACE INTO rollups
+SELECT :resolution, host, direction, channel_id, bucket * :resolution,
+       COUNT(*), SUM(locked), MIN(power), AVG(power), MAX(power), MIN(snr), AVG(snr), MAX(snr),
+       MAX(last_corrected), MAX(last_uncorrected)
+FROM (SELECT *, LAST_VALUE(corrected) OVER bucket_rows AS last_corrected,
+             LAST_VALUE(uncorrected) OVER bucket_rows AS last_uncorrected
+      FROM (SELECT *, CAST(ts / :resolution AS INTEGER) AS bucket FROM samples
+            WHERE ts >= :start AND ts < :end)
+      WINDOW bucket_rows AS (PARTITION BY host, direction, channel_id, bucket ORDER BY ts
+                             ROWS BETWEEN UNBOUNDED PRECEDING AND UNBOUNDED FOLLOWING))
+GROUP BY host, direction, channel_id, bucket
+"""
+_ROLLUP_FROM_ROLLUPS = """
+INSERT OR REPLACE INTO rollups
+SELECT :resolution, host, direction, channel_id, bucket * :resolution,
+       SUM(count), SUM(locked_count), MIN(power_min), SUM(power_avg * count) / SUM(count),
+       MAX(power_max), MIN(snr_min), SUM(snr_avg * count) / SUM(count), MAX(snr_max),
+       MAX(last_corrected), MAX(last_uncorrected)
+FROM (SELECT *, LAST_VALUE(corrected) OVER bucket_rows AS last_corrected,
+             LAST_VALUE(uncorrected) OVER bucket_rows AS last_uncorrected
+      FROM (SELECT *, CAST(ts / :resolution AS INTEGER) AS bucket FROM rollups
+            WHERE resolution = :source AND ts >= :start AND ts < :end)
+      WINDOW bucket_rows AS (PARTITION BY host, direction, channel_id, bucket ORDER BY ts
+                             ROWS BETWEEN UNBOUNDED PRECEDING AND UNBOUNDED FOLLOWING))
+GROUP BY host, direction, channel_id, bucket
+"""
+
+
+class Point(NamedTuple):
+    """A sample or an aggregate of samples."""
+    ts: float
+    """Time of the sample, or start of the bucket."""
+    samples: int
+    """Number of samples. Always ``1`` for raw samples."""
+    locked: float
+    """Fraction of samples where the channel was locked."""
+    power: float
+    """Power in dBmV (average for buckets)."""
+    snr: float | None
+    """Signal to noise ratio in dB (average for buckets). ``None`` for upstream channels."""
+    corrected: int | None
+    """Corrected codewords counter (last value for buckets)."""
+    uncorrected: int | None
+    """Uncorrectable codewords counter (last value for buckets)."""
+
+
+class ChannelStore:
+    """
+    Store channel snapshots in a single SQLite file.
+
+    Samples are buffered and written in batches. :py:meth:`rollup` computes one minute and one hour
+    aggregates and removes data older than the retention limits. Call it periodically or use
+    :py:meth:`start_rollups` to run it in a background thread. Samples that arrive after their
+    bucket has been rolled up are not added to the aggregate.
+
+    Parameters
+    ----------
+    path : Path | str
+        Database file. ``':memory:'`` creates a temporary database.
+    batch_size : int
+        Number of rows to buffer before writing.
+    retention : Mapping[Resolution, float] | None
+        Seconds to keep data for each resolution. Missing keys use :py:data:`DEFAULT_RETENTION`.
+    """
+    def __init__(self,
+                 path: Path | str,
+                 *,
+                 batch_size: int = 1000,
+                 retention: Mapping[Resolution, float] | None = None) -> None:
+        self.batch_size = batch_size
+        self.retention: dict[Resolution, float] = {**DEFAULT_RETENTION, **(retention or {})}
+        self._buffer: list[tuple[Any, ...]] = []
+        self._lock = threading.RLock()
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        if str(path) != ':memory:':
+            self._conn.execute('PRAGMA journal_mode=WAL')
+        self._conn.execute('PRAGMA synchronous=NORMAL')
+        self._conn.executescript(_SCHEMA)
+
+    def add(
+        self,
+        host: str,
+        ts: float,
+        downstream: Iterable[DownstreamChannel] = (),
+        upstream: Iterable[UpstreamChannel] = ()
+    ) -> None:
+        """Add a snapshot of the channel tables."""
+        rows: list[tuple[Any, ...]] = [(host, 'down', c.channel_id, ts, c.lock_status == 'Locked',
+                                        c.frequency, c.power, c.snr, c.corrected, c.uncorrected)
+                                       for c in downstream]
+        rows.extend((host, 'up', c.channel_id, ts, c.lock_status == 'Locked', c.frequency, c.power,
+                     None, None, None) for c in upstream)
+        with self._lock:
+            self._buffer.extend(rows)
+            if len(self._buffer) >= self.batch_size:
+                self.flush()
+
+    def add_response(self, host: str, ts: float, response: GetMultipleHNAPsResponse) -> None:
+        """Add the channel tables of a ``GetMultipleHNAPs`` response."""
+        top = cast('dict[str, dict[str, str]]', response['GetMultipleHNAPsResponse'])
+        self.add(
+            host, ts,
+            parse_downstream_channels(
+                top.get('GetMotoStatusDownstreamChannelInfoResponse', {}).get(
+                    'MotoConnDownstreamChannel', '')),
+            parse_upstream_channels(
+                top.get('GetMotoStatusUpstreamChannelInfoResponse', {}).get(
+                    'MotoConnUpstreamChannel', '')))
+
+    def flush(self) -> None:
+        """Write buffered samples."""
+        with self._lock:
+            if not self._buffer:
+                return
+            with self._transaction():
+                self._conn.executemany(_INSERT_SAMPLE, self._buffer)
+            self._buffer.clear()
+
+    def _transaction(self) -> sqlite3.Connection:
+        self._conn.execute('BEGIN')
+        return self._conn
+
+    def rollup(self, now: float | None = None) -> None:
+        """Compute aggregates for complete buckets and remove expired data."""
+        now = time.time() if now is None else now
+        with self._lock:
+            self.flush()
+            with self._transaction() as conn:
+                state = dict(conn.execute('SELECT resolution, done_until FROM rollup_state'))
+                for resolution, query, source in ((60, _ROLLUP_FROM_SAMPLES, 0),
+                                                  (3600, _ROLLUP_FROM_ROLLUPS, 60)):
+                    end = math.floor(now / resolution) * resolution
+                    if source:
+                        # Only use complete minute buckets.
+                        end = min(end, state.get(60, end))
+                    start = state.get(resolution, 0)
+                    if end > start:
+                        conn.execute(query, {
+                            'resolution': resolution,
+                            'source': source,
+                            'start': start,
+                            'end': end
+                        })
+                        conn.execute('INSERT OR REPLACE INTO rollup_state VALUES (?, ?)',
+                                     (resolution, end))
+                        state[resolution] = end
+                conn.execute('DELETE FROM samples WHERE ts < ?', (now - self.retention[0],))
+                conn.execute(
+                    'DELETE FROM rollups WHERE (resolution = 60 AND ts < ?) OR '
+                    '(resolution = 3600 AND ts < ?)',
+                    (now - self.retention[60], now - self.retention[3600]))
+
+    def query(self,
+              host: str,
+              channel_id: int,
+              start: float,
+              end: float,
+              *,
+              direction: Direction = 'down',
+              resolution: Resolution = 0) -> list[Point]:
+        """Get samples or aggregates of a channel with ``start <= ts < end``, oldest first."""
+        with self._lock:
+            self.flush()
+            if resolution == 0:
+                cursor = self._conn.execute(
+                    'SELECT ts, 1, locked, power, snr, corrected, uncorrected FROM samples '
+                    'WHERE host = ? AND direction = ? AND channel_id = ? AND ts >= ? AND ts < ? '
+                    'ORDER BY ts', (host, direction, channel_id, start, end))
+            else:
+                cursor = self._conn.execute(
+                    'SELECT ts, count, CAST(locked_count AS REAL) / count, power_avg, snr_avg, '
+                    'corrected, uncorrected FROM rollups WHERE resolution = ? AND host = ? AND '
+                    'direction = ? AND channel_id = ? AND ts >= ? AND ts < ? ORDER BY ts',
+                    (resolution, host, direction, channel_id, start, end))
+            return list(itertools.starmap(Point, cursor))
+
+    def start_rollups(self, interval: float = 60) -> None:
+        """Run :py:meth:`rollup` every ``interval`` seconds in a background thread."""
+        if self._thread is not None:
+            return
+        self._stop.clear()
+
+        def run() -> None:
+            while not self._stop.wait(interval):
+                try:
+                    self.rollup()
+                except sqlite3.Error:
+                    logger.exception('Rollup failed.')
+
+        self._thread = threading.Thread(target=run, name='mb8611-rollup', daemon=True)
+        self._thread.start()
+
+    def close(self) -> None:
+        """Stop background rollups, write buffered samples and close the database."""
+        if self._thread is not None:
+            self._stop.set()
+            self._thread.join()
+            self._thread = None
+        self.flush()
+        self._conn.close()
+
+    def __enter__(self) -> 'ChannelStore':
+        """Return the store."""
+        return self
+
+    def __exit__(self, exc_cls: type[BaseException] | None, base_exc: BaseException | None,
+                 traceback: TracebackType | None) -> None:
+        """Close the store."""
+        self.close()
@@ -0,0 +1,251 @@
+"""
+Typed ``GetMultipleHNAPs`` responses decoded with msgspec.
+
+Requires the ``json-msgspec`` extra. Unlike :py:mod:`mb8611.api`, these are real classes that are
+validated while decoding: every section's ``*Result`` field must be ``'OK'``, so a response that
+decodes successfully does not need to be checked.
+"""
+from __future__ import annotations
+
+from typing import Literal
+
+import msgspec
+
+__all__ = ('XXX', 'ConnectionInfo', 'DownstreamChannelInfo', 'HomeAddress', 'HomeConnection',
+           'LagStatus', 'MultipleHNAPs', 'MultipleHNAPsResponse', 'SecAccount', 'Software',
+           'StartupSequence', 'StatusLog', 'UpstreamChannelInfo', 'decoder')
+
+
+class HomeAddress(msgspec.Struct,
+                  frozen=True,
+                  rename={
+                      'result': 'GetHomeAddressResult',
+                      'ip_address': 'MotoHomeIpAddress',
+                      'ipv6_address': 'MotoHomeIpv6Address',
+                      'mac_address': 'MotoHomeMacAddress',
+                      'software_version': 'MotoHomeSfVer'
+                  }):
+    """Section of ``GetHomeAddress``."""
+    result: Literal['OK']
+    ip_address: str
+    """IPv4 address."""
+    ipv6_address: str
+    """IPv6 address."""
+    mac_address: str
+    """MAC address."""
+    software_version: str
+    """Firmware version."""
+
+
+class HomeConnection(msgspec.Struct,
+                     frozen=True,
+                     rename={
+                         'result': 'GetHomeConnectionResult',
+                         'online': 'MotoHomeOnline',
+                         'downstream_channels': 'MotoHomeDownNum',
+                         'upstream_channels': 'MotoHomeUpNum'
+                     }):
+    """Section of ``GetHomeConnection``."""
+    result: Literal['OK']
+    online: str
+    """``'Connected'``."""
+    downstream_channels: str
+    """Downstream number of channels connected."""
+    upstream_channels: str
+    """Upstream number of channels connected."""
+
+
+class LagStatus(msgspec.Struct,
+                frozen=True,
+                rename={
+                    'result': 'GetMotoLagStatusResult',
+                    'current_status': 'MotoLagCurrentStatus'
+                }):
+    """Section of ``GetMotoLagStatus``."""
+    result: Literal['OK']
+    current_status: str
+
+
+class ConnectionInfo(msgspec.Struct,
+                     frozen=True,
+                     rename={
+                         'result': 'GetMotoStatusConnectionInfoResult',
+                         'network_access': 'MotoConnNetworkAccess',
+                         'system_uptime': 'MotoConnSystemUpTime'
+                     }):
+    """Section of ``GetMotoStatusConnectionInfo``."""
+    result: Literal['OK']
+    network_access: str
+    system_uptime: str
+    """Use :py:func:`mb8611.utils.parse_uptime` to convert to seconds."""
+
+
+class DownstreamChannelInfo(msgspec.Struct,
+                            frozen=True,
+                            rename={
+                                'result': 'GetMotoStatusDownstreamChannelInfoResult',
+                                'channels': 'MotoConnDownstreamChannel'
+                            }):
+    """Section of ``GetMotoStatusDownstreamChannelInfo``."""
+    result: Literal['OK']
+    channels: str
+    """Table. Parse with :py:func:`mb8611.channels.parse_downstream_channels`."""
+
+
+class UpstreamChannelInfo(msgspec.Struct,
+                          frozen=True,
+                          rename={
+                              'result': 'GetMotoStatusUpstreamChannelInfoResult',
+                              'channels': 'MotoConnUpstreamChannel'
+                          }):
+    """Section of ``GetMotoStatusUpstreamChannelInfo``."""
+    result: Literal['OK']
+    channels: str
+    """Table. Parse with :py:func:`mb8611.channels.parse_upstream_channels`."""
+
+
+class StatusLog(msgspec.Struct,
+                frozen=True,
+                rename={
+                    'result': 'GetMotoStatusLogResult',
+                    'log_list': 'MotoStatusLogList'
+                }):
+    """Section of ``GetMotoStatusLog``."""
+    result: Literal['OK']
+    log_list: str
+    """Table with ``}-{`` as the row delimiter."""
+
+
+class Software(msgspec.Struct,
+               frozen=True,
+               rename={
+                   'result': 'GetMotoStatusSoftwareResult',
+                   'certificate': 'StatusSoftwareCertificate',
+                   'customer_version': 'StatusSoftwareCustomerVer',
+                   'hardware_version': 'StatusSoftwareHdVer',
+                   'mac': 'StatusSoftwareMac',
+                   'serial_number': 'StatusSoftwareSerialNum',
+                   'software_version': 'StatusSoftwareSfVer',
+                   'spec_version': 'StatusSoftwareSpecVer'
+               }):
+    """Section of ``GetMotoStatusSoftware``."""
+    result: Literal['OK']
+    certificate: str
+    customer_version: str
+    hardware_version: str
+    mac: str
+    serial_number: str
+    software_version: str
+    spec_version: str
+
+
+class StartupSequence(msgspec.Struct,
+                      frozen=True,
+                      rename={
+                          'result': 'GetMotoStatusStartupSequenceResult',
+                          'boot_comment': 'MotoConnBootComment',
+                          'boot_status': 'MotoConnBootStatus',
+                          'configuration_file_comment': 'MotoConnConfigurationFileComment',
+                          'configuration_file_status': 'MotoConnConfigurationFileStatus',
+                          'connectivity_comment': 'MotoConnConnectivityComment',
+                          'connectivity_status': 'MotoConnConnectivityStatus',
+                          'downstream_comment': 'MotoConnDSComment',
+                          'downstream_frequency': 'MotoConnDSFreq',
+                          'security_comment': 'MotoConnSecurityComment',
+                          'security_status': 'MotoConnSecurityStatus'
+                      }):
+    """Section of ``GetMotoStatusStartupSequence``."""
+    result: Literal['OK']
+    boot_comment: str
+    boot_status: str
+    configuration_file_comment: str
+    configuration_file_status: str
+    connectivity_comment: str
+    connectivity_status: str
+    downstream_comment: str
+    downstream_frequency: str
+    security_comment: str
+    security_status: str
+
+
+class SecAccount(msgspec.Struct,
+                 frozen=True,
+                 rename={
+                     'result': 'GetMotoStatusSecAccountResult',
+                     'current_login': 'CurrentLogin',
+                     'current_name_admin': 'CurrentNameAdmin',
+                     'current_name_user': 'CurrentNameUser',
+                     'current_password_admin': 'CurrentPwAdmin',
+                     'current_password_user': 'CurrentPwUser'
+                 }):
+    """
+    Section of ``GetMotoStatusSecAccount``.
+
+    All values other than ``result`` are AES-128 encrypted. The key is the ``PrivateKey`` assigned
+    at login.
+    """
+    result: Literal['OK']
+    current_login: str
+    current_name_admin: str
+    current_name_user: str
+    current_password_admin: str
+    current_password_user: str
+
+
+class XXX(msgspec.Struct, frozen=True, rename={'xxx': 'XXX'}):
+    """Section of the ``*XXX`` actions. Unknown."""
+    xxx: str
+
+
+class MultipleHNAPs(msgspec.Struct,
+                    frozen=True,
+                    rename={
+                        'result': 'GetMultipleHNAPsResult',
+                        'home_address': 'GetHomeAddressResponse',
+                        'home_connection': 'GetHomeConnectionResponse',
+                        'lag_status': 'GetMotoLagStatusResponse',
+                        'connection_info': 'GetMotoStatusConnectionInfoResponse',
+                        'downstream': 'GetMotoStatusDownstreamChannelInfoResponse',
+                        'log': 'GetMotoStatusLogResponse',
+                        'sec_account': 'GetMotoStatusSecAccountResponse',
+                        'software': 'GetMotoStatusSoftwareResponse',
+                        'startup_sequence': 'GetMotoStatusStartupSequenceResponse',
+                        'upstream': 'GetMotoStatusUpstreamChannelInfoResponse',
+                        'log_xxx': 'GetMotoStatusLogXXXResponse',
+                        'sec_xxx': 'GetMotoStatusSecXXXResponse',
+                        'status_xxx': 'GetMotoStatusXXXResponse'
+                    }):
+    """
+    Content of ``GetMultipleHNAPsResponse``.
+
+    Sections of actions that were not requested are ``None``.
+    """
+    result: Literal['OK', 'UN-AUTH']
+    home_address: HomeAddress | None = None
+    home_connection: HomeConnection | None = None
+    lag_status: LagStatus | None = None
+    connection_info: ConnectionInfo | None = None
+    downstream: DownstreamChannelInfo | None = None
+    log: StatusLog | None = None
+    sec_account: SecAccount | None = None
+    software: Software | None = None
+    startup_sequence: StartupSequence | None = None
+    upstream: UpstreamChannelInfo | None = None
+    log_xxx: XXX | None = None
+    sec_xxx: XXX | None = None
+    status_xxx: XXX | None = None
+
+
+class MultipleHNAPsResponse(msgspec.Struct,
+                            frozen=True,
+                            rename={'response': 'GetMultipleHNAPsResponse'}):
+    """Response of ``GetMultipleHNAPs``."""
+    response: MultipleHNAPs
+
+
+decoder = msgspec.json.Decoder(MultipleHNAPsResponse)
+"""
+Decoder of :py:class:`MultipleHNAPsResponse`.
+
+Raises :py:class:`msgspec.ValidationError` if a section's result is not ``'OK'``.
+"""
@@ -0,0 +1 @@
+"""Helpers for testing code that uses this package."""
@@ -0,0 +1,451 @@
+"""
+HNAP server that behaves like a MB8611 for load and integration tests.
+
+It implements the login challenge, ``HNAP_AUTH`` validation, ``GetMultipleHNAPs`` with generated
+channel tables and event log, session expiry and the lockout after failed logins. Latency and the
+number of requests handled at the same time can be limited to resemble the modem's web server.
+"""
+from __future__ import annotations
+
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import TYPE_CHECKING, Any
+import contextlib
+import hmac
+import json
+import logging
+import random
+import secrets
+import ssl
+import threading
+import time
+
+import click
+
+from mb8611.constants import MUST_BE_CALLED_FROM_MULTIPLE
+from mb8611.utils import make_private_key
+
+if TYPE_CHECKING:
+    from collections.abc import Iterator, Mapping
+    from pathlib import Path
+
+__all__ = ('Emulator', 'EmulatorServer', 'running')
+
+logger = logging.getLogger(__name__)
+
+_HNAP_URI_PREFIX = 'http://purenetworks.com/HNAP1/'
+_LOG_MESSAGES = (
+    ('Critical (3)', 'No Ranging Response received - T3 time-out'),
+    ('Warning (5)', 'Dynamic Range Window violation'),
+    ('Notice (6)', 'Honoring MDD; IP provisioning mode = IPv6'),
+    ('Error (4)', ('DBC-REQ Mismatch Between Calculated Value for P1.6hi Compared to CCAP '
+                   'Provided Value')),
+    ('Critical (3)', 'Started Unicast Maintenance Ranging - No Response received - T3 time-out'),
+)
+_DOWNSTREAM_CHANNELS = (*(('QAM256', i, 435.0 + 6 * i)
+                          for i in range(1, 32)), ('OFDM PLC', 193, 957.0))
+"""Modulation, channel ID and frequency of each downstream channel."""
+_MAC_SUFFIX = ';CM-MAC=00:00:00:00:00:00;CMTS-MAC=00:00:00:00:00:00;CM-QOS=1.1;CM-VER=3.1;'
+
+
+def _sign(key: str, message: str) -> str:
+    return hmac.new(key.encode(), message.encode(), 'md5').hexdigest().upper()
+
+
+class Emulator:
+    """
+    Protocol state of an emulated modem, independent of HTTP.
+
+    Parameters
+    ----------
+    password : str
+        Administrator password.
+    username : str
+        Administrator username.
+    session_timeout : float
+        Seconds a session stays valid after its last request. Later requests are answered with
+        ``'UN-AUTH'``.
+    lockout_attempts : int
+        Number of failed logins after which every login fails until ``lockout_seconds`` pass.
+    lockout_seconds : float
+        Duration of the lockout.
+    latency : float
+        Seconds to wait before answering each request.
+    max_concurrency : int | None
+        Maximum number of requests handled at the same time. Other requests wait.
+    log_rows : int
+        Number of event log entries.
+    seed : int | None
+        Seed for the generated channel values.
+    """
+    def __init__(self,
+                 password: str = '',
+                 username: str = 'admin',
+                 *,
+                 session_timeout: float = 300,
+                 lockout_attempts: int = 3,
+                 lockout_seconds: float = 300,
+                 latency: float = 0,
+                 max_concurrency: int | None = 1,
+                 log_rows: int = 100,
+                 seed: int | None = None) -> None:
+        self.password = password
+        self.username = username
+        self.session_timeout = session_timeout
+        self.lockout_attempts = lockout_attempts
+        self.lockout_seconds = lockout_seconds
+        self.latency = latency
+        self.log_rows = log_rows
+        self.requests = 0
+        """Number of HNAP requests handled."""
+        self._random = random.Random(seed)  # noqa: S311
+        self._lock = threading.Lock()
+        self._semaphore = (threading.BoundedSemaphore(max_concurrency)
+                           if max_concurrency is not None else None)
+        self._challenges: dict[str, tuple[str, str]] = {}
+        self._sessions: dict[str, tuple[str, float]] = {}
+        self._failed_logins = 0
+        self._locked_until = 0.0
+        self._lag_status = '0'
+        self.reboot()
+
+    def reboot(self) -> None:
+        """Reset uptime, counters, the log and sessions."""
+        with self._lock:
+            self._started = time.time()
+            self._sessions.clear()
+            self._challenges.clear()
+            uniform = self._random.uniform
+            # Power, SNR and codeword errors per second of each channel.
+            self._downstream = [(*channel, uniform(-4, 8), uniform(36, 44), uniform(
+                0.5, 20), uniform(0, 0.2)) for channel in _DOWNSTREAM_CHANNELS]
+            self._upstream = [uniform(40, 48) for _ in range(5)]
+            self._log_cleared = False
+
+    @property
+    def uptime(self) -> float:
+        """Seconds since the last reboot."""
+        return time.time() - self._started
+
+    def handle(self, action: str, payload: Mapping[str, Any], hnap_auth: str,
+               cookies: Mapping[str, str]) -> dict[str, Any]:
+        """
+        Answer an HNAP request.
+
+        Parameters
+        ----------
+        action : str
+            Action from the ``SOAPACTION`` header.
+        payload : Mapping[str, Any]
+            Request body.
+        hnap_auth : str
+            Value of the ``HNAP_AUTH`` header.
+        cookies : Mapping[str, str]
+            Request cookies.
+
+        Returns
+        -------
+        dict[str, Any]
+            Response body.
+        """
+        if self._semaphore is not None:
+            self._semaphore.acquire()
+        try:
+            if self.latency:
+                time.sleep(self.latency)
+            with self._lock:
+                self.requests += 1
+                if action == 'Login':
+                    return self._login(payload.get('Login', {}), cookies)
+                if not self._is_authenticated(action, hnap_auth, cookies):
+                    return {f'{action}Response': {f'{action}Result': 'UN-AUTH'}}
+                return self._call(action, payload)
+        finally:
+            if self._semaphore is not None:
+                self._semaphore.release()
+
+    def logout(self, cookies: Mapping[str, str]) -> None:
+        """End the session of ``cookies``."""
+        with self._lock:
+            self._sessions.pop(cookies.get('uid', ''), None)
+
+    def _login(self, login: Mapping[str, str], cookies: Mapping[str, str]) -> dict[str, Any]:
+        now = time.time()
+        if now < self._locked_until:
+            return {'LoginResponse': {'LoginResult': 'FAILED'}}
+        if not login.get('LoginPassword'):
+            uid = secrets.token_hex(8)
+            challenge = secrets.token_hex(10).upper()
+            public_key = secrets.token_hex(10).upper()
+            self._challenges[uid] = (challenge, public_key)
+            return {
+                'LoginResponse': {
+                    'Challenge': challenge,
+                    'Cookie': uid,
+                    'LoginResult': 'OK',
+                    'PublicKey': public_key
+                }
+            }
+        uid = cookies.get('uid', '')
+        if (pending := self._challenges.pop(uid, None)) is not None:
+            challenge, public_key = pending
+            private_key = make_private_key(public_key, self.password, challenge)
+            if (login.get('Username') == self.username
+                    and hmac.compare_digest(login['LoginPassword'], _sign(private_key, challenge))):
+                self._failed_logins = 0
+                self._sessions[uid] = (private_key, now)
+                return {'LoginResponse': {'LoginResult': 'OK'}}
+        self._failed_logins += 1
+        if self._failed_logins >= self.lockout_attempts:
+            logger.debug('Locking out logins for %s seconds.', self.lockout_seconds)
+            self._failed_logins = 0
+            self._locked_until = now + self.lockout_seconds
+        return {'LoginResponse': {'LoginResult': 'FAILED'}}
+
+    def _is_authenticated(self, action: str, hnap_auth: str, cookies: Mapping[str, str]) -> bool:
+        uid = cookies.get('uid', '')
+        if (session := self._sessions.get(uid)) is None:
+            return False
+        private_key, last_used = session
+        now = time.time()
+        if now - last_used > self.session_timeout:
+            del self._sessions[uid]
+            return False
+        signature, _, timestamp = hnap_auth.partition(' ')
+        if not hmac.compare_digest(signature,
+                                   _sign(private_key, f'{timestamp}"{_HNAP_URI_PREFIX}{action}"')):
+            return False
+        self._sessions[uid] = (private_key, now)
+        return True
+
+    def _call(self, action: str, payload: Mapping[str, Any]) -> dict[str, Any]:
+        if action == 'GetMultipleHNAPs':
+            top: dict[str, Any] = {
+                f'{name}Response': self._section(name)
+                for name in payload.get('GetMultipleHNAPs', {})
+            }
+            top['GetMultipleHNAPsResult'] = 'OK'
+            return {'GetMultipleHNAPsResponse': top}
+        if action in MUST_BE_CALLED_FROM_MULTIPLE:
+            return {f'{action}Response': {f'{action}Result': 'ERROR'}}
+        if action == 'SetStatusLogSettings':
+            self._log_cleared = True
+        elif action == 'SetStatusSecuritySettings':
+            # Answer first, then reboot, like the modem.
+            threading.Timer(0, self.reboot).start()
+        elif action == 'SetMotoLagStatus':
+            self._lag_status = str(payload.get('SetMotoLagStatus', {}).get('MotoLagEnable', '0'))
+        return {f'{action}Response': {f'{action}Result': 'OK'}}
+
+    def _section(self, action: str) -> dict[str, Any]:
+        result = {f'{action}Result': 'OK'}
+        uptime = int(self.uptime)
+        if action == 'GetMotoStatusDownstreamChannelInfo':
+            rows = [
+                f'{i}^Locked^{modulation}^{channel_id}^{frequency:.1f}^{power:.1f}^{snr:.1f}^'
+                f'{int(corrected * uptime)}^{int(uncorrected * uptime)}^'
+                for i, (modulation, channel_id, frequency, power, snr, corrected,
+                        uncorrected) in enumerate(self._downstream, 1)
+            ]
+            result['MotoConnDownstreamChannel'] = '|+|'.join(rows)
+        elif action == 'GetMotoStatusUpstreamChannelInfo':
+            rows = [
+                f'{i}^Locked^SC-QAM^{i}^5120^{17.6 + 6.4 * (i - 1):.1f}^{power:.1f}^'
+                for i, power in enumerate(self._upstream[:4], 1)
+            ]
+            rows.append(f'5^Locked^OFDMA^41^0^39.8^{self._upstream[4]:.1f}^')
+            result['MotoConnUpstreamChannel'] = '|+|'.join(rows)
+        elif action == 'GetMotoStatusLog':
+            rows = []
+            if not self._log_cleared:
+                for i in range(self.log_rows):
+                    logged_at = time.gmtime(self._started - (self.log_rows - i) * 60)
+                    priority, message = _LOG_MESSAGES[i % len(_LOG_MESSAGES)]
+                    rows.append(f'{time.strftime("%H:%M:%S", logged_at)}^'
+                                f'{time.strftime("%a %b %d %Y", logged_at)}^{priority}^'
+                                f'{message}{_MAC_SUFFIX}')
+            result['MotoStatusLogList'] = '}-{'.join(rows)
+        elif action == 'GetMotoStatusConnectionInfo':
+            days, rest = divmod(uptime, 86400)
+            hours, rest = divmod(rest, 3600)
+            minutes, seconds = divmod(rest, 60)
+            result.update(
+                MotoConnNetworkAccess='Allowed',
+                MotoConnSystemUpTime=f'{days} days {hours:02d}h:{minutes:02d}m:{seconds:02d}s')
+        elif action == 'GetMotoStatusSoftware':
+            result.update(StatusSoftwareCertificate='Installed',
+                          StatusSoftwareCustomerVer='Prod_19.2_d31',
+                          StatusSoftwareHdVer='V1.0',
+                          StatusSoftwareMac='00:00:00:00:00:00',
+                          StatusSoftwareSerialNum='000000000000000',
+                          StatusSoftwareSfVer='8611-19.2.18',
+                          StatusSoftwareSpecVer='DOCSIS 3.1')
+        elif action == 'GetMotoStatusStartupSequence':
+            result.update(MotoConnBootComment='Operational',
+                          MotoConnBootStatus='OK',
+                          MotoConnConfigurationFileComment='',
+                          MotoConnConfigurationFileStatus='OK',
+                          MotoConnConnectivityComment='Operational',
+                          MotoConnConnectivityStatus='OK',
+                          MotoConnDSComment='Locked',
+                          MotoConnDSFreq='435000000 Hz',
+                          MotoConnSecurityComment='BPI+',
+                          MotoConnSecurityStatus='Enabled')
+        elif action == 'GetHomeAddress':
+            result.update(MotoHomeIpAddress='192.168.100.1',
+                          MotoHomeIpv6Address='',
+                          MotoHomeMacAddress='00:00:00:00:00:00',
+                          MotoHomeSfVer='8611-19.2.18')
+        elif action == 'GetHomeConnection':
+            result.update(MotoHomeDownNum='32', MotoHomeOnline='Connected', MotoHomeUpNum='5')
+        elif action == 'GetMotoLagStatus':
+            result['MotoLagCurrentStatus'] = self._lag_status
+        return result
+
+
+class _EmulatorHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    server: EmulatorServer
+
+    def _cookies(self) -> dict[str, str]:
+        # The client sends nameless ``=Secure`` cookies like a browser does, which
+        # ``http.cookies.SimpleCookie`` refuses to parse.
+        pairs = (x.strip().partition('=') for x in self.headers.get('Cookie', '').split(';'))
+        return {name: value for name, _, value in pairs if name}
+
+    def _send(self, status: int, body: bytes, content_type: str = 'application/json') -> None:
+        self.send_response(status)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_POST(self) -> None:
+        body = self.rfile.read(int(self.headers.get('Content-Length', 0)))
+        if self.path != '/HNAP1/':
+            self._send(404, b'')
+            return
+        try:
+            payload = json.loads(body or b'{}')
+        except ValueError:
+            self._send(400, b'')
+            return
+        action = self.headers.get('SOAPACTION', '').strip('"').removeprefix(_HNAP_URI_PREFIX)
+        response = self.server.emulator.handle(action, payload if isinstance(payload, dict) else {},
+                                               self.headers.get('HNAP_AUTH', ''), self._cookies())
+        self._send(200, json.dumps(response).encode())
+
+    def do_GET(self) -> None:
+        if self.path == '/Logout.html':
+            self.server.emulator.logout(self._cookies())
+            self._send(200, b'<html></html>', 'text/html')
+        else:
+            self._send(404, b'')
+
+    def log_message(self, fmt: str, *args: Any) -> None:
+        logger.debug('%s - %s', self.address_string(), fmt % args)
+
+
+class EmulatorServer(ThreadingHTTPServer):
+    """
+    HTTP or HTTPS server for an :py:class:`Emulator`.
+
+    Connections are kept alive between requests like the modem's web server.
+
+    Parameters
+    ----------
+    address : tuple[str, int]
+        Address to listen on. Use port ``0`` for any free port.
+    emulator : Emulator
+        Emulator answering requests.
+    certfile : Path | str | None
+        Certificate (PEM) for HTTPS. Without it the server uses plain HTTP.
+    keyfile : Path | str | None
+        Private key of ``certfile`` if not in the same file.
+    """
+    daemon_threads = True
+
+    def __init__(self,
+                 address: tuple[str, int],
+                 emulator: Emulator,
+                 *,
+                 certfile: Path | str | None = None,
+                 keyfile: Path | str | None = None) -> None:
+        self.emulator = emulator
+        super().__init__(address, _EmulatorHandler)
+        self.scheme = 'http'
+        if certfile is not None:
+            context = ssl.SSLContext(ssl.PROTOCOL_TLS_SERVER)
+            context.load_cert_chain(certfile, keyfile)
+            self.socket = context.wrap_socket(self.socket, server_side=True)
+            self.scheme = 'https'
+
+    @property
+    def host(self) -> str:
+        """``host:port`` to pass to :py:class:`mb8611.client.Client`."""
+        host, port = self.socket.getsockname()[:2]
+        return f'{host}:{port}'
+
+
+@contextlib.contextmanager
+def running(emulator: Emulator | None = None,
+            address: tuple[str, int] = ('127.0.0.1', 0),
+            *,
+            certfile: Path | str | None = None,
+            keyfile: Path | str | None = None) -> Iterator[EmulatorServer]:
+    """Run an :py:class:`EmulatorServer` in a background thread for the duration of the block."""
+    with EmulatorServer(address, emulator or Emulator(), certfile=certfile,
+                        keyfile=keyfile) as server:
+        thread = threading.Thread(target=server.serve_forever, name='mb8611-emulator', daemon=True)
+        thread.start()
+        try:
+            yield server
+        finally:
+            server.shutdown()
+            thread.join()
+
+
+@click.command()
+@click.option('-b', '--bind', default='127.0.0.1', help='Address to listen on.')
+@click.option('-P', '--port', type=click.IntRange(0, 65535), default=8443, help='Port.')
+@click.option('-p', '--password', default='password', help='Administrator password.')
+@click.option('-u', '--username', default='admin', help='Administrator username.')
+@click.option('--certfile',
+              type=click.Path(exists=True, dir_okay=False),
+              help='Certificate (PEM) for HTTPS.')
+@click.option('--keyfile', type=click.Path(exists=True, dir_okay=False), help='Private key.')
+@click.option('--latency', type=click.FloatRange(min=0), default=0, help='Delay per request.')
+@click.option('--max-concurrency',
+              type=click.IntRange(min=1),
+              default=1,
+              help='Requests handled at the same time.')
+@click.option('--session-timeout',
+              type=click.FloatRange(min=0),
+              default=300,
+              help='Idle seconds before a session expires.')
+@click.option('-d', '--debug', is_flag=True, help='Enable debug level logging.')
+def main(bind: str,
+         port: int,
+         password: str,
+         username: str,
+         certfile: str | None,
+         keyfile: str | None,
+         latency: float,
+         max_concurrency: int,
+         session_timeout: float,
+         *,
+         debug: bool = False) -> None:
+    """Run an emulated MB8611 HNAP server."""
+    logging.basicConfig(level=logging.DEBUG if debug else logging.INFO)
+    emulator = Emulator(password,
+                        username,
+                        session_timeout=session_timeout,
+                        latency=latency,
+                        max_concurrency=max_concurrency)
+    with EmulatorServer((bind, port), emulator, certfile=certfile, keyfile=keyfile) as server:
+        logger.info('Listening on %s://%s.', server.scheme, server.host)
+        with contextlib.suppress(KeyboardInterrupt):
+            server.serve_forever()
+
+
+if __name__ == '__main__':
+    main()
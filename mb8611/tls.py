@@ -0,0 +1,234 @@
+"""
+Certificate pinning, connection pooling and TLS session resumption.
+
+The modem's certificate is self-signed and cannot be replaced, so it cannot be verified against
+a certificate authority. Instead its SHA-256 fingerprint is stored the first time a host is seen
+(trust on first use) and every later connection must present the same certificate.
+"""
+from __future__ import annotations
+
+from typing import TYPE_CHECKING, Any
+from urllib.parse import urlsplit
+import hashlib
+import logging
+import socket
+import ssl
+import threading
+import weakref
+
+from requests.adapters import HTTPAdapter
+from urllib3.connection import HTTPConnection
+
+from .utils import JSONFileStore, get_cache_dir
+
+if TYPE_CHECKING:
+    from pathlib import Path
+
+__all__ = ('FingerprintStore', 'PinnedAdapter', 'ResumingSSLContext', 'get_fingerprint',
+           'pinned_adapter')
+
+logger = logging.getLogger(__name__)
+
+
+def get_fingerprint(host: str, timeout: float = 10) -> str:
+    """
+    Connect to ``host`` and return the SHA-256 fingerprint of its certificate.
+
+    Parameters
+    ----------
+    host : str
+        Host with an optional port. The default port is 443.
+    timeout : float
+        Connection timeout in seconds.
+
+    Returns
+    -------
+    str
+        Fingerprint as lowercase hexadecimal digits.
+    """
+    split = urlsplit(f'//{host}')
+    pem = ssl.get_server_certificate((split.hostname or host, split.port or 443), timeout=timeout)
+    return hashlib.sha256(ssl.PEM_cert_to_DER_cert(pem)).hexdigest()
+
+
+class FingerprintStore:
+    """
+    Store certificate fingerprints in a JSON file keyed by host.
+
+    The default path is ``fingerprints.json`` in the cache directory.
+    """
+    def __init__(self, path: Path | str | None = None) -> None:
+        self._store: JSONFileStore[str] = JSONFileStore(
+            path if path is not None else get_cache_dir() / 'fingerprints.json')
+        self.path = self._store.path
+
+    def get(self, host: str) -> str | None:
+        """Get the fingerprint of a host."""
+        return self._store.get(host)
+
+    def set(self, host: str, fingerprint: str) -> None:
+        """Store the fingerprint of a host."""
+        self._store.set(host, fingerprint)
+
+    def delete(self, host: str) -> None:
+        """Forget a host, for example after its certificate was regenerated."""
+        self._store.delete(host)
+
+
+class _ResumableSSLSocket(ssl.SSLSocket):
+    def close(self) -> None:
+        # With TLS 1.3 the session ticket arrives after the handshake, so save the session again.
+        if isinstance(self.context, ResumingSSLContext):
+            self.context.save_session(self)
+        super().close()
+
+
+class ResumingSSLContext(ssl.SSLContext):
+    """
+    Client context that resumes TLS sessions.
+
+    The last session of each peer address is kept and offered on the next connection, so a new
+    connection to the same modem skips the full handshake if the modem accepts it. Certificates
+    are not verified by the context; use :py:class:`PinnedAdapter` to check the fingerprint.
+
+    One instance can be shared by every client in a process. It is thread-safe.
+    """
+    sslsocket_class = _ResumableSSLSocket
+
+    def __new__(cls, protocol: int = ssl.PROTOCOL_TLS_CLIENT) -> ResumingSSLContext:
+        """Create a client context."""
+        return super().__new__(cls, protocol)
+
+    def __init__(self, protocol: int = ssl.PROTOCOL_TLS_CLIENT) -> None:
+        self.check_hostname = False
+        self.verify_mode = ssl.CERT_NONE
+        self._sessions: dict[Any, ssl.SSLSession] = {}
+        self._sockets: dict[Any, weakref.ref[ssl.SSLSocket]] = {}
+        self._sessions_lock = threading.Lock()
+
+    def save_session(self, ssl_sock: ssl.SSLSocket) -> None:
+        """Keep the session of ``ssl_sock`` to offer on the next connection to its peer."""
+        try:
+            peer = ssl_sock.getpeername()
+            session = ssl_sock.session
+        except (OSError, ValueError):
+            return
+        if session is not None:
+            with self._sessions_lock:
+                self._sessions[peer] = session
+
+    def wrap_socket(self, sock: socket.socket, *args: Any, **kwargs: Any) -> ssl.SSLSocket:
+        """Wrap ``sock``, offering the last session of its peer."""
+        try:
+            peer = sock.getpeername()
+        except OSError:
+            peer = None
+        if peer is not None and kwargs.get('session') is None:
+            with self._sessions_lock:
+                ref = self._sockets.get(peer)
+            # An open connection has the newest session.
+            if ref is not None and (open_sock := ref()) is not None:
+                self.save_session(open_sock)
+            with self._sessions_lock:
+                kwargs['session'] = self._sessions.get(peer)
+        ssl_sock = super().wrap_socket(sock, *args, **kwargs)
+        logger.debug('TLS session was %s.', 'resumed' if ssl_sock.session_reused else 'created')
+        if peer is not None:
+            self.save_session(ssl_sock)
+            with self._sessions_lock:
+                self._sockets[peer] = weakref.ref(ssl_sock)
+        return ssl_sock
+
+
+_SHARED_CONTEXT: ResumingSSLContext | None = None
+_SHARED_CONTEXT_LOCK = threading.Lock()
+
+
+def _shared_context() -> ResumingSSLContext:
+    global _SHARED_CONTEXT  # noqa: PLW0603
+    with _SHARED_CONTEXT_LOCK:
+        if _SHARED_CONTEXT is None:
+            _SHARED_CONTEXT = ResumingSSLContext()
+        return _SHARED_CONTEXT
+
+
+class PinnedAdapter(HTTPAdapter):
+    """
+    Transport adapter that checks the certificate fingerprint and resumes TLS sessions.
+
+    Requests must still be sent with ``verify=False`` (as :py:class:`~mb8611.client.Client` does)
+    because the certificate is self-signed. urllib3 considers a connection with a matching
+    fingerprint verified, so no ``InsecureRequestWarning`` is emitted.
+
+    Parameters
+    ----------
+    fingerprint : str | None
+        SHA-256 fingerprint of the certificate in hexadecimal, with or without colons. If
+        ``None``, the certificate is not checked.
+    ssl_context : ssl.SSLContext | None
+        Context for TLS connections. Defaults to a :py:class:`ResumingSSLContext` shared by every
+        adapter in the process.
+    pool_maxsize : int
+        Number of connections to keep open to the modem.
+    keep_alive : bool
+        Enable TCP keep-alive so idle pooled connections are not silently dropped.
+    """
+    def __init__(self,
+                 fingerprint: str | None = None,
+                 *,
+                 ssl_context: ssl.SSLContext | None = None,
+                 pool_maxsize: int = 4,
+                 keep_alive: bool = True) -> None:
+        self.fingerprint = fingerprint
+        self.ssl_context = _shared_context() if ssl_context is None else ssl_context
+        self.keep_alive = keep_alive
+        # Only one host is connected to.
+        super().__init__(pool_connections=1, pool_maxsize=pool_maxsize)
+
+    def init_poolmanager(
+            self,
+            connections: int,
+            maxsize: int,
+            block: bool = False,  # noqa: FBT001, FBT002
+            **pool_kwargs: Any) -> None:
+        """Create the pool manager with the context, fingerprint and socket options."""
+        pool_kwargs['ssl_context'] = self.ssl_context
+        if self.fingerprint is not None:
+            pool_kwargs['assert_fingerprint'] = self.fingerprint
+        if self.keep_alive:
+            pool_kwargs['socket_options'] = [
+                *HTTPConnection.default_socket_options, (socket.SOL_SOCKET, socket.SO_KEEPALIVE, 1)
+            ]
+        super().init_poolmanager(connections, maxsize, block, **pool_kwargs)
+
+
+def pinned_adapter(host: str,
+                   store: FingerprintStore | None = None,
+                   **kwargs: Any) -> PinnedAdapter:
+    """
+    Create a :py:class:`PinnedAdapter` for ``host`` using trust on first use.
+
+    If ``store`` has no fingerprint for ``host``, the certificate is fetched and its fingerprint
+    is stored. Otherwise the stored fingerprint is used and connections fail with
+    :py:class:`requests.exceptions.SSLError` if the certificate changed.
+
+    Parameters
+    ----------
+    host : str
+        Host with an optional port.
+    store : FingerprintStore | None
+        Store of fingerprints. Defaults to a :py:class:`FingerprintStore` at the default path.
+    **kwargs : Any
+        Passed to :py:class:`PinnedAdapter`.
+
+    Returns
+    -------
+    PinnedAdapter
+        The adapter. Pass it as the ``adapter`` argument of :py:class:`~mb8611.client.Client`.
+    """
+    store = FingerprintStore() if store is None else store
+    if (fingerprint := store.get(host)) is None:
+        fingerprint = get_fingerprint(host)
+        logger.info('Trusting certificate of %s with fingerprint %s.', host, fingerprint)
+        store.set(host, fingerprint)
+    return PinnedAdapter(fingerprint, **kwargs)
@@ -1,10 +1,28 @@
 """Utility functions."""
-from collections.abc import Iterator, Sequence
+from __future__ import annotations
+
+from pathlib import Path
+from typing import TYPE_CHECKING, Generic, TypeVar
 import hmac
-import math
+import json
+import logging
+import os
+import re
+import threading
 import time
 
-__all__ = ('make_hnap_auth', 'make_soap_action_uri', 'parse_table_str')
+if TYPE_CHECKING:
+    from collections.abc import Iterator, Sequence
+
+    from .api import LoginPayload
+
+__all__ = ('HNAPSigner', 'JSONFileStore', 'get_cache_dir', 'iter_table_rows', 'make_hnap_auth',
+           'make_login_payload', 'make_private_key', 'make_soap_action_uri', 'parse_table_str',
+           'parse_uptime')
+
+T = TypeVar('T')
+logger = logging.getLogger(__name__)
+_UPTIME_RE = re.compile(r'^(?:(\d+)\s*days?\s*)?(\d+)h:(\d+)m:(\d+)s$')
 
 
 def make_soap_action_uri(action: str) -> str:
@@ -12,14 +30,170 @@ def make_soap_action_uri(action: str) -> str:
     return f'"http://purenetworks.com/HNAP1/{action}"'
 
 
+class HNAPSigner:
+    """
+    Create ``HNAP_AUTH`` values for one private key.
+
+    The key is encoded once and SOAP action URIs are cached per action, so this is faster than
+    calling :py:func:`make_hnap_auth` for every request.
+
+    Parameters
+    ----------
+    private_key : str
+        Private key from logging in.
+    """
+    def __init__(self, private_key: str = 'withoutloginkey') -> None:
+        self.private_key = private_key
+        self._hmac = hmac.new(private_key.encode(), digestmod='md5')
+        self._soap_actions: dict[str, tuple[str, bytes]] = {}
+
+    def _soap_action(self, action: str) -> tuple[str, bytes]:
+        if (cached := self._soap_actions.get(action)) is None:
+            uri = make_soap_action_uri(action)
+            cached = self._soap_actions[action] = (uri, uri.encode())
+        return cached
+
+    def soap_action(self, action: str) -> str:
+        """Return the value of the ``SOAPACTION`` header for ``action``."""
+        return self._soap_action(action)[0]
+
+    def sign(self, action: str) -> str:
+        """Create the value required for the ``HNAP_AUTH`` header."""
+        current_time = str(time.time_ns() // 1000000 % 2000000000000)
+        auth = self._hmac.copy()
+        auth.update(current_time.encode() + self._soap_action(action)[1])
+        return f'{auth.hexdigest().upper()} {current_time}'
+
+
 def make_hnap_auth(action: str, private_key: str = 'withoutloginkey') -> str:
     """Create the value required for the ``HNAP_AUTH`` header."""
-    current_time = str(math.floor(time.time_ns() / 1000000) % 2000000000000)
+    current_time = str(time.time_ns() // 1000000 % 2000000000000)
     auth = hmac.new(private_key.encode(), (current_time + make_soap_action_uri(action)).encode(),
                     'md5')
     return f'{auth.hexdigest().upper()} {current_time}'
 
 
+def make_private_key(public_key: str, password: str, challenge: str) -> str:
+    """Derive the private key from the login challenge response."""
+    return hmac.new((public_key + password).encode(), challenge.encode(), 'md5').hexdigest().upper()
+
+
+def make_login_payload(username: str,
+                       private_key: str | None = None,
+                       challenge: str = '') -> LoginPayload:
+    """
+    Create a ``Login`` payload.
+
+    Without ``private_key`` this is the initial challenge request. Otherwise the password field is
+    the challenge signed with the private key.
+    """
+    return {
+        'Login': {
+            'Action':
+                'request',
+            'Username':
+                username,
+            'LoginPassword':
+                '' if private_key is None else hmac.new(private_key.encode(), challenge.encode(),
+                                                        'md5').hexdigest().upper(),
+            'Captcha':
+                '',
+            'PrivateLogin':
+                'LoginPassword'
+        }
+    }
+
+
+def iter_table_rows(table: str | bytes, row_delimiter: str = '|+|') -> Iterator[list[str]]:
+    """
+    Lazily parse a string that represents a table displayed in the UI.
+
+    Rows are found by offset so only the current row is copied. This keeps memory flat for very
+    long tables such as ``MotoStatusLogList``. ``bytes`` are decoded as UTF-8 one row at a time.
+    """
+    delimiter: str | bytes = row_delimiter.encode() if isinstance(table, bytes) else row_delimiter
+    delimiter_length = len(delimiter)
+    start = 0
+    while True:
+        end = table.find(delimiter, start)  # type: ignore[arg-type]
+        row = table[start:] if end == -1 else table[start:end]
+        yield (row.decode() if isinstance(row, bytes) else row).split('^')
+        if end == -1:
+            return
+        start = end + delimiter_length
+
+
 def parse_table_str(table_str: str, row_delimiter: str = '|+|') -> Iterator[Sequence[str]]:
     """Parse a string that represents a table displayed in the UI."""
-    yield from (r.split('^') for r in table_str.split(row_delimiter))
+    yield from iter_table_rows(table_str, row_delimiter)
+
+
+def parse_uptime(value: str) -> int:
+    """
+    Parse ``MotoConnSystemUpTime`` (for example ``'12 days 03h:45m:06s'``) into seconds.
+
+    Raises
+    ------
+    ValueError
+        If the value is not in the expected format.
+    """
+    if (match := _UPTIME_RE.match(value.strip())) is None:
+        msg = f'Invalid uptime: {value!r}'
+        raise ValueError(msg)
+    days, hours, minutes, seconds = (int(x or 0) for x in match.groups())
+    return ((days * 24 + hours) * 60 + minutes) * 60 + seconds
+
+
+def get_cache_dir() -> Path:
+    """Return the cache directory for this package (``$XDG_CACHE_HOME/mb8611``)."""
+    return Path(os.environ.get('XDG_CACHE_HOME') or Path.home() / '.cache') / 'mb8611'
+
+
+class JSONFileStore(Generic[T]):
+    """
+    Thread-safe string-keyed store backed by a JSON file.
+
+    The file and its parent directory are created readable only by the current user. Writes
+    replace the file atomically. An unreadable file is treated as empty.
+    """
+    def __init__(self, path: Path | str) -> None:
+        self.path = Path(path)
+        self._lock = threading.Lock()
+
+    def _read(self) -> dict[str, T]:
+        try:
+            with self.path.open(encoding='utf-8') as f:
+                data = json.load(f)
+        except FileNotFoundError:
+            return {}
+        except (OSError, ValueError):
+            logger.warning('Ignoring unreadable file %s.', self.path)
+            return {}
+        return data if isinstance(data, dict) else {}
+
+    def _write(self, data: dict[str, T]) -> None:
+        self.path.parent.mkdir(mode=0o700, parents=True, exist_ok=True)
+        tmp = self.path.with_name(f'.{self.path.name}.{os.getpid()}.{threading.get_ident()}.tmp')
+        fd = os.open(tmp, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            json.dump(data, f)
+        tmp.replace(self.path)
+
+    def get(self, key: str) -> T | None:
+        """Get a value."""
+        with self._lock:
+            return self._read().get(key)
+
+    def set(self, key: str, value: T) -> None:
+        """Set a value."""
+        with self._lock:
+            data = self._read()
+            data[key] = value
+            self._write(data)
+
+    def delete(self, key: str) -> None:
+        """Remove a value if present."""
+        with self._lock:
+            data = self._read()
+            if data.pop(key, None) is not None:
+                self._write(data)
@@ -0,0 +1,73 @@
+from mb8611.analytics import PERCENTILES, Limits, analyze, analyze_responses
+import numpy as np
+import pytest
+
+GOOD = ('1^Locked^QAM256^20^543.0^2.0^40.0^12^0^|+|'
+        '2^Locked^QAM256^21^549.0^3.0^42.0^12^0^|+|'
+        '3^Locked^OFDM PLC^33^850.0^4.0^44.0^12^0^')
+UPSTREAM = '1^Locked^SC-QAM^1^5120^17.6^40.0^|+|2^Locked^SC-QAM^2^5120^23.6^42.0^'
+
+
+def test_analyze() -> None:
+    bad = ('1^Not Locked^QAM256^20^543.0^2.0^40.0^12^0^|+|'
+           '2^Locked^QAM256^21^549.0^8.5^30.0^12^1800^|+|'
+           '3^Locked^OFDM PLC^33^850.0^4.0^44.0^12^0^')
+    hosts = [f'host{i}' for i in range(10)]
+    health = analyze(hosts, [bad if i == 3 else GOOD for i in range(10)], [UPSTREAM] * 10,
+                     [3600.0] * 10)
+    worst = health.modems[0]
+    assert worst['host'] == 'host3'
+    assert worst['unlocked'] == 1
+    assert worst['low_snr'] == 1
+    assert worst['power_out'] == 1
+    assert worst['snr_min'] == pytest.approx(30.0)
+    assert worst['snr_median'] == pytest.approx(40.0)
+    assert worst['uncorrected_rate'] == pytest.approx(0.5)
+    assert worst['outlier']
+    # An unlocked channel and a channel half a margin past its SNR, power and rate limits.
+    assert worst['score'] == pytest.approx(100 * (0 + 0.5 + 1 + 1 + 1) / 5)
+    best = health.modems[-1]
+    assert best['score'] == pytest.approx(100)
+    assert not best['outlier']
+    assert best['downstream_channels'] == 3
+    assert best['upstream_channels'] == 2
+    assert best['snr_p10'] == pytest.approx(np.percentile([40.0, 42.0, 44.0], 10))
+    assert best['downstream_power_min'] == pytest.approx(2.0)
+    assert best['downstream_power_max'] == pytest.approx(4.0)
+    assert best['upstream_power_max'] == pytest.approx(42.0)
+    assert health.downstream_scores.shape == health.downstream.shape
+    assert health.downstream_scores[health.downstream['sample'] == 3][0] == 0
+    assert health.percentiles['snr'].shape == (len(PERCENTILES),)
+    assert health.percentiles['upstream_power'][2] == pytest.approx(41.0)
+
+
+def test_analyze_limits_and_missing_channels() -> None:
+    health = analyze(['a', 'b'], [GOOD, ''], limits=Limits(min_snr=43.0, snr_margin=2.0))
+    assert list(health.modems['host']) == ['b', 'a']
+    assert np.isnan(health.modems['score'][0])
+    assert np.isnan(health.modems['uncorrected_rate']).all()
+    assert health.modems['low_snr'][1] == 2
+    assert health.modems['score'][1] == pytest.approx(100 * (0 + 0.5 + 1) / 3, rel=1e-5)
+    assert np.isnan(health.percentiles['upstream_power']).all()
+
+
+def test_analyze_responses() -> None:
+    health = analyze_responses({
+        'a': {
+            'GetMultipleHNAPsResponse': {
+                'GetMotoStatusDownstreamChannelInfoResponse': {
+                    'MotoConnDownstreamChannel': GOOD,
+                    'GetMotoStatusDownstreamChannelInfoResult': 'OK'
+                },
+                'GetMotoStatusConnectionInfoResponse': {
+                    'MotoConnSystemUpTime': '0 days 00h:00m:12s',
+                    'MotoConnNetworkAccess': 'Allowed',
+                    'GetMotoStatusConnectionInfoResult': 'OK'
+                },
+                'GetMultipleHNAPsResult': 'OK'
+            }
+        }
+    })
+    assert health.modems['downstream_channels'][0] == 3
+    assert health.modems['upstream_channels'][0] == 0
+    assert health.modems['uncorrected_rate'][0] == 0
@@ -0,0 +1,38 @@
+from mb8611.arrays import downstream_array, upstream_array
+import pytest
+
+DOWNSTREAM = ('1^Locked^QAM256^20^543.0^ 2.8^43.4^12^0^|+|'
+              '2^Locked^OFDM PLC^33^850.0^-1.5^40.1^1234567^89^')
+UPSTREAM = '1^Locked^SC-QAM^1^5120^17.6^40.3^|+|2^Not Locked^OFDMA^9^0^36.8^44.0^'
+
+
+def test_downstream_array() -> None:
+    arr = downstream_array((DOWNSTREAM, '', DOWNSTREAM))
+    assert arr.shape == (4,)
+    assert list(arr['sample']) == [0, 0, 2, 2]
+    assert arr['locked'].all()
+    assert list(arr['modulation'][:2]) == ['QAM256', 'OFDM PLC']
+    assert arr['power'][0] == pytest.approx(2.8)
+    assert arr['uncorrected'].sum() == 178
+    assert arr['corrected'][1] == 1234567
+
+
+def test_upstream_array() -> None:
+    arr = upstream_array((UPSTREAM,))
+    assert list(arr['locked']) == [True, False]
+    assert list(arr['symbol_rate']) == [5120, 0]
+    assert arr['frequency'][1] == pytest.approx(36.8)
+    assert list(arr['channel_type']) == ['SC-QAM', 'OFDMA']
+
+
+def test_empty() -> None:
+    assert downstream_array(()).shape == (0,)
+    assert upstream_array(('',)).shape == (0,)
+
+
+def test_short_rows(caplog: pytest.LogCaptureFixture) -> None:
+    arr = downstream_array((f'{DOWNSTREAM}|+|3^Locked^QAM256^', ''))
+    assert list(arr['channel']) == [1, 2]
+    assert 'Skipping short channel row: 3^Locked^QAM256^' in caplog.text
+    with pytest.raises(ValueError, match='x'):
+        upstream_array(('1^Locked^SC-QAM^x^5120^17.6^40.3^',))
@@ -0,0 +1,137 @@
+from __future__ import annotations
+
+from typing import TYPE_CHECKING, Any
+import asyncio
+
+from mb8611.async_client import AsyncClient
+from mb8611.client import CallHNAPError, LockedError, LoginFailed
+import httpx
+import pytest
+
+if TYPE_CHECKING:
+    from collections.abc import Iterator
+
+HOST = '192.168.12.1'
+LOGIN_CHALLENGE = {
+    'LoginResponse': {
+        'Challenge': 'a',
+        'Cookie': 'uid',
+        'LoginResult': 'OK',
+        'PublicKey': 'a'
+    }
+}
+
+
+def make_transport(responses: list[dict[str, Any]],
+                   requests: list[Any] | None = None) -> httpx.MockTransport:
+    it: Iterator[dict[str, Any]] = iter(responses)
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        if requests is not None:
+            requests.append(request)
+        if request.url.path == '/Logout.html':
+            return httpx.Response(200)
+        return httpx.Response(200, json=next(it))
+
+    return httpx.MockTransport(handler)
+
+
+def test_login_locked() -> None:
+    client = AsyncClient('pass',
+                         HOST,
+                         transport=make_transport([{
+                             'LoginResponse': {
+                                 'LoginResult': 'FAILED'
+                             }
+                         }]))
+    with pytest.raises(LockedError):
+        asyncio.run(client.login())
+
+
+def test_login_failed() -> None:
+    client = AsyncClient('pass',
+                         HOST,
+                         transport=make_transport(
+                             [LOGIN_CHALLENGE, {
+                                 'LoginResponse': {
+                                     'LoginResult': 'FAILED'
+                                 }
+                             }]))
+    with pytest.raises(LoginFailed):
+        asyncio.run(client.login())
+    assert 'uid' in client.session.cookies
+    assert 'PrivateKey' in client.session.cookies
+
+
+def test_login() -> None:
+    client = AsyncClient('pass',
+                         HOST,
+                         transport=make_transport(
+                             [LOGIN_CHALLENGE, {
+                                 'LoginResponse': {
+                                     'LoginResult': 'OK'
+                                 }
+                             }]))
+    asyncio.run(client.login())
+    assert client.private_key != 'withoutloginkey'
+    assert client.session.cookies.get('PrivateKey', domain=HOST) == client.private_key
+
+
+def test_call_hnap_single() -> None:
+    client = AsyncClient('pass',
+                         HOST,
+                         transport=make_transport([{
+                             'LoginResponse': {
+                                 'LoginResult': 'FAILED'
+                             }
+                         }]))
+    with pytest.raises(CallHNAPError):
+        asyncio.run(client.call_hnap('Login', {}))
+
+
+def test_with_and_call_multiple_hnaps() -> None:
+    requests: list[Any] = []
+    transport = make_transport([
+        LOGIN_CHALLENGE, {
+            'LoginResponse': {
+                'LoginResult': 'OK'
+            }
+        }, {
+            'GetMultipleHNAPsResponse': {
+                'GetMultipleHNAPsResult': 'OK'
+            }
+        }
+    ], requests)
+
+    async def run() -> Any:
+        async with AsyncClient('pass', HOST, transport=transport) as client:
+            return await client.call_hnap('GetHomeAddress', {})
+
+    res = asyncio.run(run())
+    assert 'GetMultipleHNAPsResponse' in res
+    assert requests[2].headers['SOAPACTION'] == '"http://purenetworks.com/HNAP1/GetMultipleHNAPs"'
+    assert requests[-1].url.path == '/Logout.html'
+
+
+def test_cookies_sent_when_host_has_port() -> None:
+    requests: list[Any] = []
+    transport = make_transport([
+        LOGIN_CHALLENGE, {
+            'LoginResponse': {
+                'LoginResult': 'OK'
+            }
+        }, {
+            'GetMultipleHNAPsResponse': {
+                'GetMultipleHNAPsResult': 'OK'
+            }
+        }
+    ], requests)
+
+    async def run() -> None:
+        client = AsyncClient('pass', f'{HOST}:8443', transport=transport)
+        await client.login()
+        await client.call_multiple_hnaps(['GetHomeAddress'])
+
+    asyncio.run(run())
+    assert 'uid=uid' in requests[-1].headers['Cookie']
+    assert 'PrivateKey=' in requests[-1].headers['Cookie']
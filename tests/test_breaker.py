@@ -0,0 +1,144 @@
+from mb8611.breaker import CircuitBreaker, CircuitOpenError
+from mb8611.client import Client, LockedError, LoginFailed
+from mb8611.fleet import poll
+from pytest_mock.plugin import MockerFixture
+from requests import HTTPError
+import pytest
+import requests_mock as req_mock
+
+HOST = '192.168.12.1'
+LOCKED = {'json': {'LoginResponse': {'LoginResult': 'FAILED'}}}
+LOGIN_RESPONSES = [{
+    'json': {
+        'LoginResponse': {
+            'Challenge': 'a',
+            'Cookie': 'uid',
+            'LoginResult': 'OK',
+            'PublicKey': 'a'
+        }
+    }
+}, {
+    'json': {
+        'LoginResponse': {
+            'LoginResult': 'OK'
+        }
+    }
+}]
+
+
+def test_attempt(mocker: MockerFixture) -> None:
+    monotonic = mocker.patch('mb8611.breaker.time.monotonic', return_value=100.0)
+    breaker = CircuitBreaker(cooldown=60)
+    with breaker.attempt(HOST):
+        pass
+    with pytest.raises(LoginFailed), breaker.attempt(HOST):
+        raise LoginFailed
+    assert breaker.retry_after(HOST) == 60
+    assert breaker.retry_after('other') == 0
+    with pytest.raises(CircuitOpenError, match='for another 60 seconds') as exc_info, \
+            breaker.attempt(HOST):
+        pass
+    assert exc_info.value.host == HOST
+    monotonic.return_value = 170.0
+    # Only one login is tried after the cool-down.
+    with breaker.attempt(HOST), pytest.raises(CircuitOpenError), breaker.attempt(HOST):
+        pass
+    with breaker.attempt(HOST):
+        pass
+    with pytest.raises(LockedError), breaker.attempt(HOST):
+        raise LockedError
+    monotonic.return_value = 240.0
+    with pytest.raises(ValueError, match='other'), breaker.attempt(HOST):
+        raise ValueError('other')
+    with pytest.raises(LockedError), breaker.attempt(HOST):
+        raise LockedError
+    breaker.reset(HOST)
+    assert breaker.retry_after(HOST) == 0
+
+
+def test_backoff(mocker: MockerFixture) -> None:
+    uniform = mocker.patch('mb8611.breaker.random.uniform', return_value=1)
+    breaker = CircuitBreaker(backoff_base=0.5, backoff_max=3)
+    assert breaker.backoff(0) == 1
+    uniform.assert_called_with(0, 0.5)
+    breaker.backoff(2)
+    uniform.assert_called_with(0, 2)
+    breaker.backoff(10)
+    uniform.assert_called_with(0, 3)
+
+
+def test_client_login_fails_fast(requests_mock: req_mock.Mocker) -> None:
+    requests_mock.post(f'https://{HOST}/HNAP1/', [LOCKED])
+    breaker = CircuitBreaker()
+    with pytest.raises(LockedError):
+        Client('pass', HOST, breaker=breaker).login()
+    with pytest.raises(CircuitOpenError):
+        Client('pass', HOST, breaker=breaker).login()
+    assert requests_mock.call_count == 1
+
+
+def test_client_retries_transient_errors(requests_mock: req_mock.Mocker,
+                                         mocker: MockerFixture) -> None:
+    sleep = mocker.patch('mb8611.client.time.sleep')
+    requests_mock.post(f'https://{HOST}/HNAP1/', [
+        *LOGIN_RESPONSES, {
+            'status_code': 503
+        }, {
+            'status_code': 502
+        }, {
+            'json': {
+                'GetMultipleHNAPsResponse': {
+                    'GetMultipleHNAPsResult': 'OK'
+                }
+            }
+        }, {
+            'status_code': 404
+        }
+    ])
+    client = Client('pass', HOST, breaker=CircuitBreaker(max_retries=2))
+    client.login()
+    client.call_multiple_hnaps(['GetHomeAddress'])
+    assert sleep.call_count == 2
+    with pytest.raises(HTTPError, match='404'):
+        client.call_hnap('GetNetworkModeSettings')
+    assert sleep.call_count == 2
+    assert requests_mock.call_count == 6
+
+
+def test_client_retries_exhausted(requests_mock: req_mock.Mocker, mocker: MockerFixture) -> None:
+    mocker.patch('mb8611.client.time.sleep')
+    requests_mock.post(f'https://{HOST}/HNAP1/', [*LOGIN_RESPONSES, {'status_code': 500}])
+    client = Client('pass', HOST, breaker=CircuitBreaker(max_retries=1))
+    client.login()
+    with pytest.raises(HTTPError, match='500'):
+        client.call_hnap('GetHomeAddress')
+    assert requests_mock.call_count == 4
+
+
+def test_client_does_not_retry_login(requests_mock: req_mock.Mocker, mocker: MockerFixture) -> None:
+    sleep = mocker.patch('mb8611.client.time.sleep')
+    requests_mock.post(f'https://{HOST}/HNAP1/', status_code=503)
+    with pytest.raises(HTTPError, match='503'):
+        Client('pass', HOST, breaker=CircuitBreaker(max_retries=2)).login()
+    assert requests_mock.call_count == 1
+    sleep.assert_not_called()
+
+
+def test_client_does_not_retry_set(requests_mock: req_mock.Mocker, mocker: MockerFixture) -> None:
+    sleep = mocker.patch('mb8611.client.time.sleep')
+    requests_mock.post(f'https://{HOST}/HNAP1/', [*LOGIN_RESPONSES, {'status_code': 503}])
+    client = Client('pass', HOST, breaker=CircuitBreaker(max_retries=2))
+    client.login()
+    with pytest.raises(HTTPError, match='503'):
+        client.call_hnap('SetStatusSecuritySettings', {'SetStatusSecuritySettings': {}})
+    assert requests_mock.call_count == 3
+    sleep.assert_not_called()
+
+
+def test_poll_breaker(requests_mock: req_mock.Mocker) -> None:
+    requests_mock.post(f'https://{HOST}/HNAP1/', [LOCKED])
+    breaker = CircuitBreaker()
+    assert isinstance(next(poll([HOST], ['GetHomeAddress'], breaker=breaker)).error, LockedError)
+    assert isinstance(
+        next(poll([HOST], ['GetHomeAddress'], breaker=breaker)).error, CircuitOpenError)
+    assert requests_mock.call_count == 1
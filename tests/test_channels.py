@@ -0,0 +1,38 @@
+from mb8611.channels import (
+    DownstreamChannel,
+    UpstreamChannel,
+    parse_downstream_channels,
+    parse_upstream_channels,
+)
+import pytest
+
+DOWNSTREAM = ('1^Locked^QAM256^20^543.0^ 2.8^43.4^12^0^|+|'
+              '2^Locked^OFDM PLC^33^850.0^-1.5^40.1^1234567^89^')
+UPSTREAM = '1^Locked^SC-QAM^1^5120^17.6^40.3^|+|2^Not Locked^OFDMA^9^0^36.8^44.0^'
+
+
+def test_parse_downstream_channels() -> None:
+    assert list(parse_downstream_channels(DOWNSTREAM)) == [
+        DownstreamChannel(1, 'Locked', 'QAM256', 20, 543.0, 2.8, 43.4, 12, 0),
+        DownstreamChannel(2, 'Locked', 'OFDM PLC', 33, 850.0, -1.5, 40.1, 1234567, 89)
+    ]
+
+
+def test_parse_upstream_channels() -> None:
+    assert list(parse_upstream_channels(UPSTREAM)) == [
+        UpstreamChannel(1, 'Locked', 'SC-QAM', 1, 5120, 17.6, 40.3),
+        UpstreamChannel(2, 'Not Locked', 'OFDMA', 9, 0, 36.8, 44.0)
+    ]
+
+
+def test_parse_empty() -> None:
+    assert not list(parse_downstream_channels(''))
+    assert not list(parse_upstream_channels(''))
+
+
+def test_parse_short_rows(caplog: pytest.LogCaptureFixture) -> None:
+    assert len(list(parse_downstream_channels(f'{DOWNSTREAM}|+|3^Locked^QAM256^'))) == 2
+    assert 'Skipping short channel row: 3^Locked^QAM256^' in caplog.text
+    assert not list(parse_upstream_channels('1^Locked^'))
+    with pytest.raises(ValueError, match='x'):
+        list(parse_upstream_channels('1^Locked^SC-QAM^x^5120^17.6^40.3^'))
@@ -1,4 +1,13 @@
+from pathlib import Path
+import logging
+
 from mb8611.client import CallHNAPError, Client, LockedError, LoginFailed
+from mb8611.codec import get_codec
+from mb8611.response_cache import ResponseCache
+from mb8611.session_cache import SessionCache
+from pytest_mock.plugin import MockerFixture
+from requests import HTTPError, JSONDecodeError as RequestsJSONDecodeError, RequestException
+import msgspec
 import pytest
 import requests_mock as req_mock
 
@@ -91,6 +100,18 @@ def test_call_hnap_single(requests_mock: req_mock.Mocker) -> None:
         client.call_hnap('Login', {})
 
 
+@pytest.mark.parametrize('codec', ['json', 'msgspec', 'orjson'])
+def test_call_hnap_not_json(requests_mock: req_mock.Mocker, codec: str) -> None:
+    client = Client('pass', HOST, codec=get_codec(codec))
+    requests_mock.post(f'https://{HOST}/HNAP1/', text='<html></html>')
+    with pytest.raises(RequestsJSONDecodeError) as exc_info:
+        client.call_multiple_hnaps(['GetHomeAddress'])
+    assert isinstance(exc_info.value, RequestException)
+    assert exc_info.value.doc == '<html></html>'
+    with pytest.raises(RequestsJSONDecodeError):
+        client.call_multiple_hnaps_typed(['GetHomeAddress'])
+
+
 def test_with_and_call_multiple_hnaps(requests_mock: req_mock.Mocker) -> None:
     requests_mock.get(f'https://{HOST}/Logout.html')
     requests_mock.post(f'https://{HOST}/HNAP1/', [{
@@ -118,3 +139,389 @@ def test_with_and_call_multiple_hnaps(requests_mock: req_mock.Mocker) -> None:
     with Client('pass', HOST) as client:
         res = client.call_hnap('GetHomeAddress', {})
         assert 'GetMultipleHNAPsResponse' in res
+
+
+def test_cookies_sent_when_host_has_port(requests_mock: req_mock.Mocker) -> None:
+    host = f'{HOST}:8443'
+    requests_mock.post(f'https://{host}/HNAP1/', [{
+        'json': {
+            'LoginResponse': {
+                'Challenge': 'a',
+                'Cookie': 'uid',
+                'LoginResult': 'OK',
+                'PublicKey': 'a'
+            }
+        }
+    }, {
+        'json': {
+            'LoginResponse': {
+                'LoginResult': 'OK'
+            }
+        }
+    }, {
+        'json': {
+            'GetMultipleHNAPsResponse': {
+                'GetMultipleHNAPsResult': 'OK'
+            }
+        }
+    }])
+    client = Client('pass', host, logout=False)
+    client.login()
+    client.call_multiple_hnaps(['GetHomeAddress'])
+    assert requests_mock.last_request is not None
+    cookie = requests_mock.last_request.headers['Cookie']
+    assert 'uid=uid' in cookie
+    assert 'PrivateKey=' in cookie
+
+
+def test_logout_does_not_verify_certificate(requests_mock: req_mock.Mocker) -> None:
+    logout = requests_mock.get(f'https://{HOST}/Logout.html')
+    requests_mock.post(f'https://{HOST}/HNAP1/', [{
+        'json': {
+            'LoginResponse': {
+                'Challenge': 'a',
+                'Cookie': 'uid',
+                'LoginResult': 'OK',
+                'PublicKey': 'a'
+            }
+        }
+    }, {
+        'json': {
+            'LoginResponse': {
+                'LoginResult': 'OK'
+            }
+        }
+    }])
+    with Client('pass', HOST):
+        pass
+    assert logout.call_count == 1
+    assert logout.last_request is not None
+    assert logout.last_request.verify is False
+
+
+def test_session_cache_login_and_resume(requests_mock: req_mock.Mocker, tmp_path: Path) -> None:
+    cache = SessionCache(tmp_path / 'sessions.json')
+    logout = requests_mock.get(f'https://{HOST}/Logout.html')
+    requests_mock.post(f'https://{HOST}/HNAP1/', [{
+        'json': {
+            'LoginResponse': {
+                'Challenge': 'a',
+                'Cookie': 'uid',
+                'LoginResult': 'OK',
+                'PublicKey': 'a'
+            }
+        }
+    }, {
+        'json': {
+            'LoginResponse': {
+                'LoginResult': 'OK'
+            }
+        }
+    }, {
+        'json': {
+            'GetMultipleHNAPsResponse': {
+                'GetMultipleHNAPsResult': 'OK'
+            }
+        }
+    }])
+    with Client('pass', HOST, session_cache=cache, logout=False) as client:
+        client.call_hnap('GetHomeAddress')
+        private_key = client.private_key
+    assert not logout.called
+    assert cache.get(HOST, 'admin') == {'private_key': private_key, 'uid': 'uid'}
+    requests_mock.reset_mock()
+    with Client('pass', HOST, session_cache=cache, logout=False) as client:
+        client.call_hnap('GetHomeAddress')
+        assert client.private_key == private_key
+        assert client.session.cookies.get('uid') == 'uid'
+    assert requests_mock.call_count == 1
+
+
+def test_session_cache_expired(requests_mock: req_mock.Mocker, tmp_path: Path) -> None:
+    cache = SessionCache(tmp_path / 'sessions.json')
+    cache.set(HOST, 'admin', {'private_key': 'OLD'})
+    requests_mock.get(f'https://{HOST}/Logout.html')
+    requests_mock.post(f'https://{HOST}/HNAP1/', [{
+        'json': {
+            'GetMultipleHNAPsResponse': {
+                'GetMultipleHNAPsResult': 'UN-AUTH'
+            }
+        }
+    }, {
+        'json': {
+            'LoginResponse': {
+                'Challenge': 'a',
+                'LoginResult': 'OK',
+                'PublicKey': 'a'
+            }
+        }
+    }, {
+        'json': {
+            'LoginResponse': {
+                'LoginResult': 'OK'
+            }
+        }
+    }, {
+        'json': {
+            'GetMultipleHNAPsResponse': {
+                'GetMultipleHNAPsResult': 'OK'
+            }
+        }
+    }])
+    with Client('pass', HOST, session_cache=cache) as client:
+        res = client.call_multiple_hnaps(['GetHomeAddress'])
+        assert res['GetMultipleHNAPsResponse']['GetMultipleHNAPsResult'] == 'OK'
+        stored = cache.get(HOST, 'admin')
+        assert stored is not None
+        assert stored['private_key'] == client.private_key != 'OLD'
+    assert cache.get(HOST, 'admin') is None
+
+
+def test_session_cache_login_failed(requests_mock: req_mock.Mocker, tmp_path: Path) -> None:
+    cache = SessionCache(tmp_path / 'sessions.json')
+    cache.set(HOST, 'admin', {'private_key': 'OLD'})
+    requests_mock.post(f'https://{HOST}/HNAP1/', [{
+        'json': {
+            'LoginResponse': {
+                'Challenge': 'a',
+                'LoginResult': 'OK',
+                'PublicKey': 'a'
+            }
+        }
+    }, {
+        'json': {
+            'LoginResponse': {
+                'LoginResult': 'FAILED'
+            }
+        }
+    }])
+    with pytest.raises(LoginFailed):
+        Client('pass', HOST, session_cache=cache).login()
+    assert cache.get(HOST, 'admin') is None
+
+
+def test_response_cache(requests_mock: req_mock.Mocker) -> None:
+    requests_mock.post(f'https://{HOST}/HNAP1/', [{
+        'json': {
+            'GetMultipleHNAPsResponse': {
+                'GetMotoStatusSoftwareResponse': {
+                    'GetMotoStatusSoftwareResult': 'OK',
+                    'StatusSoftwareSfVer': '1'
+                },
+                'GetMotoStatusConnectionInfoResponse': {
+                    'GetMotoStatusConnectionInfoResult': 'OK',
+                    'MotoConnSystemUpTime': '00h:00m:01s'
+                },
+                'GetMultipleHNAPsResult': 'OK'
+            }
+        }
+    }, {
+        'json': {
+            'GetMultipleHNAPsResponse': {
+                'GetMotoStatusConnectionInfoResponse': {
+                    'GetMotoStatusConnectionInfoResult': 'OK',
+                    'MotoConnSystemUpTime': '00h:00m:02s'
+                },
+                'GetMultipleHNAPsResult': 'OK'
+            }
+        }
+    }, {
+        'json': {
+            'SetStatusSecuritySettingsResponse': {
+                'SetStatusSecuritySettingsResult': 'OK'
+            }
+        }
+    }, {
+        'json': {
+            'GetMultipleHNAPsResponse': {
+                'GetMotoStatusSoftwareResponse': {
+                    'GetMotoStatusSoftwareResult': 'OK',
+                    'StatusSoftwareSfVer': '2'
+                },
+                'GetMultipleHNAPsResult': 'OK'
+            }
+        }
+    }])
+    client = Client('pass', HOST, response_cache=ResponseCache())
+    client.call_multiple_hnaps(('GetMotoStatusSoftware', 'GetMotoStatusConnectionInfo'))
+    res = client.call_multiple_hnaps(('GetMotoStatusSoftware', 'GetMotoStatusConnectionInfo'))
+    assert requests_mock.last_request is not None
+    assert requests_mock.last_request.json() == {
+        'GetMultipleHNAPs': {
+            'GetMotoStatusConnectionInfo': ''
+        }
+    }
+    top = res['GetMultipleHNAPsResponse']
+    assert top['GetMotoStatusSoftwareResponse']['StatusSoftwareSfVer'] == '1'
+    assert top['GetMotoStatusConnectionInfoResponse']['MotoConnSystemUpTime'] == '00h:00m:02s'
+    res = client.call_multiple_hnaps(['GetMotoStatusSoftware'])
+    assert res['GetMultipleHNAPsResponse']['GetMultipleHNAPsResult'] == 'OK'
+    assert requests_mock.call_count == 2
+    client.call_hnap('SetStatusSecuritySettings', {'SetStatusSecuritySettings': {}})
+    res = client.call_multiple_hnaps(['GetMotoStatusSoftware'])
+    assert requests_mock.call_count == 4
+    assert res['GetMultipleHNAPsResponse']['GetMotoStatusSoftwareResponse'][
+        'StatusSoftwareSfVer'] == '2'
+
+
+def test_response_cache_shared_by_hosts(requests_mock: req_mock.Mocker) -> None:
+    for host, version in ((HOST, '1'), ('192.168.100.2', '2')):
+        requests_mock.post(f'https://{host}/HNAP1/', [{
+            'json': {
+                'GetMultipleHNAPsResponse': {
+                    'GetMotoStatusSoftwareResponse': {
+                        'GetMotoStatusSoftwareResult': 'OK',
+                        'StatusSoftwareSfVer': version
+                    },
+                    'GetMultipleHNAPsResult': 'OK'
+                }
+            }
+        }])
+    cache = ResponseCache()
+    first = Client('pass', HOST, response_cache=cache)
+    second = Client('pass', '192.168.100.2', response_cache=cache)
+    for client, version in ((first, '1'), (second, '2'), (first, '1'), (second, '2')):
+        res = client.call_multiple_hnaps(['GetMotoStatusSoftware'])
+        section = res['GetMultipleHNAPsResponse']['GetMotoStatusSoftwareResponse']
+        assert section['StatusSoftwareSfVer'] == version
+        section['StatusSoftwareSfVer'] = 'changed'
+    assert requests_mock.call_count == 2
+
+
+def test_metrics_callback(requests_mock: req_mock.Mocker, mocker: MockerFixture) -> None:
+    callback = mocker.Mock()
+    client = Client('pass', HOST, metrics_callback=callback)
+    requests_mock.post(f'https://{HOST}/HNAP1/', [{
+        'json': {
+            'GetNetworkModeSettingsResponse': {
+                'GetNetworkModeSettingsResult': 'OK'
+            }
+        }
+    }, {
+        'status_code': 500,
+        'text': 'error'
+    }])
+    client.call_hnap('GetNetworkModeSettings', {'GetNetworkModeSettings': ''})
+    with pytest.raises(HTTPError):
+        client.call_hnap('GetNetworkModeSettings')
+    assert callback.call_count == 2
+    metrics = [call.args[0] for call in callback.call_args_list]
+    assert metrics[0].action == 'GetNetworkModeSettings'
+    assert metrics[0].result == 'OK'
+    assert metrics[0].status_code == 200
+    assert metrics[0].request_size == len(requests_mock.request_history[0].body)
+    assert metrics[0].response_size == len(
+        b'{"GetNetworkModeSettingsResponse": {"GetNetworkModeSettingsResult": "OK"}}')
+    assert metrics[0].total >= metrics[0].sign + metrics[0].time_to_first_byte + metrics[0].decode
+    assert metrics[1].result is None
+    assert metrics[1].status_code == 500
+    assert metrics[1].request_size == 0
+    assert metrics[1].decode == 0
+
+
+def test_metrics_callback_error(requests_mock: req_mock.Mocker, mocker: MockerFixture,
+                                caplog: pytest.LogCaptureFixture) -> None:
+    client = Client('pass', HOST, metrics_callback=mocker.Mock(side_effect=RuntimeError('bug')))
+    requests_mock.post(f'https://{HOST}/HNAP1/', [{
+        'json': {
+            'GetNetworkModeSettingsResponse': {
+                'GetNetworkModeSettingsResult': 'OK'
+            }
+        }
+    }, {
+        'status_code': 500,
+        'text': 'error'
+    }])
+    assert client.call_hnap('GetNetworkModeSettings', {'GetNetworkModeSettings': ''})
+    with pytest.raises(HTTPError):
+        client.call_hnap('GetNetworkModeSettings')
+    assert caplog.text.count('Metrics callback failed.') == 2
+
+
+def test_prepared_requests(requests_mock: req_mock.Mocker, mocker: MockerFixture,
+                           caplog: pytest.LogCaptureFixture) -> None:
+    client = Client('pass', HOST)
+    client._set_session_cookies('uid')  # noqa: SLF001
+    client.session.cookies.set('Secure', '', path='/HNAP1', domain=HOST)
+    prepare_request = mocker.spy(client.session, 'prepare_request')
+    response = {'json': {'GetMultipleHNAPsResponse': {'GetMultipleHNAPsResult': 'OK'}}}
+    requests_mock.post(f'https://{HOST}/HNAP1/', [
+        response, {
+            **response, 'headers': {
+                'Set-Cookie': 'Secure; path=/HNAP1'
+            }
+        }, response, {
+            **response, 'headers': {
+                'Set-Cookie': 'other=1; path=/'
+            }
+        }, response, response
+    ])
+    for _ in range(3):
+        client.call_multiple_hnaps(['GetHomeAddress', 'GetMotoStatusSoftware'])
+    assert prepare_request.call_count == 1
+    assert 'Secure' not in client.session.cookies.get_dict(path='/HNAP1')
+    auths = {request.headers['HNAP_AUTH'] for request in requests_mock.request_history}
+    assert all(request.headers['Cookie'] == requests_mock.request_history[0].headers['Cookie']
+               for request in requests_mock.request_history)
+    client.call_multiple_hnaps(['GetHomeAddress', 'GetMotoStatusSoftware'])
+    client.call_multiple_hnaps(['GetHomeAddress', 'GetMotoStatusSoftware'])
+    assert prepare_request.call_count == 2
+    client.private_key = 'new'
+    with caplog.at_level(logging.DEBUG, logger='mb8611.client'):
+        client.call_multiple_hnaps(['GetHomeAddress', 'GetMotoStatusSoftware'])
+    assert prepare_request.call_count == 3
+    assert 'HNAP_AUTH' in caplog.text
+    assert requests_mock.request_history[-1].headers['HNAP_AUTH'] not in auths
+
+
+def test_call_multiple_hnaps_typed(requests_mock: req_mock.Mocker) -> None:
+    client = Client('pass', HOST, codec=get_codec('json'))
+    requests_mock.post(f'https://{HOST}/HNAP1/', [{
+        'json': {
+            'GetMultipleHNAPsResponse': {
+                'GetMotoStatusConnectionInfoResponse': {
+                    'GetMotoStatusConnectionInfoResult': 'OK',
+                    'MotoConnNetworkAccess': 'Allowed',
+                    'MotoConnSystemUpTime': '1 days 00h:00m:05s'
+                },
+                'GetMotoLagStatusResponse': {
+                    'GetMotoLagStatusResult': 'OK',
+                    'MotoLagCurrentStatus': '1'
+                },
+                'GetMultipleHNAPsResult': 'OK'
+            }
+        }
+    }, {
+        'json': {
+            'GetMultipleHNAPsResponse': {
+                'GetMotoLagStatusResponse': {
+                    'GetMotoLagStatusResult': 'ERROR',
+                    'MotoLagCurrentStatus': '1'
+                },
+                'GetMultipleHNAPsResult': 'OK'
+            }
+        }
+    }, {
+        'json': {
+            'GetMultipleHNAPsResponse': {
+                'GetMultipleHNAPsResult': 'UN-AUTH'
+            }
+        }
+    }])
+    top = client.call_multiple_hnaps_typed(['GetMotoLagStatus', 'GetMotoStatusConnectionInfo'])
+    assert requests_mock.last_request is not None
+    assert requests_mock.last_request.json() == {
+        'GetMultipleHNAPs': {
+            'GetMotoLagStatus': '',
+            'GetMotoStatusConnectionInfo': ''
+        }
+    }
+    assert top.connection_info is not None
+    assert top.connection_info.system_uptime == '1 days 00h:00m:05s'
+    assert top.lag_status is not None
+    assert top.lag_status.current_status == '1'
+    assert top.software is None
+    with pytest.raises(msgspec.ValidationError, match='GetMotoLagStatusResult'):
+        client.call_multiple_hnaps_typed(['GetMotoLagStatus'])
+    with pytest.raises(CallHNAPError, match='UN-AUTH'):
+        client.call_multiple_hnaps_typed(['GetMotoLagStatus'])
@@ -0,0 +1,153 @@
+from collections.abc import Collection
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, cast
+import asyncio
+import threading
+import time
+
+from mb8611.client import CallHNAPError, Client
+from mb8611.coalesce import AsyncCoalescer, Coalescer
+import pytest
+
+
+def make_response(actions: Collection[str], result: str = 'OK') -> dict[str, Any]:
+    top: dict[str, Any] = {f'{a}Response': {f'{a}Result': 'OK'} for a in actions}
+    top['GetMultipleHNAPsResult'] = result
+    return {'GetMultipleHNAPsResponse': top}
+
+
+class FakeClient:
+    def __init__(self, result: str = 'OK') -> None:
+        self.calls: list[list[str]] = []
+        self.result = result
+
+    def call_multiple_hnaps(self, actions: Collection[str], *, check: bool = True) -> Any:
+        self.calls.append(list(actions))
+        return make_response(actions, self.result)
+
+
+class FakeAsyncClient(FakeClient):
+    async def call_multiple_hnaps(self, actions: Collection[str], *, check: bool = True) -> Any:
+        return super().call_multiple_hnaps(actions, check=check)
+
+
+def test_coalescer_merges_threads() -> None:
+    fake = FakeClient()
+    coalescer = Coalescer(cast('Client', fake), window=0.2)
+    with ThreadPoolExecutor(3) as executor:
+        futures = [
+            executor.submit(coalescer.call_hnap, 'GetHomeAddress'),
+            executor.submit(coalescer.call_hnap, 'GetMotoStatusLog'),
+            executor.submit(coalescer.call_multiple_hnaps,
+                            ('GetHomeAddress', 'GetMotoStatusSoftware')),
+        ]
+        results = [f.result() for f in futures]
+    assert fake.calls == [['GetHomeAddress', 'GetMotoStatusLog', 'GetMotoStatusSoftware']]
+    assert set(results[0]['GetMultipleHNAPsResponse']) == {
+        'GetHomeAddressResponse', 'GetMultipleHNAPsResult'
+    }
+    assert set(results[1]['GetMultipleHNAPsResponse']) == {
+        'GetMotoStatusLogResponse', 'GetMultipleHNAPsResult'
+    }
+    assert set(results[2]['GetMultipleHNAPsResponse']) == {
+        'GetHomeAddressResponse', 'GetMotoStatusSoftwareResponse', 'GetMultipleHNAPsResult'
+    }
+
+
+def test_coalescer_sequential_calls_are_separate() -> None:
+    fake = FakeClient()
+    coalescer = Coalescer(cast('Client', fake), window=0)
+    coalescer.call_hnap('GetHomeAddress')
+    coalescer.call_hnap('GetMotoStatusLog')
+    assert fake.calls == [['GetHomeAddress'], ['GetMotoStatusLog']]
+
+
+def test_coalescer_check() -> None:
+    coalescer = Coalescer(cast('Client', FakeClient('UN-AUTH')), window=0)
+    with pytest.raises(CallHNAPError):
+        coalescer.call_hnap('GetHomeAddress')
+    assert coalescer.call_hnap(
+        'GetHomeAddress',
+        check=False)['GetMultipleHNAPsResponse']['GetMultipleHNAPsResult'] == 'UN-AUTH'
+
+
+def test_coalescer_exception() -> None:
+    fake = FakeClient()
+    fake.call_multiple_hnaps = lambda *_, **__: 1 / 0  # type: ignore[method-assign]
+    coalescer = Coalescer(cast('Client', fake), window=0)
+    with pytest.raises(ZeroDivisionError):
+        coalescer.call_hnap('GetHomeAddress')
+
+
+def test_async_coalescer_merges_tasks() -> None:
+    fake = FakeAsyncClient()
+    coalescer = AsyncCoalescer(cast('Any', fake), window=0.01)
+
+    async def run() -> tuple[Any, Any]:
+        return await asyncio.gather(coalescer.call_hnap('GetHomeAddress'),
+                                    coalescer.call_hnap('GetMotoStatusLog'))
+
+    results = asyncio.run(run())
+    assert fake.calls == [['GetHomeAddress', 'GetMotoStatusLog']]
+    assert 'GetMotoStatusLogResponse' not in results[0]['GetMultipleHNAPsResponse']
+    assert 'GetMotoStatusLogResponse' in results[1]['GetMultipleHNAPsResponse']
+
+
+def test_async_coalescer_exception() -> None:
+    fake = FakeAsyncClient()
+
+    async def fail(*args: Any, **kwargs: Any) -> Any:  # noqa: RUF029
+        raise ZeroDivisionError
+
+    fake.call_multiple_hnaps = fail  # type: ignore[method-assign]
+    coalescer = AsyncCoalescer(cast('Any', fake), window=0)
+    with pytest.raises(ZeroDivisionError):
+        asyncio.run(coalescer.call_hnap('GetHomeAddress'))
+
+
+def test_coalescer_serializes_batches() -> None:
+    fake = FakeClient()
+    active = 0
+    overlapped = False
+    lock = threading.Lock()
+
+    def call_multiple_hnaps(actions: Collection[str], *, check: bool = True) -> Any:
+        nonlocal active, overlapped
+        with lock:
+            active += 1
+            overlapped = overlapped or active > 1
+        time.sleep(0.1)
+        with lock:
+            active -= 1
+        return make_response(actions)
+
+    fake.call_multiple_hnaps = call_multiple_hnaps  # type: ignore[method-assign]
+    coalescer = Coalescer(cast('Client', fake), window=0)
+    with ThreadPoolExecutor(2) as executor:
+        first = executor.submit(coalescer.call_hnap, 'GetHomeAddress')
+        time.sleep(0.02)
+        second = executor.submit(coalescer.call_hnap, 'GetMotoStatusLog')
+        assert 'GetHomeAddressResponse' in first.result()['GetMultipleHNAPsResponse']
+        assert 'GetMotoStatusLogResponse' in second.result()['GetMultipleHNAPsResponse']
+    assert not overlapped
+
+
+def test_async_coalescer_cancelled() -> None:
+    fake = FakeAsyncClient()
+    coalescer = AsyncCoalescer(cast('Any', fake), window=0.1)
+
+    async def run() -> Any:
+        leader = asyncio.create_task(coalescer.call_hnap('GetHomeAddress'))
+        await asyncio.sleep(0)
+        follower = asyncio.create_task(coalescer.call_hnap('GetMotoStatusLog'))
+        await asyncio.sleep(0)
+        leader.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await leader
+        with pytest.raises(asyncio.CancelledError):
+            await follower
+        return await asyncio.wait_for(coalescer.call_hnap('GetMotoStatusSoftware'), 1)
+
+    result = asyncio.run(run())
+    assert fake.calls == [['GetMotoStatusSoftware']]
+    assert 'GetMotoStatusSoftwareResponse' in result['GetMultipleHNAPsResponse']
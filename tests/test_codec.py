@@ -0,0 +1,26 @@
+from mb8611.codec import CODECS, get_codec
+from pytest_mock.plugin import MockerFixture
+import pytest
+
+
+@pytest.mark.parametrize('name', ['json', 'msgspec', 'orjson'])
+def test_codec(name: str) -> None:
+    codec = get_codec(name)
+    assert codec.name == name
+    data = codec.encode({'GetMultipleHNAPs': {'GetHomeAddress': ''}})
+    assert isinstance(data, bytes)
+    assert codec.decode(data) == {'GetMultipleHNAPs': {'GetHomeAddress': ''}}
+    with pytest.raises(ValueError):  # noqa: PT011
+        codec.decode(b'{')
+
+
+def test_get_codec_default(mocker: MockerFixture) -> None:
+    get_codec.cache_clear()
+    mocker.patch.dict(CODECS, {'msgspec': mocker.Mock(side_effect=ImportError)})
+    assert get_codec().name == 'orjson'
+    get_codec.cache_clear()
+
+
+def test_get_codec_unknown() -> None:
+    with pytest.raises(KeyError):
+        get_codec('unknown')
@@ -0,0 +1,106 @@
+from __future__ import annotations
+
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import TYPE_CHECKING, Any
+import os
+import pickle  # noqa: S403
+import shutil
+import signal
+import ssl
+import subprocess as sp
+import threading
+
+from mb8611.breaker import CircuitOpenError
+from mb8611.client import CallHNAPError, LockedError
+from mb8611.collector import Collector
+from mb8611.testing.emulator import Emulator, running
+import pytest
+
+if TYPE_CHECKING:
+    from pathlib import Path
+
+    from mb8611.api import MultipleHNAPAction, Response
+
+OPENSSL = shutil.which('openssl')
+
+
+@pytest.mark.skipif(OPENSSL is None, reason='openssl is not installed')
+def test_collector(tmp_path: Path) -> None:
+    assert OPENSSL is not None
+    certfile = tmp_path / 'cert.pem'
+    sp.run((OPENSSL, 'req', '-x509', '-newkey', 'rsa:2048', '-nodes', '-subj', '/CN=localhost',
+            '-days', '1', '-keyout', str(certfile), '-out', str(certfile)),
+           check=True,
+           capture_output=True)
+    emulator = Emulator('pass', max_concurrency=None)
+    with running(emulator, certfile=certfile) as server1, running(emulator,
+                                                                  certfile=certfile) as server2:
+        hosts = [server1.host, server2.host, '127.0.0.1:1']
+        actions: tuple[MultipleHNAPAction, ...] = ('GetMotoStatusSoftware',)
+        with Collector(hosts, actions, 'pass', processes=2) as collector:
+            assert sorted(len(hosts) for hosts in collector.shards.values()) == [1, 2]
+            results = {result.host: result for result in collector.poll()}
+            assert set(results) == set(hosts)
+            for host in hosts[:2]:
+                response = results[host].response
+                assert response is not None, results[host].error
+                assert response['GetMultipleHNAPsResponse']['GetMultipleHNAPsResult'] == 'OK'
+            assert results['127.0.0.1:1'].error is not None
+            # Clients stay logged in.
+            requests = emulator.requests
+            assert len(list(collector.poll())) == 3
+            assert emulator.requests == requests + 2
+            os.kill(next(iter(collector.shards)), signal.SIGKILL)
+            results = {result.host: result for result in collector.poll()}
+            assert set(results) == set(hosts)
+            assert results[hosts[0]].error is None
+            assert results[hosts[1]].error is None
+            assert [sorted(hosts) for hosts in collector.shards.values()] == [sorted(hosts)]
+
+
+class _BadHandler(BaseHTTPRequestHandler):
+    def do_POST(self) -> None:
+        self.rfile.read(int(self.headers['content-length']))
+        self.send_response(200)
+        self.send_header('content-type', 'application/json')
+        self.send_header('content-length', '2')
+        self.end_headers()
+        self.wfile.write(b'{}')
+
+    def log_message(self, fmt: str, *args: Any) -> None:
+        pass
+
+
+@pytest.mark.skipif(OPENSSL is None, reason='openssl is not installed')
+def test_collector_misbehaving_host(tmp_path: Path) -> None:
+    assert OPENSSL is not None
+    certfile = tmp_path / 'cert.pem'
+    sp.run((OPENSSL, 'req', '-x509', '-newkey', 'rsa:2048', '-nodes', '-subj', '/CN=localhost',
+            '-days', '1', '-keyout', str(certfile), '-out', str(certfile)),
+           check=True,
+           capture_output=True)
+    context = ssl.SSLContext(ssl.PROTOCOL_TLS_SERVER)
+    context.load_cert_chain(certfile)
+    with ThreadingHTTPServer(('127.0.0.1', 0),
+                             _BadHandler) as bad_server, running(Emulator('pass'),
+                                                                 certfile=certfile) as server:
+        bad_server.socket = context.wrap_socket(bad_server.socket, server_side=True)
+        threading.Thread(target=bad_server.serve_forever, daemon=True).start()
+        bad_host = f'127.0.0.1:{bad_server.server_address[1]}'
+        actions: tuple[MultipleHNAPAction, ...] = ('GetMotoStatusSoftware',)
+        with Collector((bad_host, server.host), actions, 'pass', processes=1) as collector:
+            pid = next(iter(collector.shards))
+            for _ in range(2):
+                results = {result.host: result for result in collector.poll()}
+                # The login response has no LoginResponse key.
+                assert isinstance(results[bad_host].error, KeyError)
+                assert results[server.host].error is None
+            assert list(collector.shards) == [pid]
+        bad_server.shutdown()
+
+
+def test_exceptions_can_be_pickled() -> None:
+    response: Response = {'GetMultipleHNAPsResponse': {'GetMultipleHNAPsResult': 'UN-AUTH'}}
+    assert pickle.loads(pickle.dumps(CallHNAPError(response))).response == response  # noqa: S301
+    assert isinstance(pickle.loads(pickle.dumps(LockedError())), LockedError)  # noqa: S301
+    assert pickle.loads(pickle.dumps(CircuitOpenError('host', 3))).retry_after == 3  # noqa: S301
@@ -0,0 +1,204 @@
+from __future__ import annotations
+
+from datetime import date, datetime, timezone
+from typing import TYPE_CHECKING
+import json
+
+from mb8611.columnar import PARTITIONING, WATERMARKS_FILE, ColumnarWriter, main
+from pyarrow import dataset as ds
+
+if TYPE_CHECKING:
+    from pathlib import Path
+
+    from click.testing import CliRunner
+    import pytest
+
+DOWNSTREAM = ('1^Locked^QAM256^21^567.0^ 4.1^40.9^12^3^|+|'
+              '2^Not Locked^OFDM PLC^33^690.0^-1.2^38.5^4000000000000^0^')
+UPSTREAM = '1^Locked^SC-QAM^1^5120^17.6^44.0^'
+LOG_1 = '12:00:00^Thu Jan 01 1970^Notice (6)^Started}-{'
+LOG_2 = f'{LOG_1}10:15:30^Tue Mar 04 2025^Critical (3)^No Ranging Response received'
+
+
+def test_columnar_writer(tmp_path: Path) -> None:
+    with ColumnarWriter(tmp_path, batch_size=2) as writer:
+        for ts, log in ((1740000000.0, LOG_1), (1740000010.0, LOG_1), (1740100000.0, LOG_2)):
+            writer.add_response(
+                '192.168.100.1', ts, {
+                    'GetMultipleHNAPsResponse': {
+                        'GetMotoStatusDownstreamChannelInfoResponse': {
+                            'MotoConnDownstreamChannel': DOWNSTREAM,
+                            'GetMotoStatusDownstreamChannelInfoResult': 'OK'
+                        },
+                        'GetMotoStatusLogResponse': {
+                            'MotoStatusLogList': log,
+                            'GetMotoStatusLogResult': 'OK'
+                        },
+                        'GetMultipleHNAPsResult': 'OK'
+                    }
+                })
+        assert writer.rows_written['downstream'] == 6
+    assert writer.rows_written == {'downstream': 6, 'upstream': 0, 'log': 2}
+    assert sorted(p.name for p in (tmp_path / 'downstream/host=192.168.100.1').iterdir()) == [
+        'date=2025-02-19', 'date=2025-02-21'
+    ]
+    downstream = ds.dataset(tmp_path / 'downstream', partitioning='hive').to_table()
+    assert downstream.num_rows == 6
+    assert str(downstream.schema.field('power').type) == 'float'
+    assert str(downstream.schema.field('corrected').type) == 'uint64'
+    row = downstream.sort_by([('ts', 'descending'), ('channel', 'descending')]).to_pylist()[0]
+    assert row['locked'] is False
+    assert row['modulation'] == 'OFDM PLC'
+    assert row['corrected'] == 4000000000000
+    assert row['ts'] == datetime(2025, 2, 21, 1, 6, 40, tzinfo=timezone.utc)
+    log = ds.dataset(tmp_path / 'log', partitioning='hive').to_table().sort_by('ts').to_pylist()
+    assert [(str(r['logged_at']), r['priority'], r['level'], r['message']) for r in log] == [
+        ('1970-01-01 12:00:00', 'Notice', 6, 'Started'),
+        ('2025-03-04 10:15:30', 'Critical', 3, 'No Ranging Response received'),
+    ]
+
+
+def test_main(runner: CliRunner, tmp_path: Path) -> None:
+    lines = [
+        json.dumps({
+            'timestamp': 1740000000.5,
+            'host': '192.168.100.1',
+            'latency': 0.2,
+            'responses': {
+                'up': {
+                    'MotoConnUpstreamChannel': [[
+                        '1', 'Locked', 'SC-QAM', '1', '5120', '17.6', '44.0'
+                    ], ['']],
+                    'GetMotoStatusUpstreamChannelInfoResult': 'OK'
+                }
+            }
+        }), '',
+        json.dumps({
+            'timestamp': 1740000010.5,
+            'host': '192.168.100.1',
+            'error': 'Timed out.'
+        }), 'not json',
+        json.dumps({
+            'timestamp': 1740000020.5,
+            'host': '192.168.100.2',
+            'latency': 0.2,
+            'responses': {
+                'GetMotoStatusUpstreamChannelInfo': {
+                    'MotoConnUpstreamChannel': UPSTREAM,
+                    'GetMotoStatusUpstreamChannelInfoResult': 'OK'
+                }
+            }
+        })
+    ]
+    run = runner.invoke(main, (str(tmp_path), '-f', 'csv'), input='\n'.join(lines))
+    assert run.exit_code == 0
+    assert 'Exported 2 samples: 0 downstream rows, 2 upstream rows, 0 log rows.' in run.stderr
+    upstream = ds.dataset(tmp_path / 'upstream',
+                          format='csv',
+                          partitioning=ds.partitioning(PARTITIONING, flavor='hive')).to_table()
+    assert sorted(upstream.column('host').to_pylist()) == ['192.168.100.1', '192.168.100.2']
+    assert upstream.column('date').to_pylist() == [date(2025, 2, 19)] * 2
+    assert upstream.column('symbol_rate').to_pylist() == [5120, 5120]
+
+
+def test_columnar_writer_skips_invalid_rows(tmp_path: Path,
+                                            caplog: pytest.LogCaptureFixture) -> None:
+    with ColumnarWriter(tmp_path) as writer:
+        writer.add_sections(
+            '192.168.100.1', 1740000000.0, {
+                'down': {
+                    'MotoConnDownstreamChannel': f'{DOWNSTREAM}|+|3^Locked^QAM256^x^1^2^3^4^5^'
+                },
+                'up': {
+                    'MotoConnUpstreamChannel': [['1', 'Locked', 'SC-QAM', '1', 'n/a', '1', '2'],
+                                                ['2', 'Locked'], ['']]
+                }
+            })
+    assert writer.rows_written == {'downstream': 2, 'upstream': 0, 'log': 0}
+    assert 'Skipping short MotoConnUpstreamChannel row: 2^Locked\n' in caplog.text
+    assert 'row: \n' not in caplog.text
+    assert 'Skipping invalid MotoConnDownstreamChannel row: 3^Locked^QAM256^x' in caplog.text
+    assert 'Skipping invalid MotoConnUpstreamChannel row: 1^Locked^SC-QAM^1^n/a' in caplog.text
+
+
+def test_columnar_writer_batches(tmp_path: Path) -> None:
+    with ColumnarWriter(tmp_path, batch_size=2) as writer:
+        writer.add_sections(
+            '192.168.100.1', 1740000000.0,
+            {'up': {
+                'MotoConnUpstreamChannel': f'{UPSTREAM}|+|{UPSTREAM}|+|{UPSTREAM}'
+            }})
+        assert writer.rows_written['upstream'] == 2
+        assert len(list((tmp_path / 'upstream').rglob('*.parquet'))) == 1
+    assert writer.rows_written['upstream'] == 3
+    assert len(list((tmp_path / 'upstream').rglob('*.parquet'))) == 2
+
+
+def test_columnar_writer_newest_first(tmp_path: Path) -> None:
+    newest_first = '}-{'.join(reversed(LOG_2.split('}-{')))
+    with ColumnarWriter(tmp_path, newest_first=True) as writer:
+        for ts, log in ((1740000000.0, LOG_1), (1740100000.0, newest_first)):
+            writer.add_sections('192.168.100.1', ts, {'log': {'MotoStatusLogList': log}})
+    log = ds.dataset(tmp_path / 'log', partitioning='hive').to_table().sort_by('ts').to_pylist()
+    assert [r['message'] for r in log] == ['Started', 'No Ranging Response received']
+
+
+def test_add_ndjson(tmp_path: Path, caplog: pytest.LogCaptureFixture) -> None:
+    lines = [
+        json.dumps({
+            'timestamp': 1740000000.5,
+            'host': '192.168.100.1',
+            'fields': {
+                'MotoHomeOnline': 'Connected'
+            }
+        }), '{"timestamp": 1', '',
+        json.dumps({
+            'timestamp': 1740000010.5,
+            'host': '192.168.100.1',
+            'responses': {
+                'up': {
+                    'MotoConnUpstreamChannel': UPSTREAM
+                }
+            }
+        })
+    ]
+    with ColumnarWriter(tmp_path) as writer:
+        assert writer.add_ndjson(lines) == 1
+    assert writer.rows_written == {'downstream': 0, 'upstream': 1, 'log': 0}
+    assert 'Skipping line 2 that is not valid JSON.' in caplog.text
+
+
+def test_main_arrow(runner: CliRunner, tmp_path: Path) -> None:
+    line = json.dumps({
+        'timestamp': 1740000000.5,
+        'host': '192.168.100.1',
+        'responses': {
+            'down': {
+                'MotoConnDownstreamChannel': DOWNSTREAM
+            }
+        }
+    })
+    run = runner.invoke(main, (str(tmp_path), '-f', 'arrow', '-b', '1'), input=line)
+    assert run.exit_code == 0
+    assert 'Exported 1 samples: 2 downstream rows, 0 upstream rows, 0 log rows.' in run.stderr
+    assert len(list((tmp_path / 'downstream').rglob('*.arrow'))) == 2
+    downstream = ds.dataset(tmp_path / 'downstream',
+                            format='arrow',
+                            partitioning=ds.partitioning(PARTITIONING, flavor='hive')).to_table()
+    assert sorted(downstream.column('channel').to_pylist()) == [1, 2]
+
+
+def test_columnar_writer_saves_log_watermarks(tmp_path: Path) -> None:
+    for ts, log in ((1740000000.0, LOG_1), (1740100000.0, LOG_2)):
+        with ColumnarWriter(tmp_path) as writer:
+            writer.add_sections('192.168.100.1', ts, {'log': {'MotoStatusLogList': log}})
+            writer.add_sections('192.168.100.2', ts, {'log': {'MotoStatusLogList': LOG_1}})
+    assert (tmp_path / WATERMARKS_FILE).exists()
+    assert writer.rows_written['log'] == 1
+    table = ds.dataset(tmp_path / 'log', partitioning='hive').to_table()
+    log = table.sort_by([('ts', 'ascending'), ('host', 'ascending')]).to_pylist()
+    assert [(r['host'], r['message']) for r in log] == [
+        ('192.168.100.1', 'Started'),
+        ('192.168.100.2', 'Started'),
+        ('192.168.100.1', 'No Ranging Response received'),
+    ]
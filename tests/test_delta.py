@@ -0,0 +1,128 @@
+from __future__ import annotations
+
+from mb8611.channels import DownstreamChannel, UpstreamChannel
+from mb8611.delta import (
+    ChannelChange,
+    ChannelRate,
+    DeltaTracker,
+    FieldChange,
+    Snapshot,
+    make_snapshot,
+)
+import pytest
+
+HOST = '192.168.100.1'
+
+
+def snapshot(ts: float,
+             uptime: int,
+             corrected: int,
+             uncorrected: int = 0,
+             *,
+             power: float = 2.8,
+             up_num: str = '5') -> Snapshot:
+    return Snapshot(
+        ts, uptime, {'MotoHomeUpNum': up_num},
+        (DownstreamChannel(1, 'Locked', 'QAM256', 20, 543.0, power, 43.4, corrected, uncorrected),),
+        (UpstreamChannel(1, 'Locked', 'SC-QAM', 3, 5120, 17.6, 40.3),))
+
+
+def test_make_snapshot() -> None:
+    snap = make_snapshot(
+        {
+            'GetMultipleHNAPsResponse': {
+                'GetHomeConnectionResponse': {
+                    'MotoHomeOnline': 'Connected',
+                    'MotoHomeDownNum': '32',
+                    'MotoHomeUpNum': '5',
+                    'GetHomeConnectionResult': 'OK'
+                },
+                'GetMotoStatusConnectionInfoResponse': {
+                    'MotoConnSystemUpTime': '1 days 00h:00m:10s',
+                    'MotoConnNetworkAccess': 'Allowed',
+                    'GetMotoStatusConnectionInfoResult': 'OK'
+                },
+                'GetMotoStatusDownstreamChannelInfoResponse': {
+                    'MotoConnDownstreamChannel': '1^Locked^QAM256^20^543.0^2.8^43.4^12^3^',
+                    'GetMotoStatusDownstreamChannelInfoResult': 'OK'
+                },
+                'GetMultipleHNAPsResult': 'OK'
+            }
+        }, 5)
+    assert snap.ts == 5
+    assert snap.uptime == 86410
+    assert snap.fields == {
+        'MotoHomeOnline': 'Connected',
+        'MotoHomeDownNum': '32',
+        'MotoHomeUpNum': '5',
+        'MotoConnNetworkAccess': 'Allowed'
+    }
+    assert snap.downstream[0].uncorrected == 3
+    assert not snap.upstream
+
+
+def test_first_snapshot_is_reported_in_full() -> None:
+    delta = DeltaTracker().update(HOST, snapshot(0, 100, 5))
+    assert delta
+    assert delta.interval is None
+    assert not delta.reset
+    assert not delta.rates
+    assert delta.fields == (FieldChange('MotoHomeUpNum', None, '5'),)
+    assert ChannelChange('down', 20, 'power', None, 2.8) in delta.channels
+    assert ChannelChange('up', 3, 'symbol_rate', None, 5120) in delta.channels
+    assert delta.to_dict()['channels']['down']['20']['lock_status'] == 'Locked'
+
+
+def test_only_changes_are_reported() -> None:
+    tracker = DeltaTracker()
+    tracker.update(HOST, snapshot(0, 100, 5))
+    delta = tracker.update(HOST, snapshot(10, 110, 5))
+    assert not delta
+    assert delta.to_dict() == {'host': HOST, 'timestamp': 10, 'interval': 10}
+    delta = tracker.update(HOST, snapshot(20, 120, 25, 1, up_num='4'))
+    assert delta.fields == (FieldChange('MotoHomeUpNum', '5', '4'),)
+    assert not delta.channels
+    assert delta.rates == (ChannelRate(20, 20, 1, 2.0, 0.1),)
+    assert delta.to_dict()['rates'] == {'20': {'corrected': 2.0, 'uncorrected': 0.1}}
+
+
+def test_counter_reset_on_restart() -> None:
+    tracker = DeltaTracker()
+    tracker.update(HOST, snapshot(0, 1000, 500))
+    delta = tracker.update(HOST, snapshot(60, 20, 40))
+    assert delta.reset
+    assert delta.to_dict()['reset'] is True
+    assert delta.rates == (ChannelRate(20, 40, 0, 2.0, 0.0),)
+
+
+def test_counter_reset_without_restart() -> None:
+    tracker = DeltaTracker()
+    tracker.update(HOST, snapshot(0, 1000, 500))
+    delta = tracker.update(HOST, snapshot(10, 1010, 30))
+    assert not delta.reset
+    assert delta.rates[0].corrected_rate == pytest.approx(3.0)
+
+
+def test_tolerance_and_removed_channels() -> None:
+    tracker = DeltaTracker({'power': 0.5})
+    tracker.update(HOST, snapshot(0, 100, 0))
+    assert not tracker.update(HOST, snapshot(10, 110, 0, power=3.1))
+    # Drift is measured from the last reported value.
+    assert tracker.update(HOST, snapshot(20, 120, 0, power=3.4)).channels == (ChannelChange(
+        'down', 20, 'power', 2.8, 3.4),)
+    delta = tracker.update(HOST, Snapshot(30, 130, {}, (), ()))
+    assert FieldChange('MotoHomeUpNum', '5', None) in delta.fields
+    assert delta.to_dict()['channels'] == {
+        'down': {
+            '20': {
+                'lock_status': None
+            }
+        },
+        'up': {
+            '3': {
+                'lock_status': None
+            }
+        }
+    }
+    tracker.reset(HOST)
+    assert tracker.update(HOST, snapshot(40, 140, 0)).interval is None
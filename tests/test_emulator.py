@@ -0,0 +1,127 @@
+from pathlib import Path
+import shutil
+import subprocess as sp
+import threading
+import time
+
+from click.testing import CliRunner
+from mb8611.channels import parse_downstream_channels, parse_upstream_channels
+from mb8611.client import Client, LockedError, LoginFailed
+from mb8611.testing.emulator import Emulator, EmulatorServer, main, running
+from mb8611.utils import parse_table_str, parse_uptime
+from pytest_mock.plugin import MockerFixture
+import pytest
+
+OPENSSL = shutil.which('openssl')
+
+
+def _client(server: EmulatorServer, password: str) -> Client:
+    client = Client(password, server.host, logout=False)
+    client.hnap1_endpoint = f'{server.scheme}://{server.host}/HNAP1/'
+    return client
+
+
+def test_login_and_get_multiple_hnaps() -> None:
+    with running(Emulator('pass', log_rows=10, seed=1)) as server, _client(server,
+                                                                           'pass') as client:
+        top = client.call_multiple_hnaps([
+            'GetMotoStatusConnectionInfo', 'GetMotoStatusDownstreamChannelInfo', 'GetMotoStatusLog',
+            'GetMotoStatusUpstreamChannelInfo'
+        ])['GetMultipleHNAPsResponse']
+        assert top['GetMultipleHNAPsResult'] == 'OK'
+        down = list(
+            parse_downstream_channels(
+                top['GetMotoStatusDownstreamChannelInfoResponse']['MotoConnDownstreamChannel']))
+        assert len(down) == 32
+        assert down[-1].modulation == 'OFDM PLC'
+        up = list(
+            parse_upstream_channels(
+                top['GetMotoStatusUpstreamChannelInfoResponse']['MotoConnUpstreamChannel']))
+        assert len(up) == 5
+        assert len(
+            list(parse_table_str(top['GetMotoStatusLogResponse']['MotoStatusLogList'],
+                                 '}-{'))) == 10
+        assert parse_uptime(top['GetMotoStatusConnectionInfoResponse']['MotoConnSystemUpTime']) < 60
+
+
+def test_login_failed_and_lockout() -> None:
+    with running(Emulator('pass', lockout_attempts=2)) as server:
+        for _ in range(2):
+            with pytest.raises(LoginFailed):
+                _client(server, 'wrong').login()
+        with pytest.raises(LockedError):
+            _client(server, 'pass').login()
+
+
+def test_un_auth() -> None:
+    with running(Emulator('pass', session_timeout=0.1)) as server, _client(server,
+                                                                           'pass') as client:
+        assert client.call_multiple_hnaps(
+            ['GetHomeAddress'])['GetMultipleHNAPsResponse']['GetMultipleHNAPsResult'] == 'OK'
+        private_key = client.private_key
+        client.private_key = 'wrong'
+        assert client.call_multiple_hnaps(
+            ['GetHomeAddress'],
+            check=False)['GetMultipleHNAPsResponse']['GetMultipleHNAPsResult'] == 'UN-AUTH'
+        client.private_key = private_key
+        time.sleep(0.2)
+        assert client.call_multiple_hnaps(
+            ['GetHomeAddress'],
+            check=False)['GetMultipleHNAPsResponse']['GetMultipleHNAPsResult'] == 'UN-AUTH'
+
+
+def test_clear_log() -> None:
+    with running(Emulator('pass')) as server, _client(server, 'pass') as client:
+        client.call_hnap(
+            'SetStatusLogSettings',
+            {'SetStatusLogSettings': {
+                'MotoStatusLogAction': '1',
+                'MotoStatusLogXXX': 'XXX'
+            }})
+        assert not client.call_multiple_hnaps([
+            'GetMotoStatusLog'
+        ])['GetMultipleHNAPsResponse']['GetMotoStatusLogResponse']['MotoStatusLogList']
+
+
+def test_latency_and_concurrency() -> None:
+    emulator = Emulator('pass', latency=0.05, max_concurrency=1)
+    with running(emulator) as server:
+        clients = [_client(server, 'pass') for _ in range(3)]
+        start = time.monotonic()
+        threads = [threading.Thread(target=client.login) for client in clients]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        assert time.monotonic() - start >= 0.3
+        assert emulator.requests == 6
+
+
+@pytest.mark.skipif(OPENSSL is None, reason='openssl is not installed')
+def test_https(tmp_path: Path) -> None:
+    assert OPENSSL is not None
+    certfile = tmp_path / 'cert.pem'
+    keyfile = tmp_path / 'key.pem'
+    sp.run((OPENSSL, 'req', '-x509', '-newkey', 'rsa:2048', '-nodes', '-subj', '/CN=localhost',
+            '-days', '1', '-keyout', str(keyfile), '-out', str(certfile)),
+           check=True,
+           capture_output=True)
+    emulator = Emulator('pass')
+    with running(emulator, certfile=certfile, keyfile=keyfile) as server:
+        assert server.scheme == 'https'
+        with Client('pass', server.host) as client:
+            assert client.call_multiple_hnaps(
+                ['GetMotoStatusSoftware'])['GetMultipleHNAPsResponse'][
+                    'GetMotoStatusSoftwareResponse']['StatusSoftwareSfVer'] == '8611-19.2.18'
+        assert client.call_multiple_hnaps(
+            ['GetHomeAddress'],
+            check=False)['GetMultipleHNAPsResponse']['GetMultipleHNAPsResult'] == 'UN-AUTH'
+
+
+def test_main(runner: CliRunner, mocker: MockerFixture) -> None:
+    server = mocker.patch('mb8611.testing.emulator.EmulatorServer')
+    server.return_value.__enter__.return_value.serve_forever.side_effect = KeyboardInterrupt
+    result = runner.invoke(main, ('-p', 'pass', '-P', '9999', '--latency', '0.5'))
+    assert result.exit_code == 0
+    assert server.call_args.args[0] == ('127.0.0.1', 9999)
+    assert server.call_args.args[1].latency == 0.5
@@ -0,0 +1,215 @@
+from urllib.error import HTTPError
+from urllib.request import urlopen
+import threading
+
+from click.testing import CliRunner
+from mb8611.breaker import CircuitBreaker
+from mb8611.client import Client
+from mb8611.exporter import Exporter, ExporterServer, main, render_metrics
+from pytest_mock.plugin import MockerFixture
+import pytest
+import requests_mock as req_mock
+
+LOGIN_RESPONSES = [{
+    'json': {
+        'LoginResponse': {
+            'Challenge': 'a',
+            'Cookie': 'uid',
+            'LoginResult': 'OK',
+            'PublicKey': 'a'
+        }
+    }
+}, {
+    'json': {
+        'LoginResponse': {
+            'LoginResult': 'OK'
+        }
+    }
+}]
+METRICS_RESPONSE = {
+    'json': {
+        'GetMultipleHNAPsResponse': {
+            'GetMotoStatusConnectionInfoResponse': {
+                'GetMotoStatusConnectionInfoResult': 'OK',
+                'MotoConnNetworkAccess': 'Allowed',
+                'MotoConnSystemUpTime': '1 days 00h:00m:05s'
+            },
+            'GetMotoStatusDownstreamChannelInfoResponse': {
+                'GetMotoStatusDownstreamChannelInfoResult':
+                    'OK',
+                'MotoConnDownstreamChannel': (
+                    '1^Locked^QAM256^20^519.0^ 8.5^43.2^1234^5^|+|'
+                    '2^Not Locked^OFDM PLC^33^690.0^ 2.1^40.1^9876543210^0^')
+            },
+            'GetMotoStatusSoftwareResponse': {
+                'GetMotoStatusSoftwareResult': 'OK',
+                'StatusSoftwareHdVer': 'V1.0',
+                'StatusSoftwareSfVer': '8611-19.2.18',
+                'StatusSoftwareSpecVer': 'DOCSIS 3.1'
+            },
+            'GetMotoStatusUpstreamChannelInfoResponse': {
+                'GetMotoStatusUpstreamChannelInfoResult': 'OK',
+                'MotoConnUpstreamChannel': '1^Locked^SC-QAM^1^5120^16.4^44.0^'
+            },
+            'GetMultipleHNAPsResult': 'OK'
+        }
+    }
+}
+
+
+def test_render_metrics() -> None:
+    text = render_metrics(METRICS_RESPONSE['json'], 0.5)  # type: ignore[arg-type]
+    lines = text.splitlines()
+    assert 'mb8611_up 1' in lines
+    assert 'mb8611_fetch_duration_seconds 0.5' in lines
+    assert 'mb8611_uptime_seconds 86405' in lines
+    assert ('mb8611_software_info{version="8611-19.2.18",hardware_version="V1.0",'
+            'spec_version="DOCSIS 3.1"} 1') in lines
+    assert 'mb8611_downstream_power_dbmv{channel_id="20",modulation="QAM256"} 8.5' in lines
+    assert 'mb8611_downstream_snr_db{channel_id="20",modulation="QAM256"} 43.2' in lines
+    assert 'mb8611_downstream_locked{channel_id="33",modulation="OFDM PLC"} 0' in lines
+    assert ('mb8611_downstream_corrected_total{channel_id="33",modulation="OFDM PLC"} '
+            '9876543210') in lines
+    assert 'mb8611_downstream_uncorrected_total{channel_id="20",modulation="QAM256"} 5' in lines
+    assert '# TYPE mb8611_downstream_corrected_total counter' in lines
+    assert 'mb8611_upstream_power_dbmv{channel_id="1",channel_type="SC-QAM"} 44.0' in lines
+    assert 'mb8611_upstream_locked{channel_id="1",channel_type="SC-QAM"} 1' in lines
+    assert text.endswith('\n')
+
+
+def test_render_metrics_failed() -> None:
+    lines = render_metrics(None).splitlines()
+    assert 'mb8611_up 0' in lines
+    assert not any(line.startswith('mb8611_downstream') for line in lines)
+
+
+def test_exporter_caches(requests_mock: req_mock.Mocker, mocker: MockerFixture) -> None:
+    monotonic = mocker.patch('mb8611.exporter.time.monotonic', return_value=100.0)
+    requests_mock.post('https://192.168.100.1/HNAP1/',
+                       [*LOGIN_RESPONSES, METRICS_RESPONSE, METRICS_RESPONSE])
+    exporter = Exporter(Client('pass'), min_interval=15)
+    threads = [threading.Thread(target=exporter.metrics) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    text = exporter.metrics()
+    assert 'mb8611_up 1' in text.splitlines()
+    assert requests_mock.call_count == 3
+    monotonic.return_value = 116.0
+    exporter.metrics()
+    assert requests_mock.call_count == 4
+
+
+def test_exporter_relogin(requests_mock: req_mock.Mocker) -> None:
+    requests_mock.post('https://192.168.100.1/HNAP1/', [
+        *LOGIN_RESPONSES, {
+            'json': {
+                'GetMultipleHNAPsResponse': {
+                    'GetMultipleHNAPsResult': 'UN-AUTH'
+                }
+            }
+        }, *LOGIN_RESPONSES, METRICS_RESPONSE
+    ])
+    assert 'mb8611_up 1' in Exporter(Client('pass')).metrics().splitlines()
+    assert requests_mock.call_count == 6
+
+
+def test_exporter_failure(requests_mock: req_mock.Mocker) -> None:
+    requests_mock.get('https://192.168.100.1/Logout.html')
+    requests_mock.post('https://192.168.100.1/HNAP1/', [
+        {
+            'json': {
+                'LoginResponse': {
+                    'LoginResult': 'FAILED'
+                }
+            }
+        },
+        *LOGIN_RESPONSES,
+        METRICS_RESPONSE,
+    ])
+    exporter = Exporter(Client('pass', breaker=CircuitBreaker(cooldown=0)), min_interval=0)
+    assert 'mb8611_up 0' in exporter.metrics().splitlines()
+    assert 'mb8611_up 1' in exporter.metrics().splitlines()
+    exporter.close()
+    assert requests_mock.request_history[-1].path == '/logout.html'
+    assert requests_mock.request_history[-1].verify is False
+
+
+def test_exporter_malformed_response(requests_mock: req_mock.Mocker, mocker: MockerFixture) -> None:
+    mocker.patch('mb8611.exporter.time.monotonic', return_value=100.0)
+    requests_mock.post('https://192.168.100.1/HNAP1/', [
+        *LOGIN_RESPONSES, {
+            'json': {
+                'GetMultipleHNAPsResponse': {
+                    'GetMotoStatusDownstreamChannelInfoResponse': {
+                        'MotoConnDownstreamChannel': '1^Locked^QAM256^x^567.0^4.1^40.9^12^3^',
+                        'GetMotoStatusDownstreamChannelInfoResult': 'OK'
+                    },
+                    'GetMultipleHNAPsResult': 'OK'
+                }
+            }
+        }
+    ])
+    exporter = Exporter(Client('pass'), min_interval=15)
+    assert 'mb8611_up 0' in exporter.metrics().splitlines()
+    assert 'mb8611_up 0' in exporter.metrics().splitlines()
+    assert requests_mock.call_count == 3
+
+
+def test_exporter_locked(requests_mock: req_mock.Mocker) -> None:
+    requests_mock.post('https://192.168.100.1/HNAP1/',
+                       json={'LoginResponse': {
+                           'LoginResult': 'FAILED'
+                       }})
+    exporter = Exporter(Client('pass'), min_interval=0)
+    assert 'mb8611_up 0' in exporter.metrics().splitlines()
+    assert 'mb8611_up 0' in exporter.metrics().splitlines()
+    assert requests_mock.call_count == 1
+
+
+def test_exporter_keeps_session(requests_mock: req_mock.Mocker) -> None:
+    requests_mock.post('https://192.168.100.1/HNAP1/', [
+        *LOGIN_RESPONSES, {
+            'status_code': 200,
+            'text': 'garbage'
+        }, {
+            'json': {
+                'GetMultipleHNAPsResponse': {
+                    'GetMultipleHNAPsResult': 'ERROR'
+                }
+            }
+        }, METRICS_RESPONSE
+    ])
+    exporter = Exporter(Client('pass'), min_interval=0)
+    assert 'mb8611_up 0' in exporter.metrics().splitlines()
+    assert 'mb8611_up 0' in exporter.metrics().splitlines()
+    assert 'mb8611_up 1' in exporter.metrics().splitlines()
+    assert requests_mock.call_count == 5
+
+
+def test_exporter_server(mocker: MockerFixture) -> None:
+    exporter = mocker.Mock(spec=Exporter)
+    exporter.metrics.return_value = 'mb8611_up 1\n'
+    with ExporterServer(('127.0.0.1', 0), exporter) as server:
+        thread = threading.Thread(target=server.serve_forever, daemon=True)
+        thread.start()
+        base = f'http://127.0.0.1:{server.server_address[1]}'
+        with urlopen(f'{base}/metrics') as response:  # noqa: S310
+            assert response.headers['Content-Type'].startswith('text/plain; version=0.0.4')
+            assert response.read() == b'mb8611_up 1\n'
+        with pytest.raises(HTTPError, match='404'):
+            urlopen(f'{base}/other')  # noqa: S310
+        server.shutdown()
+        thread.join()
+
+
+def test_main(runner: CliRunner, mocker: MockerFixture) -> None:
+    server = mocker.patch('mb8611.exporter.ExporterServer')
+    server.return_value.__enter__.return_value.serve_forever.side_effect = KeyboardInterrupt
+    exporter = mocker.patch('mb8611.exporter.Exporter')
+    result = runner.invoke(main, ('-p', 'pass', '-P', '9999', '-i', '30'))
+    assert result.exit_code == 0
+    assert server.call_args.args[0] == ('', 9999)
+    assert exporter.call_args.kwargs['min_interval'] == 30
+    exporter.return_value.close.assert_called_once_with()
@@ -0,0 +1,109 @@
+from mb8611.client import Client, LockedError
+from mb8611.fleet import poll
+from requests import ConnectionError as RequestsConnectionError
+import requests_mock as req_mock
+
+LOGIN_RESPONSES = [{
+    'json': {
+        'LoginResponse': {
+            'Challenge': 'a',
+            'Cookie': 'uid',
+            'LoginResult': 'OK',
+            'PublicKey': 'a'
+        }
+    }
+}, {
+    'json': {
+        'LoginResponse': {
+            'LoginResult': 'OK'
+        }
+    }
+}]
+
+
+def test_poll(requests_mock: req_mock.Mocker) -> None:
+    for host in ('192.168.12.1', '192.168.12.2'):
+        requests_mock.get(f'https://{host}/Logout.html')
+        requests_mock.post(f'https://{host}/HNAP1/', [
+            *LOGIN_RESPONSES, {
+                'json': {
+                    'GetMultipleHNAPsResponse': {
+                        'GetHomeAddressResponse': {
+                            'MotoHomeIpAddress': host,
+                            'GetHomeAddressResult': 'OK'
+                        },
+                        'GetMultipleHNAPsResult': 'OK'
+                    }
+                }
+            }
+        ])
+    requests_mock.post('https://192.168.12.3/HNAP1/',
+                       json={'LoginResponse': {
+                           'LoginResult': 'FAILED'
+                       }})
+    results = {
+        r.host: r
+        for r in poll(('192.168.12.1', '192.168.12.2', '192.168.12.3'), ['GetHomeAddress'],
+                      'pass',
+                      max_workers=2)
+    }
+    assert len(results) == 3
+    for host in ('192.168.12.1', '192.168.12.2'):
+        assert results[host].error is None
+        response = results[host].response
+        assert response is not None
+        assert response['GetMultipleHNAPsResponse']['GetHomeAddressResponse'][
+            'MotoHomeIpAddress'] == host
+    assert results['192.168.12.3'].response is None
+    assert isinstance(results['192.168.12.3'].error, LockedError)
+
+
+def test_poll_client_factory(requests_mock: req_mock.Mocker) -> None:
+    requests_mock.get('https://192.168.12.1/Logout.html')
+    requests_mock.post('https://192.168.12.1/HNAP1/', [
+        *LOGIN_RESPONSES, {
+            'json': {
+                'GetMultipleHNAPsResponse': {
+                    'GetMultipleHNAPsResult': 'OK'
+                }
+            }
+        }
+    ])
+    created: list[Client] = []
+
+    def factory(host: str) -> Client:
+        created.append(Client('other', host, 'user'))
+        return created[-1]
+
+    results = list(poll(('192.168.12.1',), ['GetHomeAddress'], client_factory=factory))
+    assert results[0].error is None
+    assert created[0].username == 'user'
+
+
+def test_poll_misbehaving_hosts(requests_mock: req_mock.Mocker) -> None:
+    requests_mock.post('https://192.168.12.1/HNAP1/', json={'LoginResponse': {}})
+    requests_mock.post('https://192.168.12.2/HNAP1/', text='garbage')
+    requests_mock.get('https://192.168.12.3/Logout.html', exc=RequestsConnectionError)
+    requests_mock.post('https://192.168.12.3/HNAP1/', [
+        *LOGIN_RESPONSES, {
+            'json': {
+                'GetMultipleHNAPsResponse': {
+                    'GetMultipleHNAPsResult': 'OK'
+                }
+            }
+        }
+    ])
+    results = {
+        r.host: r
+        for r in poll(('192.168.12.1', '192.168.12.2', '192.168.12.3'), ['GetHomeAddress'])
+    }
+    assert results['192.168.12.1'].response is None
+    assert isinstance(results['192.168.12.1'].error, KeyError)
+    assert results['192.168.12.2'].response is None
+    assert isinstance(results['192.168.12.2'].error, ValueError)
+    assert results['192.168.12.3'].error is None
+    assert results['192.168.12.3'].response == {
+        'GetMultipleHNAPsResponse': {
+            'GetMultipleHNAPsResult': 'OK'
+        }
+    }
@@ -0,0 +1,104 @@
+from __future__ import annotations
+
+from typing import TYPE_CHECKING, Any, cast
+
+from mb8611.logs import LogFollower, WatermarkStore, new_log_rows
+
+if TYPE_CHECKING:
+    from pathlib import Path
+
+    from mb8611.client import Client
+
+ROWS = [[f'12:00:0{i}', 'Thu Jan 01 1970', 'Notice (6)', f'Message {i % 3}'] for i in range(6)]
+
+
+def test_new_log_rows_first_run() -> None:
+    rows, watermark = new_log_rows(ROWS[:3], None)
+    assert rows == ROWS[:3]
+    assert watermark is not None
+    assert watermark['count'] == 3
+    assert len(watermark['tail']) == 3
+
+
+def test_new_log_rows_only_new() -> None:
+    _, watermark = new_log_rows(ROWS[:3], None)
+    rows, watermark = new_log_rows(ROWS[:5], watermark)
+    assert rows == ROWS[3:5]
+    rows, watermark = new_log_rows(ROWS[:5], watermark)
+    assert not rows
+    rows, _ = new_log_rows(ROWS, watermark)
+    assert rows == ROWS[5:]
+
+
+def test_new_log_rows_repeated_messages() -> None:
+    repeated = [['a', 'b', 'c', 'same']] * 4
+    _, watermark = new_log_rows(repeated[:2], None)
+    rows, _ = new_log_rows(repeated, watermark)
+    assert rows == repeated[2:]
+
+
+def test_new_log_rows_oldest_dropped() -> None:
+    _, watermark = new_log_rows(ROWS[:4], None)
+    rows, _ = new_log_rows(ROWS[2:], watermark)
+    assert rows == ROWS[4:]
+
+
+def test_new_log_rows_cleared() -> None:
+    _, watermark = new_log_rows(ROWS[:4], None)
+    rows, _ = new_log_rows([['13:00:00', 'Thu Jan 01 1970', 'Notice (6)', 'Cleared']], watermark)
+    assert len(rows) == 1
+
+
+def test_new_log_rows_empty() -> None:
+    _, watermark = new_log_rows(ROWS[:2], None)
+    rows, same = new_log_rows([], watermark)
+    assert not rows
+    assert same is watermark
+
+
+class FakeClient:
+    host = 'host'
+
+    def __init__(self, rows: list[list[str]]) -> None:
+        self.rows = rows
+
+    def call_multiple_hnaps(self, actions: Any, *, check: bool = True) -> Any:
+        return {
+            'GetMultipleHNAPsResponse': {
+                'GetMotoStatusLogResponse': {
+                    'MotoStatusLogList': '}-{'.join('^'.join(row) for row in self.rows),
+                    'GetMotoStatusLogResult': 'OK'
+                },
+                'GetMultipleHNAPsResult': 'OK'
+            }
+        }
+
+
+def test_log_follower(tmp_path: Path) -> None:
+    store = WatermarkStore(tmp_path / 'w.json')
+    fake = FakeClient(ROWS[:2])
+    follower = LogFollower(cast('Client', fake), store)
+    assert follower.poll() == ROWS[:2]
+    # Not saved until the rows are handled.
+    assert store.get('host') is None
+    assert LogFollower(cast('Client', fake), store).poll() == ROWS[:2]
+    follower.save()
+    fake.rows = ROWS[:3]
+    follower = LogFollower(cast('Client', fake), store)
+    assert follower.poll() == ROWS[2:3]
+    assert not follower.poll()
+    stored = store.get('host')
+    assert stored is not None
+    assert stored['count'] == 3
+
+
+def test_log_follower_newest_first() -> None:
+    fake = FakeClient(list(reversed(ROWS[:2])))
+    follower = LogFollower(cast('Client', fake), newest_first=True)
+    assert follower.poll() == ROWS[:2]
+    fake.rows = list(reversed(ROWS[:3]))
+    assert follower.poll() == ROWS[2:3]
+
+
+def test_log_follower_empty_log() -> None:
+    assert not LogFollower(cast('Client', FakeClient([]))).poll()
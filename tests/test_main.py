@@ -4,6 +4,7 @@ from click.testing import CliRunner
 from mb8611.client import CallHNAPError, LoginFailed
 from mb8611.main import main
 from pytest_mock.plugin import MockerFixture
+from requests import RequestException
 
 
 def test_main_login_failed(mocker: MockerFixture, runner: CliRunner) -> None:
@@ -15,7 +16,7 @@ def test_main_login_failed(mocker: MockerFixture, runner: CliRunner) -> None:
 
 def test_main_hnap_error(mocker: MockerFixture, runner: CliRunner) -> None:
     client = mocker.patch('mb8611.main.Client')
-    client.return_value.__enter__.return_value.call_hnap.side_effect = CallHNAPError(
+    client.return_value.__enter__.return_value.call_multiple_hnaps.side_effect = CallHNAPError(
         {'GetMultipleHNAPsResponse': {
             'GetMultipleHNAPsResult': 'UN-AUTH'
         }})
@@ -25,16 +26,19 @@ def test_main_hnap_error(mocker: MockerFixture, runner: CliRunner) -> None:
 
 def test_main(mocker: MockerFixture, runner: CliRunner) -> None:
     client = mocker.patch('mb8611.main.Client')
-    client.return_value.__enter__.return_value.call_hnap.return_value = {
-        'GetMotoStatusSoftwareResponse': {
-            'StatusSoftwareSpecVer': 'DOCSIS 3.1',
-            'StatusSoftwareHdVer': 'V1.0',
-            'StatusSoftwareSfVer': '8611-19.2.18',
-            'StatusSoftwareMac': '00:AA:BB:CC:DD:EE',
-            'StatusSoftwareSerialNum': 'FFFF-MB8611-eE-FFF',
-            'StatusSoftwareCertificate': 'Installed',
-            'StatusSoftwareCustomerVer': 'Prod_19.2_d31',
-            'GetMotoStatusSoftwareResult': 'OK'
+    client.return_value.__enter__.return_value.call_multiple_hnaps.return_value = {
+        'GetMultipleHNAPsResponse': {
+            'GetMotoStatusSoftwareResponse': {
+                'StatusSoftwareSpecVer': 'DOCSIS 3.1',
+                'StatusSoftwareHdVer': 'V1.0',
+                'StatusSoftwareSfVer': '8611-19.2.18',
+                'StatusSoftwareMac': '00:AA:BB:CC:DD:EE',
+                'StatusSoftwareSerialNum': 'FFFF-MB8611-eE-FFF',
+                'StatusSoftwareCertificate': 'Installed',
+                'StatusSoftwareCustomerVer': 'Prod_19.2_d31',
+                'GetMotoStatusSoftwareResult': 'OK'
+            },
+            'GetMultipleHNAPsResult': 'OK'
         }
     }
     run = runner.invoke(main, ('software',))
@@ -51,12 +55,15 @@ StatusSoftwareSpecVer: DOCSIS 3.1
 
 def test_main_table_keys(mocker: MockerFixture, runner: CliRunner) -> None:
     client = mocker.patch('mb8611.main.Client')
-    client.return_value.__enter__.return_value.call_hnap.return_value = {
-        'GetMotoStatusUpstreamChannelInfoResponse': {
-            'MotoConnUpstreamChannel':
-                '1^Locked^SC-QAM^1^5120^17.6^40.3^|+|1^Locked^SC-QAM^1^5120^17.6^40.3^',
-            'GetMotoStatusUpstreamChannelInfoResult':
-                'OK'
+    client.return_value.__enter__.return_value.call_multiple_hnaps.return_value = {
+        'GetMultipleHNAPsResponse': {
+            'GetMotoStatusUpstreamChannelInfoResponse': {
+                'MotoConnUpstreamChannel':
+                    '1^Locked^SC-QAM^1^5120^17.6^40.3^|+|1^Locked^SC-QAM^1^5120^17.6^40.3^',
+                'GetMotoStatusUpstreamChannelInfoResult':
+                    'OK'
+            },
+            'GetMultipleHNAPsResult': 'OK'
         }
     }
     run = runner.invoke(main, ('up',))
@@ -67,12 +74,15 @@ def test_main_table_keys(mocker: MockerFixture, runner: CliRunner) -> None:
 
 def test_main_table_keys_json(mocker: MockerFixture, runner: CliRunner) -> None:
     client = mocker.patch('mb8611.main.Client')
-    client.return_value.__enter__.return_value.call_hnap.return_value = {
-        'GetMotoStatusUpstreamChannelInfoResponse': {
-            'MotoConnUpstreamChannel':
-                '1^Locked^SC-QAM^1^5120^17.6^40.3^|+|1^Locked^SC-QAM^1^5120^17.6^40.3^',
-            'GetMotoStatusUpstreamChannelInfoResult':
-                'OK'
+    client.return_value.__enter__.return_value.call_multiple_hnaps.return_value = {
+        'GetMultipleHNAPsResponse': {
+            'GetMotoStatusUpstreamChannelInfoResponse': {
+                'MotoConnUpstreamChannel':
+                    '1^Locked^SC-QAM^1^5120^17.6^40.3^|+|1^Locked^SC-QAM^1^5120^17.6^40.3^',
+                'GetMotoStatusUpstreamChannelInfoResult':
+                    'OK'
+            },
+            'GetMultipleHNAPsResult': 'OK'
         }
     }
     run = runner.invoke(main, ('up', '--json'))
@@ -102,7 +112,308 @@ def test_main_json(mocker: MockerFixture, runner: CliRunner) -> None:
         }
     }
     response_json = json.dumps(response['GetMotoStatusSoftwareResponse'], indent=2)
-    client.return_value.__enter__.return_value.call_hnap.return_value = response
+    client.return_value.__enter__.return_value.call_multiple_hnaps.return_value = {
+        'GetMultipleHNAPsResponse': {
+            **response, 'GetMultipleHNAPsResult': 'OK'
+        }
+    }
     run = runner.invoke(main, ('software', '--json'))
     assert run.exit_code == 0
     assert run.stdout == f'{response_json}\n'
+
+
+def test_main_session_cache(mocker: MockerFixture, runner: CliRunner) -> None:
+    client = mocker.patch('mb8611.main.Client')
+    cache = mocker.patch('mb8611.main.SessionCache')
+    client.return_value.__enter__.return_value.call_multiple_hnaps.return_value = {
+        'GetMultipleHNAPsResponse': {
+            'GetHomeConnectionResponse': {
+                'MotoHomeOnline': 'Connected',
+                'GetHomeConnectionResult': 'OK'
+            },
+            'GetMultipleHNAPsResult': 'OK'
+        }
+    }
+    run = runner.invoke(main, ('conn', '--session-cache'))
+    assert run.exit_code == 0
+    client.assert_called_once_with('',
+                                   '192.168.100.1',
+                                   'admin',
+                                   session_cache=cache.return_value,
+                                   logout=False,
+                                   adapter=None)
+
+
+def test_main_pin_certificate(mocker: MockerFixture, runner: CliRunner) -> None:
+    client = mocker.patch('mb8611.main.Client')
+    pinned_adapter = mocker.patch('mb8611.tls.pinned_adapter')
+    client.return_value.__enter__.return_value.call_multiple_hnaps.return_value = {
+        'GetMultipleHNAPsResponse': {
+            'GetHomeConnectionResponse': {
+                'MotoHomeOnline': 'Connected',
+                'GetHomeConnectionResult': 'OK'
+            },
+            'GetMultipleHNAPsResult': 'OK'
+        }
+    }
+    filterwarnings = mocker.patch('mb8611.main.warnings.filterwarnings')
+    run = runner.invoke(main, ('conn', '--pin-certificate'))
+    assert run.exit_code == 0
+    pinned_adapter.assert_called_once_with('192.168.100.1')
+    assert client.call_args.kwargs['adapter'] is pinned_adapter.return_value
+    filterwarnings.assert_not_called()
+
+
+def test_main_pin_certificate_unreachable(mocker: MockerFixture, runner: CliRunner) -> None:
+    client = mocker.patch('mb8611.main.Client')
+    mocker.patch('mb8611.tls.pinned_adapter', side_effect=ConnectionRefusedError('refused'))
+    run = runner.invoke(main, ('conn', '--pin-certificate'))
+    assert run.exit_code == 1
+    assert 'Failed to get the certificate of 192.168.100.1: refused' in run.stderr
+    client.assert_not_called()
+
+
+MULTIPLE_RESPONSE = {
+    'GetMultipleHNAPsResponse': {
+        'GetHomeConnectionResponse': {
+            'MotoHomeOnline': 'Connected',
+            'MotoHomeDownNum': '32',
+            'GetHomeConnectionResult': 'OK'
+        },
+        'GetMotoStatusUpstreamChannelInfoResponse': {
+            'MotoConnUpstreamChannel': '1^Locked^SC-QAM^1^5120^17.6^40.3^',
+            'GetMotoStatusUpstreamChannelInfoResult': 'OK'
+        },
+        'GetMultipleHNAPsResult': 'OK'
+    }
+}
+
+
+def test_main_multiple(mocker: MockerFixture, runner: CliRunner) -> None:
+    client = mocker.patch('mb8611.main.Client')
+    c = client.return_value.__enter__.return_value
+    c.call_multiple_hnaps.return_value = MULTIPLE_RESPONSE
+    run = runner.invoke(main, ('conn', 'up'))
+    assert run.exit_code == 0
+    c.call_multiple_hnaps.assert_called_once_with(
+        ['GetHomeConnection', 'GetMotoStatusUpstreamChannelInfo'], check=True)
+    assert run.stdout == """conn:
+  MotoHomeDownNum: 32
+  MotoHomeOnline: Connected
+up:
+  [['1', 'Locked', 'SC-QAM', '1', '5120', '17.6', '40.3', '']]
+"""
+
+
+def test_main_multiple_json(mocker: MockerFixture, runner: CliRunner) -> None:
+    client = mocker.patch('mb8611.main.Client')
+    c = client.return_value.__enter__.return_value
+    c.call_multiple_hnaps.return_value = MULTIPLE_RESPONSE
+    c.call_hnap.return_value = {
+        'SetStatusLogSettingsResponse': {
+            'SetStatusLogSettingsResult': 'OK'
+        }
+    }
+    run = runner.invoke(main, ('conn', 'upstream', 'clear-log', '--json'))
+    assert run.exit_code == 0
+    c.call_hnap.assert_called_once_with(
+        'SetStatusLogSettings',
+        {'SetStatusLogSettings': {
+            'MotoStatusLogAction': '1',
+            'MotoStatusLogXXX': 'XXX'
+        }},
+        check=False)
+    assert json.loads(run.stdout) == {
+        'conn': {
+            'MotoHomeOnline': 'Connected',
+            'MotoHomeDownNum': '32',
+            'GetHomeConnectionResult': 'OK'
+        },
+        'upstream': {
+            'MotoConnUpstreamChannel': [['1', 'Locked', 'SC-QAM', '1', '5120', '17.6', '40.3', '']],
+            'GetMotoStatusUpstreamChannelInfoResult': 'OK'
+        },
+        'clear-log': {
+            'SetStatusLogSettingsResult': 'OK'
+        }
+    }
+
+
+def test_main_watch(mocker: MockerFixture, runner: CliRunner) -> None:
+    client = mocker.patch('mb8611.main.Client')
+    c = client.return_value.__enter__.return_value
+    c.host = '192.168.100.1'
+    c.call_multiple_hnaps.side_effect = [MULTIPLE_RESPONSE, RequestException('timed out')]
+    sleep = mocker.patch('mb8611.main.time.sleep', side_effect=[None, KeyboardInterrupt])
+    run = runner.invoke(main, ('conn', 'up', '--watch', '5'))
+    assert run.exit_code == 0
+    assert sleep.call_count == 2
+    assert c.call_multiple_hnaps.call_count == 2
+    lines = [json.loads(line) for line in run.stdout.splitlines()]
+    assert len(lines) == 2
+    assert lines[0]['host'] == '192.168.100.1'
+    assert 'latency' in lines[0]
+    assert lines[0]['responses']['up']['MotoConnUpstreamChannel'] == [[
+        '1', 'Locked', 'SC-QAM', '1', '5120', '17.6', '40.3', ''
+    ]]
+    assert lines[1]['error'] == 'timed out'
+    client.assert_called_once()
+
+
+def test_main_watch_relogin(mocker: MockerFixture, runner: CliRunner) -> None:
+    client = mocker.patch('mb8611.main.Client')
+    c = client.return_value.__enter__.return_value
+    c.host = '192.168.100.1'
+    c.call_multiple_hnaps.side_effect = [{
+        'GetMultipleHNAPsResponse': {
+            'GetMultipleHNAPsResult': 'UN-AUTH'
+        }
+    }, MULTIPLE_RESPONSE]
+    mocker.patch('mb8611.main.time.sleep', side_effect=KeyboardInterrupt)
+    run = runner.invoke(main, ('conn', 'up', '--watch', '5'))
+    assert run.exit_code == 0
+    c.login.assert_called_once_with()
+    assert c.private_key == 'withoutloginkey'
+    assert 'up' in json.loads(run.stdout)['responses']
+
+
+def test_main_watch_skips_missed_samples(mocker: MockerFixture, runner: CliRunner) -> None:
+    client = mocker.patch('mb8611.main.Client')
+    c = client.return_value.__enter__.return_value
+    c.host = '192.168.100.1'
+    c.call_multiple_hnaps.return_value = MULTIPLE_RESPONSE
+    # Start, then the first sample takes 12 seconds and the second 1 second.
+    mocker.patch('mb8611.main.time.monotonic', side_effect=[0, 0, 12, 12, 12, 13, 13])
+    sleep = mocker.patch('mb8611.main.time.sleep', side_effect=[None, KeyboardInterrupt])
+    run = runner.invoke(main, ('conn', 'up', '--watch', '5'))
+    assert run.exit_code == 0
+    assert [call.args[0] for call in sleep.call_args_list] == [0, 4]
+
+
+def test_main_watch_changes(mocker: MockerFixture, runner: CliRunner) -> None:
+    client = mocker.patch('mb8611.main.Client')
+    c = client.return_value.__enter__.return_value
+    c.host = '192.168.100.1'
+    c.call_multiple_hnaps.side_effect = [MULTIPLE_RESPONSE, MULTIPLE_RESPONSE]
+    mocker.patch('mb8611.main.time.sleep', side_effect=[None, KeyboardInterrupt])
+    run = runner.invoke(main, ('conn', 'up', '--watch', '5', '--changes'))
+    assert run.exit_code == 0
+    lines = [json.loads(line) for line in run.stdout.splitlines()]
+    assert len(lines) == 1
+    assert lines[0]['fields']['MotoHomeOnline'] == 'Connected'
+    assert lines[0]['channels']['up']['1']['lock_status'] == 'Locked'
+
+
+def test_main_watch_invalid_responses(mocker: MockerFixture, runner: CliRunner) -> None:
+    client = mocker.patch('mb8611.main.Client')
+    c = client.return_value.__enter__.return_value
+    c.host = '192.168.100.1'
+    c.call_multiple_hnaps.side_effect = [
+        ValueError('Expecting value'), {
+            'GetMultipleHNAPsResponse': {
+                'GetMotoStatusConnectionInfoResponse': {
+                    'MotoConnSystemUpTime': 'not an uptime',
+                    'GetMotoStatusConnectionInfoResult': 'OK'
+                },
+                'GetMultipleHNAPsResult': 'OK'
+            }
+        }
+    ]
+    sleep = mocker.patch('mb8611.main.time.sleep', side_effect=[None, KeyboardInterrupt])
+    run = runner.invoke(main, ('conninfo', '--watch', '5', '--changes'))
+    assert run.exit_code == 0
+    assert sleep.call_count == 2
+    lines = [json.loads(line) for line in run.stdout.splitlines()]
+    assert len(lines) == 2
+    assert lines[0]['error'] == 'Expecting value'
+    assert 'not an uptime' in lines[1]['error']
+
+
+def test_main_changes_without_watch(mocker: MockerFixture, runner: CliRunner) -> None:
+    client = mocker.patch('mb8611.main.Client')
+    run = runner.invoke(main, ('conn', '--changes'))
+    assert run.exit_code == 2
+    assert '--changes can only be used with --watch.' in run.stderr
+    client.assert_not_called()
+
+
+def test_main_watch_write_action(mocker: MockerFixture, runner: CliRunner) -> None:
+    client = mocker.patch('mb8611.main.Client')
+    run = runner.invoke(main, ('conn', 'reboot', '--watch', '5'))
+    assert run.exit_code == 2
+    client.assert_not_called()
+
+
+def test_main_ndjson(mocker: MockerFixture, runner: CliRunner) -> None:
+    client = mocker.patch('mb8611.main.Client')
+    client.return_value.__enter__.return_value.call_multiple_hnaps.return_value = {
+        'GetMultipleHNAPsResponse': {
+            'GetMotoStatusLogResponse': {
+                'MotoStatusLogList': '12:00:00^Thu Jan 01 1970^Notice (6)^A}-{12:00:01^'
+                                     'Thu Jan 01 1970^Critical (3)^B',
+                'GetMotoStatusLogResult': 'OK'
+            },
+            'GetMultipleHNAPsResult': 'OK'
+        }
+    }
+    run = runner.invoke(main, ('log', '--ndjson'))
+    assert run.exit_code == 0
+    assert [json.loads(line) for line in run.stdout.splitlines()] == [{
+        'action': 'log',
+        'key': 'MotoStatusLogList',
+        'row': ['12:00:00', 'Thu Jan 01 1970', 'Notice (6)', 'A']
+    }, {
+        'action': 'log',
+        'key': 'MotoStatusLogList',
+        'row': ['12:00:01', 'Thu Jan 01 1970', 'Critical (3)', 'B']
+    }, {
+        'action': 'log',
+        'key': 'GetMotoStatusLogResult',
+        'value': 'OK'
+    }]
+
+
+def test_main_follow(mocker: MockerFixture, runner: CliRunner) -> None:
+    mocker.patch('mb8611.main.Client')
+    follower = mocker.patch('mb8611.main.LogFollower')
+    follower.return_value.poll.side_effect = [[['12:00:00', 'Thu Jan 01 1970', 'Notice (6)', 'A']],
+                                              RequestException('timed out'),
+                                              ValueError('Expecting value')]
+    sleep = mocker.patch('mb8611.main.time.sleep', side_effect=[None, None, KeyboardInterrupt])
+    run = runner.invoke(main, ('log', '--follow', '--watch', '30'))
+    assert run.exit_code == 0
+    sleep.assert_called_with(30)
+    assert run.stdout == '12:00:00\tThu Jan 01 1970\tNotice (6)\tA\n'
+    assert run.stderr == 'timed out\nExpecting value\n'
+    follower.return_value.save.assert_called_once_with()
+
+
+def test_main_follow_json(mocker: MockerFixture, runner: CliRunner) -> None:
+    mocker.patch('mb8611.main.Client')
+    follower = mocker.patch('mb8611.main.LogFollower')
+    follower.return_value.poll.return_value = [['12:00:00', 'Thu Jan 01 1970', 'Notice (6)', 'A']]
+    mocker.patch('mb8611.main.time.sleep', side_effect=KeyboardInterrupt)
+    run = runner.invoke(main, ('log', '--follow', '--json'))
+    assert run.exit_code == 0
+    assert json.loads(run.stdout) == ['12:00:00', 'Thu Jan 01 1970', 'Notice (6)', 'A']
+
+
+def test_main_follow_newest_first(mocker: MockerFixture, runner: CliRunner) -> None:
+    client = mocker.patch('mb8611.main.Client')
+    follower = mocker.patch('mb8611.main.LogFollower')
+    follower.return_value.poll.return_value = []
+    mocker.patch('mb8611.main.time.sleep', side_effect=KeyboardInterrupt)
+    run = runner.invoke(main, ('log', '--follow', '--newest-first'))
+    assert run.exit_code == 0
+    assert follower.call_args.args[0] is client.return_value.__enter__.return_value
+    assert follower.call_args.kwargs['newest_first'] is True
+
+
+def test_main_newest_first_without_follow(runner: CliRunner) -> None:
+    run = runner.invoke(main, ('log', '--newest-first'))
+    assert run.exit_code == 2
+
+
+def test_main_follow_not_log(runner: CliRunner) -> None:
+    run = runner.invoke(main, ('log', 'up', '--follow'))
+    assert run.exit_code == 2
@@ -0,0 +1,56 @@
+from mb8611.response_cache import ResponseCache
+from pytest_mock.plugin import MockerFixture
+
+HOST = '192.168.100.1'
+
+
+def test_get_set_expire(mocker: MockerFixture) -> None:
+    monotonic = mocker.patch('mb8611.response_cache.time.monotonic', return_value=100.0)
+    cache = ResponseCache({'GetMotoStatusSoftware': 10})
+    cache.set(HOST, 'GetMotoStatusSoftware', {'GetMotoStatusSoftwareResult': 'OK'})
+    cache.set(HOST, 'GetMotoStatusLog', {'GetMotoStatusLogResult': 'OK'})
+    assert cache.get(HOST, 'GetMotoStatusSoftware') == {'GetMotoStatusSoftwareResult': 'OK'}
+    assert cache.get(HOST, 'GetMotoStatusLog') is None
+    monotonic.return_value = 110.0
+    assert cache.get(HOST, 'GetMotoStatusSoftware') is None
+
+
+def test_max_size() -> None:
+    cache = ResponseCache(
+        {
+            'GetHomeAddress': 60,
+            'GetMotoStatusSoftware': 60,
+            'GetMotoLagStatus': 60
+        }, max_size=2)
+    cache.set(HOST, 'GetHomeAddress', 1)
+    cache.set(HOST, 'GetMotoStatusSoftware', 2)
+    assert cache.get(HOST, 'GetHomeAddress') == 1
+    cache.set(HOST, 'GetMotoLagStatus', 3)
+    assert cache.get(HOST, 'GetMotoStatusSoftware') is None
+    assert cache.get(HOST, 'GetHomeAddress') == 1
+    assert cache.get(HOST, 'GetMotoLagStatus') == 3
+
+
+def test_invalidate_and_clear() -> None:
+    cache = ResponseCache({'GetHomeAddress': 60, 'GetMotoStatusSoftware': 60})
+    cache.set(HOST, 'GetHomeAddress', 1)
+    cache.set(HOST, 'GetMotoStatusSoftware', 2)
+    cache.invalidate(HOST, ['GetHomeAddress', 'GetMotoLagStatus'])
+    assert cache.get(HOST, 'GetHomeAddress') is None
+    assert cache.get(HOST, 'GetMotoStatusSoftware') == 2
+    cache.clear()
+    assert cache.get(HOST, 'GetMotoStatusSoftware') is None
+
+
+def test_hosts_and_copies() -> None:
+    cache = ResponseCache({'GetMotoStatusSoftware': 60})
+    section = {'StatusSoftwareSfVer': '1'}
+    cache.set(HOST, 'GetMotoStatusSoftware', section)
+    section['StatusSoftwareSfVer'] = '2'
+    assert cache.get('192.168.100.2', 'GetMotoStatusSoftware') is None
+    cached = cache.get(HOST, 'GetMotoStatusSoftware')
+    assert cached == {'StatusSoftwareSfVer': '1'}
+    cached['StatusSoftwareSfVer'] = '3'
+    assert cache.get(HOST, 'GetMotoStatusSoftware') == {'StatusSoftwareSfVer': '1'}
+    cache.invalidate('192.168.100.2', ['GetMotoStatusSoftware'])
+    assert cache.get(HOST, 'GetMotoStatusSoftware') is not None
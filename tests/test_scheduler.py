@@ -0,0 +1,151 @@
+from __future__ import annotations
+
+from typing import TYPE_CHECKING, Any
+
+from mb8611.scheduler import Cadence, Scheduler
+from requests import ConnectionError as RequestsConnectionError
+import pytest
+
+if TYPE_CHECKING:
+    from collections.abc import Collection
+
+    from pytest_mock import MockerFixture
+
+
+class FakeClock:
+    def __init__(self) -> None:
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+    def sleep(self, seconds: float) -> None:
+        self.now += seconds
+
+
+def make_response(actions: Collection[str], values: dict[str, str]) -> dict[str, Any]:
+    top: dict[str, Any] = {
+        f'{action}Response': {
+            'Value': values.get(action, ''),
+            f'{action}Result': 'OK'
+        }
+        for action in actions
+    }
+    top['GetMultipleHNAPsResult'] = 'OK'
+    return {'GetMultipleHNAPsResponse': top}
+
+
+def test_scheduler(mocker: MockerFixture) -> None:
+    clock = FakeClock()
+    values = {'GetMotoStatusLog': 'a'}
+    client = mocker.MagicMock()
+    client.call_multiple_hnaps.side_effect = lambda actions, **_: make_response(actions, values)
+    scheduler = Scheduler(client, ('GetMotoStatusLog', 'GetMotoStatusSoftware'),
+                          cadences={
+                              'GetMotoStatusLog': Cadence(10, 40),
+                              'GetMotoStatusSoftware': Cadence(100, 1000)
+                          },
+                          window=10,
+                          clock=clock,
+                          sleep=clock.sleep)
+    ticks = scheduler.run()
+    tick = next(ticks)
+    assert tick.actions == ('GetMotoStatusLog', 'GetMotoStatusSoftware')
+    assert tick.changed == tick.actions
+    client.call_multiple_hnaps.assert_called_once_with(tick.actions, check=False)
+    times = []
+    for _ in range(3):
+        tick = next(ticks)
+        times.append(clock.now)
+        assert tick.actions == ('GetMotoStatusLog',)
+        assert not tick.changed
+    assert times == [10, 30, 70]
+    assert scheduler.intervals['GetMotoStatusLog'] == 40
+    # The log is due at 110 and is sent early with the software information.
+    values['GetMotoStatusLog'] = 'b'
+    tick = next(ticks)
+    assert clock.now == 100
+    assert tick.actions == ('GetMotoStatusLog', 'GetMotoStatusSoftware')
+    assert tick.changed == ('GetMotoStatusLog',)
+    assert scheduler.intervals == {'GetMotoStatusLog': 10, 'GetMotoStatusSoftware': 200}
+    assert scheduler.next_due() == 110
+
+
+def test_scheduler_window(mocker: MockerFixture) -> None:
+    clock = FakeClock()
+    client = mocker.MagicMock()
+    client.call_multiple_hnaps.side_effect = lambda actions, **_: make_response(actions, {})
+    scheduler = Scheduler(client, ('GetHomeAddress', 'GetHomeConnection'),
+                          cadences={
+                              'GetHomeAddress': Cadence(10, 10),
+                              'GetHomeConnection': Cadence(11, 11)
+                          },
+                          window=2,
+                          clock=clock)
+    assert scheduler.tick() is not None
+    assert scheduler.tick() is None
+    assert scheduler.due() == ()
+    clock.now = 10
+    assert scheduler.due() == ('GetHomeAddress', 'GetHomeConnection')
+
+
+def test_scheduler_errors(mocker: MockerFixture) -> None:
+    clock = FakeClock()
+    client = mocker.MagicMock()
+    client.call_multiple_hnaps.side_effect = RequestsConnectionError
+    scheduler = Scheduler(client, ('GetHomeAddress', 'GetMotoStatusLog'), clock=clock)
+    with pytest.raises(RequestsConnectionError):
+        scheduler.tick()
+    assert scheduler.next_due() == 10
+    clock.now = 300
+    client.call_multiple_hnaps.side_effect = None
+    client.call_multiple_hnaps.return_value = {
+        'GetMultipleHNAPsResponse': {
+            'GetMultipleHNAPsResult': 'UN-AUTH'
+        }
+    }
+    tick = scheduler.tick()
+    assert tick is not None
+    assert not tick.changed
+    client.login.assert_called_once_with()
+    assert scheduler.next_due() == 310
+    clock.now = 600
+    client.call_multiple_hnaps.return_value = {
+        'GetMultipleHNAPsResponse': {
+            'GetHomeAddressResponse': {
+                'GetHomeAddressResult': 'ERROR'
+            },
+            'GetMotoStatusLogResponse': {
+                'GetMotoStatusLogResult': 'OK'
+            },
+            'GetMultipleHNAPsResult': 'OK'
+        }
+    }
+    tick = scheduler.tick()
+    assert tick is not None
+    assert tick.changed == ('GetMotoStatusLog',)
+    assert scheduler.intervals == {'GetHomeAddress': 300, 'GetMotoStatusLog': 10}
+    assert scheduler.next_due() == 610
+
+
+def test_scheduler_logs_in_again(mocker: MockerFixture) -> None:
+    clock = FakeClock()
+    client = mocker.MagicMock()
+    client.call_multiple_hnaps.side_effect = [
+        make_response(('GetHomeAddress',), {'GetHomeAddress': 'a'}), {
+            'GetMultipleHNAPsResponse': {
+                'GetMultipleHNAPsResult': 'UN-AUTH'
+            }
+        },
+        make_response(('GetHomeAddress',), {'GetHomeAddress': 'b'})
+    ]
+    scheduler = Scheduler(client, ['GetHomeAddress'], clock=clock)
+    assert scheduler.tick() is not None
+    client.login.assert_not_called()
+    clock.now = 300
+    tick = scheduler.tick()
+    assert tick is not None
+    assert tick.changed == ('GetHomeAddress',)
+    client.login.assert_called_once_with()
+    assert client.private_key == 'withoutloginkey'
+    assert client.call_multiple_hnaps.call_count == 3
@@ -0,0 +1,32 @@
+from pathlib import Path
+import stat
+
+from mb8611.session_cache import SessionCache
+import pytest
+
+
+def test_session_cache(tmp_path: Path) -> None:
+    cache = SessionCache(tmp_path / 'sub' / 'sessions.json')
+    assert cache.get('host', 'admin') is None
+    cache.set('host', 'admin', {'private_key': 'KEY', 'uid': 'uid'})
+    assert cache.get('host', 'admin') == {'private_key': 'KEY', 'uid': 'uid'}
+    assert cache.get('host', 'user') is None
+    assert stat.S_IMODE(cache.path.stat().st_mode) == 0o600
+    assert stat.S_IMODE(cache.path.parent.stat().st_mode) == 0o700
+    cache.delete('host', 'admin')
+    assert cache.get('host', 'admin') is None
+    cache.delete('host', 'admin')
+
+
+def test_session_cache_corrupt(tmp_path: Path) -> None:
+    path = tmp_path / 'sessions.json'
+    path.write_text('{', encoding='utf-8')
+    cache = SessionCache(path)
+    assert cache.get('host', 'admin') is None
+    path.write_text('[]', encoding='utf-8')
+    assert cache.get('host', 'admin') is None
+
+
+def test_session_cache_default_path(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setenv('XDG_CACHE_HOME', str(tmp_path))
+    assert SessionCache().path == tmp_path / 'mb8611' / 'sessions.json'
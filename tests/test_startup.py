@@ -0,0 +1,47 @@
+"""Start-up time budget of the ``mb8611`` command."""
+from collections.abc import Sequence
+import re
+import subprocess as sp
+import sys
+
+HELP_BUDGET_US = 150_000
+"""Budget of imports in microseconds for ``mb8611 --help``."""
+ACTION_BUDGET_US = 400_000
+"""Budget of imports in microseconds for calling an action."""
+_IMPORT_TIME_RE = re.compile(r'^import time:\s+\d+ \|\s+(\d+) \| ( *)(\S+)$')
+
+
+def _import_times(args: Sequence[str]) -> dict[str, int]:
+    """Run the command with ``-X importtime`` and return cumulative times of top-level imports."""
+    stderr = sp.run(
+        (sys.executable, '-X', 'importtime', '-c',
+         f'from mb8611.main import main; main({list(args)!r})'),
+        capture_output=True,
+        check=False,
+        text=True,
+    ).stderr
+    times: dict[str, int] = {}
+    for line in stderr.splitlines():
+        if (match := _IMPORT_TIME_RE.match(line)) is not None and not match.group(2):
+            if match.group(3) == 'site':
+                # Everything before this is interpreter start-up.
+                times.clear()
+                continue
+            times[match.group(3)] = times.get(match.group(3), 0) + int(match.group(1))
+    return times
+
+
+def test_help_import_budget() -> None:
+    times = _import_times(['--help'])
+    assert 'mb8611.main' in times
+    assert 'requests' not in times
+    assert 'urllib3' not in times
+    assert 'mb8611.api' not in times
+    assert sum(times.values()) < HELP_BUDGET_US, times
+
+
+def test_action_import_budget() -> None:
+    # Nothing listens on port 1 so the action fails after every module it needs is imported.
+    times = _import_times(['-H', '127.0.0.1:1', 'software'])
+    assert 'requests' in times
+    assert sum(times.values()) < ACTION_BUDGET_US, times
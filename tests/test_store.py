@@ -0,0 +1,87 @@
+from pathlib import Path
+import time
+
+from mb8611.channels import DownstreamChannel, UpstreamChannel
+from mb8611.store import ChannelStore
+import pytest
+
+HOST = '192.168.100.1'
+
+
+def down(power: float, corrected: int, lock_status: str = 'Locked') -> DownstreamChannel:
+    return DownstreamChannel(1, lock_status, 'QAM256', 20, 543.0, power, 40.0, corrected, 0)
+
+
+def test_add_and_query(tmp_path: Path) -> None:
+    with ChannelStore(tmp_path / 'db.sqlite3', batch_size=2) as store:
+        store.add(HOST, 10, (down(1.0, 5),),
+                  (UpstreamChannel(1, 'Locked', 'SC-QAM', 3, 5120, 17.6, 40.3),))
+        store.add(HOST, 20, (down(2.0, 6),))
+        points = store.query(HOST, 20, 0, 100)
+        assert [(p.ts, p.power, p.corrected) for p in points] == [(10, 1.0, 5), (20, 2.0, 6)]
+        up = store.query(HOST, 3, 0, 100, direction='up')
+        assert len(up) == 1
+        assert up[0].snr is None
+        assert not store.query('other', 20, 0, 100)
+    with ChannelStore(tmp_path / 'db.sqlite3') as store:
+        assert len(store.query(HOST, 20, 0, 100)) == 2
+
+
+def test_add_response() -> None:
+    with ChannelStore(':memory:') as store:
+        store.add_response(
+            HOST, 10, {
+                'GetMultipleHNAPsResponse': {
+                    'GetMotoStatusDownstreamChannelInfoResponse': {
+                        'MotoConnDownstreamChannel': '1^Locked^QAM256^20^543.0^2.8^43.4^12^0^',
+                        'GetMotoStatusDownstreamChannelInfoResult': 'OK'
+                    },
+                    'GetMultipleHNAPsResult': 'OK'
+                }
+            })
+        assert store.query(HOST, 20, 0, 100)[0].snr == pytest.approx(43.4)
+
+
+def test_rollup_and_retention() -> None:
+    with ChannelStore(':memory:', retention={0: 3600}) as store:
+        for i in range(12):
+            store.add(HOST, 3600 + i * 10, (down(float(i), i, 'Locked' if i % 2 else 'Unlocked'),))
+        store.rollup(now=3600 + 130)
+        minutes = store.query(HOST, 20, 0, 10000, resolution=60)
+        assert [(p.ts, p.samples) for p in minutes] == [(3600, 6), (3660, 6)]
+        assert minutes[0].power == pytest.approx(2.5)
+        assert minutes[0].locked == pytest.approx(0.5)
+        assert minutes[1].corrected == 11
+        assert not store.query(HOST, 20, 0, 10000, resolution=3600)
+        store.rollup(now=7200 + 300)
+        hours = store.query(HOST, 20, 0, 10000, resolution=3600)
+        assert len(hours) == 1
+        assert hours[0].samples == 12
+        assert hours[0].power == pytest.approx(5.5)
+        # Raw samples older than an hour are removed.
+        assert not store.query(HOST, 20, 0, 10000)
+        assert len(store.query(HOST, 20, 0, 10000, resolution=60)) == 2
+
+
+def test_start_rollups() -> None:
+    store = ChannelStore(':memory:')
+    ts = time.time() - 120
+    store.add(HOST, ts, (down(1.0, 1),))
+    store.start_rollups(0.01)
+    store.start_rollups(0.01)
+    deadline = time.monotonic() + 5
+    while not store.query(HOST, 20, ts - 60, ts + 60,
+                          resolution=60) and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert store.query(HOST, 20, ts - 60, ts + 60, resolution=60)
+    store.close()
+
+
+def test_rollup_counter_reset() -> None:
+    with ChannelStore(':memory:') as store:
+        for ts, corrected in ((3600, 100), (3610, 200), (3620, 5), (3660, 7), (3720, 3)):
+            store.add(HOST, ts, (down(1.0, corrected),))
+        store.rollup(now=7200 + 60)
+        minutes = store.query(HOST, 20, 0, 10000, resolution=60)
+        assert [(p.ts, p.corrected) for p in minutes] == [(3600, 5), (3660, 7), (3720, 3)]
+        assert store.query(HOST, 20, 0, 10000, resolution=3600)[0].corrected == 3
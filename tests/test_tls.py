@@ -0,0 +1,77 @@
+from __future__ import annotations
+
+from typing import TYPE_CHECKING
+import logging
+import shutil
+import socket
+import subprocess as sp
+
+from mb8611.client import Client
+from mb8611.testing.emulator import Emulator, running
+from mb8611.tls import FingerprintStore, PinnedAdapter, ResumingSSLContext, pinned_adapter
+from requests.exceptions import SSLError
+import pytest
+
+if TYPE_CHECKING:
+    from pathlib import Path
+
+    from pytest_mock.plugin import MockerFixture
+
+OPENSSL = shutil.which('openssl')
+
+
+@pytest.fixture
+def certfile(tmp_path: Path) -> Path:
+    if OPENSSL is None:
+        pytest.skip('openssl is not installed')
+    path = tmp_path / 'cert.pem'
+    sp.run((OPENSSL, 'req', '-x509', '-newkey', 'rsa:2048', '-nodes', '-subj', '/CN=localhost',
+            '-days', '1', '-keyout', str(path), '-out', str(path)),
+           check=True,
+           capture_output=True)
+    return path
+
+
+def test_pinned_adapter_trust_on_first_use(certfile: Path, tmp_path: Path,
+                                           caplog: pytest.LogCaptureFixture) -> None:
+    store = FingerprintStore(tmp_path / 'fingerprints.json')
+    context = ResumingSSLContext()
+    with running(Emulator('pass'), certfile=certfile) as server:
+        adapter = pinned_adapter(server.host, store, ssl_context=context)
+        assert adapter.fingerprint == store.get(server.host)
+        assert adapter.fingerprint is not None
+        assert len(adapter.fingerprint) == 64
+        with caplog.at_level(logging.DEBUG, logger='mb8611.tls'):
+            for _ in range(2):
+                with Client('pass',
+                            server.host,
+                            adapter=pinned_adapter(server.host, store,
+                                                   ssl_context=context)) as client:
+                    assert client.call_multiple_hnaps([
+                        'GetHomeAddress'
+                    ])['GetMultipleHNAPsResponse']['GetMultipleHNAPsResult'] == 'OK'
+        assert 'TLS session was resumed.' in caplog.messages
+        store.set(server.host, '0' * 64)
+        with pytest.raises(SSLError), Client('pass',
+                                             server.host,
+                                             adapter=pinned_adapter(server.host,
+                                                                    store,
+                                                                    ssl_context=context)):
+            pass
+
+
+def test_pinned_adapter_pool_kwargs(mocker: MockerFixture) -> None:
+    init_poolmanager = mocker.patch('requests.adapters.HTTPAdapter.init_poolmanager')
+    context = ResumingSSLContext()
+    PinnedAdapter('ab:cd', ssl_context=context, pool_maxsize=2)
+    init_poolmanager.assert_called_once()
+    args, kwargs = init_poolmanager.call_args
+    assert args == (1, 2, False)
+    assert kwargs['ssl_context'] is context
+    assert kwargs['assert_fingerprint'] == 'ab:cd'
+    assert (socket.SOL_SOCKET, socket.SO_KEEPALIVE, 1) in kwargs['socket_options']
+    init_poolmanager.reset_mock()
+    PinnedAdapter(keep_alive=False)
+    _, kwargs = init_poolmanager.call_args
+    assert 'assert_fingerprint' not in kwargs
+    assert 'socket_options' not in kwargs
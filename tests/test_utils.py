@@ -1,4 +1,12 @@
-from mb8611.utils import parse_table_str
+from mb8611.utils import (
+    HNAPSigner,
+    iter_table_rows,
+    make_hnap_auth,
+    parse_table_str,
+    parse_uptime,
+)
+from pytest_mock.plugin import MockerFixture
+import pytest
 
 
 def test_parse_table_str() -> None:
@@ -13,3 +21,35 @@ def test_parse_table_str_different_delim() -> None:
     assert items[0][0] == 'A'
     assert len(items) == 3
     assert items[2][3] == '8'
+
+
+def test_iter_table_rows() -> None:
+    rows = iter_table_rows('a^b}-{c^d}-{e', '}-{')
+    assert next(rows) == ['a', 'b']
+    assert list(rows) == [['c', 'd'], ['e']]
+
+
+def test_iter_table_rows_bytes() -> None:
+    assert list(iter_table_rows(b'a^\xc3\xa9|+|c^d')) == [['a', '\xe9'], ['c', 'd']]
+
+
+def test_iter_table_rows_empty() -> None:
+    assert list(iter_table_rows('')) == [['']]
+
+
+def test_parse_uptime() -> None:
+    assert parse_uptime('12 days 03h:45m:06s') == 12 * 86400 + 3 * 3600 + 45 * 60 + 6
+    assert parse_uptime('1 day 00h:00m:01s') == 86401
+    assert parse_uptime('00h:02m:00s') == 120
+    with pytest.raises(ValueError, match='Invalid uptime'):
+        parse_uptime('unknown')
+
+
+def test_hnap_signer(mocker: MockerFixture) -> None:
+    mocker.patch('mb8611.utils.time.time_ns', return_value=1_700_000_000_123_456_789)
+    signer = HNAPSigner('KEY')
+    assert signer.private_key == 'KEY'
+    assert signer.soap_action('Login') == '"http://purenetworks.com/HNAP1/Login"'
+    assert signer.sign('Login') == make_hnap_auth('Login', 'KEY')
+    assert signer.sign('Login').endswith(' 1700000000123')
+    assert signer.sign('GetMultipleHNAPs') == make_hnap_auth('GetMultipleHNAPs', 'KEY')